@@ -1,3 +1,5 @@
+import startup  # first, so the imports below show up in the startup profile
+startup.PROFILER.track_imports()
 import sounddevice as sd
 import numpy as np
 import threading
@@ -9,22 +11,64 @@ import keyboard
 import cv2
 from djitellopy import Tello
 from dotenv import load_dotenv
-import azure.cognitiveservices.speech as speechsdk
-from gesture_utils import detect_gesture
+import gesture_utils
+from frame_pipeline import GesturePipeline
+from voice_commands import CommandRegistry
+from command_executor import CommandExecutor, MOVE, ACTION, SAFETY
+from metrics import METRICS, throttled
+from gesture_temporal import TemporalGestureRecognizer, RELEASE
+from telemetry import TelemetryStore
+from frame_preprocess import FramePreprocessor
+from capture import CaptureRecorder
+from audio_stream import MicrophoneStream, block_rms
+from speech_backends import AzureSpeechBackend
 
 class RobartistController:
-    def __init__(self, speech_key, service_region):
+    def __init__(self, speech_key, service_region, backend=None):
         self.samplerate = 16000
         self.channels = 1
         self.device_id = 0
         self.speech_key = speech_key
         self.service_region = service_region
         self.audio_queue = queue.Queue()
+        # one recognition session for the whole run; pass a FakeSpeechBackend to run without Azure
+        self.backend = backend or AzureSpeechBackend(speech_key, service_region, self.samplerate)
+        self.persistent_session = True  # False: old per-press setup and 4 s recording
+        self.listen_seconds = 4
+        self.speech_rms_threshold = 500
+        self.results = queue.Queue()
+        self.command_fired = threading.Event()
+        self.press_id = 0
+        self.active_press = None  # id of the key press whose result is awaited, None between presses
+        self.latencies = []
         self.drone = Tello()
+        self.executor = CommandExecutor()  # all drone I/O happens on its thread
+        self.commands = CommandRegistry(aliases={"takeoff": ["hello"]})
+        self.commands.bind_all({
+            "takeoff": lambda: self.executor.submit("takeoff", self.drone.takeoff, kind=ACTION),
+            "land": lambda: self.executor.submit("land", self.drone.land, kind=SAFETY),
+            "forward": lambda: self.executor.submit("forward", self.drone.move_forward, 30, kind=MOVE),
+            "backward": lambda: self.executor.submit("backward", self.drone.move_back, 30, kind=MOVE),
+            "left": lambda: self.executor.submit("left", self.drone.move_left, 30, kind=MOVE),
+            "right": lambda: self.executor.submit("right", self.drone.move_right, 30, kind=MOVE),
+            "picture": self._take_picture,
+            "record": self._toggle_recording,
+            "clip": self._save_clip,
+            "burst": self._burst,
+            "bazinga": lambda: self.executor.submit("bazinga", self.drone.rotate_counter_clockwise, 45, kind=MOVE),
+            "banana": self.gesture_show_off,
+        })
         self.connected = False
         logging.basicConfig(level=logging.INFO, filename='robartist.log',
                             format='%(asctime)s - %(levelname)s - %(message)s')
         self.kill = False
+        self.recorder = None  # set a FlightRecorder to record gesture flights for replay
+        self.video = None     # Warmup of the video stream start, see _video()
+        self.telemetry = TelemetryStore()  # state stream history, filled once the drone is connected
+        # full-size frames, no letterbox: the gesture pipeline shares one RGB view per frame
+        self.preprocess = FramePreprocessor(size=None, img_size=None)
+        # photos / clips / flight video, encoded on background threads into captures/
+        self.capture = CaptureRecorder(self._current_frame)
 
     def connect_drone(self, address):
         try:
@@ -38,14 +82,34 @@ class RobartistController:
     def _set_tello(self):
         try:
             self.drone.connect()
+            self.telemetry.start(self.drone.get_current_state)
             self.connected = True
-            self.drone.streamon()
-            self.frame_reader = self.drone.get_frame_read()
-            time.sleep(2)
-            logging.info("Tello connected and video stream started.")
+            logging.info("Tello connected.")
+            # voice commands do not need video: the stream comes up in the background
+            self.video = startup.PROFILER.background("tello.video", self._start_video)
         except Exception as e:
             logging.error(f"Error in _set_tello: {e}")
 
+    def _start_video(self):
+        # streamon and wait for the first decoded frame instead of a fixed 2 s sleep
+        self.drone.streamon()
+        reader = self.drone.get_frame_read()
+        deadline = time.monotonic() + 5
+        while reader.frame.shape[:2] == (300, 400) and time.monotonic() < deadline:  # djitellopy's placeholder
+            time.sleep(0.05)
+        logging.info("Tello video stream started.")
+        return reader
+
+    def _stream(self):
+        # start the stream in the background unless it is up or coming up; never waits
+        if self.video is None:
+            self.video = startup.PROFILER.background("tello.video", self._start_video)
+        return self.video
+
+    def _video(self):
+        # the frame reader; starts the stream on first use, or waits for the background start
+        return self._stream().result()
+
     def _set_microphone(self):
         devices = sd.query_devices()
         print("Available microphones:")
@@ -65,38 +129,112 @@ class RobartistController:
         logging.info(f"Voice command received: {command}")
         print(f"[Voice Command] {command}")
         try:
-            if "hello" in command:
-                self.drone.takeoff()
-            elif "land" in command:
-                self.drone.land()
-            elif "forward" in command:
-                self.drone.move_forward(30)
-                # self.drone.send_rc_control(0, 0, 0, 0)
-            elif "backward" in command:
-                self.drone.move_back(30)
-                # self.drone.send_rc_control(0, 0, 0, 0)
-            elif "left" in command:
-                self.drone.move_left(30)
-                # self.drone.send_rc_control(0, 0, 0, 0)
-            elif "right" in command:
-                self.drone.move_right(30)
-                # self.drone.send_rc_control(0, 0, 0, 0)
-            # elif "stop" in command or "hover" in command:
-                # self.drone.send_rc_control(0, 0, 0, 0)
-            elif "picture" in command:
-                frame = self.drone.get_frame_read().frame
-                cv2.imwrite("customer_photo.jpg", frame)
-                print("Picture taken.")
-            elif "bazinga" in command:
-                self.drone.rotate_counter_clockwise(45)
-            elif "banana" in command:
-                self.gesture_show_off()
-            else:
+            if self.commands.dispatch(command) is None:
                 print(f"Unrecognized command: {command}")
         except Exception as e:
             logging.error(f"Failed to execute command '{command}': {e}")
 
+    def _current_frame(self):
+        # newest decoded frame while the stream is up, else None; capture never starts the stream itself
+        if self.video is None or not self.video.done():
+            return None
+        return self.video.result().frame
+
+    # capture commands only queue the stream start: photo() / burst() arm on the next frame
+    def _take_picture(self):
+        self._stream()
+        path = self.capture.photo()
+        print(f"Picture taken: {path}" if path else "Picture skipped: encoders busy.")
+
+    def _toggle_recording(self):
+        if self.capture.recording:
+            self.capture.stop_recording()
+            print(f"Recording stopped: {self.capture.stats()}")
+        else:
+            self._stream()
+            self.capture.start_recording()
+            print("Recording flight video.")
+
+    def _save_clip(self):
+        path = self.capture.save_last(5)
+        print(f"Saving the last 5 s: {path}" if path else "No recent video to save.")
+
+    def _burst(self):
+        self._stream()
+        print(f"Burst: {len(self.capture.burst(5))} photos")
+
+    def _start_session(self):
+        self.backend.start(self._on_recognized, self._on_recognizing)
+        logging.info(f"Speech session setup: {self.backend.setup_time * 1000:.0f} ms (once per run)")
+
+    def _on_recognized(self, text):
+        # called on the backend's thread, possibly while the operator is still speaking;
+        # a result finalized after its press was given up on must not run as the next command
+        press = self.active_press
+        if press is None:
+            logging.info(f"Dropped late speech result: {text}")
+            return
+        self.results.put((time.monotonic(), text, press))
+        self.command_fired.set()
+
+    def _on_recognizing(self, text):
+        print(f"... {text}")
+
+    def stream_and_process(self):
+        if self.backend.canceled:
+            print("Speech session was canceled, reconnecting...")
+            try:
+                self.backend.restart()
+            except Exception as e:
+                print(f"[Azure Recognition Error] {e}")
+                logging.error(f"Speech session restart failed: {e}")
+                return
+        print("Listening...")
+        while not self.results.empty():
+            self.results.get_nowait()  # drop late results of the previous press
+        self.command_fired.clear()
+        self.press_id += 1
+        press = self.active_press = self.press_id
+        key_time = time.monotonic()
+        speech_end = None
+        deadline = key_time + self.listen_seconds
+        with MicrophoneStream(self.samplerate, self.channels, self.device_id, audio_queue=self.audio_queue):
+            while not self.command_fired.is_set() and time.monotonic() < deadline:
+                try:
+                    capture_time, data = self.audio_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if block_rms(data) > self.speech_rms_threshold:
+                    speech_end = capture_time
+                self.backend.write(data)
+        while not self.audio_queue.empty():
+            self.audio_queue.get_nowait()
+
+        try:
+            if not self.command_fired.is_set():
+                self.backend.write_silence(0.3)  # no more audio comes: let the recognizer end the utterance
+            fired = self.command_fired.wait(1.0)
+        finally:
+            self.active_press = None
+        if not fired:
+            print("No speech could be recognized.")
+            return
+        result_time, text, tag = self.results.get()
+        if tag != press:  # cannot happen while results are drained per press; never run another press's command
+            logging.warning(f"Discarded speech result of press {tag} during press {press}: {text}")
+            return
+        print(f"Recognized: {text}")
+        if speech_end is not None:
+            latency = (result_time - speech_end) * 1000
+            self.latencies.append(latency)
+            logging.info(f"Utterance latency (persistent session): {latency:.0f} ms after end of speech, "
+                         f"{(result_time - key_time) * 1000:.0f} ms after key press, "
+                         f"median {np.median(self.latencies):.0f} ms over {len(self.latencies)} utterances")
+        self._handle_command(text)
+
     def record_and_process(self):
+        import azure.cognitiveservices.speech as speechsdk
+
         try:
             print("Please speak clearly into the microphone after the beep.")
             time.sleep(0.5)
@@ -110,16 +248,22 @@ class RobartistController:
             audio_bytes = audio.tobytes()
 
             # Azure Speech recognition setup
+            setup_start = time.perf_counter()
             speech_config = speechsdk.SpeechConfig(subscription=self.speech_key, region=self.service_region)
             stream = speechsdk.audio.PushAudioInputStream()
             audio_config = speechsdk.audio.AudioConfig(stream=stream)
             recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
 
+            setup_ms = (time.perf_counter() - setup_start) * 1000
+
             stream.write(audio_bytes)
             stream.close()
 
             print("Recognizing...")
+            recognize_start = time.perf_counter()
             result = recognizer.recognize_once()
+            logging.info(f"Utterance latency (per-press session): setup {setup_ms:.0f} ms, "
+                         f"recognition {(time.perf_counter() - recognize_start) * 1000:.0f} ms after 4 s recording")
 
             if result.reason == speechsdk.ResultReason.RecognizedSpeech:
                 print(f"Recognized: {result.text}")
@@ -140,20 +284,44 @@ class RobartistController:
         while True:
             key = keyboard.read_key()
             if key == 'v':
-                self.record_and_process()
+                if self.persistent_session:
+                    self.stream_and_process()
+                else:
+                    self.record_and_process()
             elif key == 'k':
                 print("Kill signal received. Exiting...")
+                if self.persistent_session:
+                    self.backend.stop()
                 os._exit(0)  # Force exit entire program
 
-    def run(self):
-        self._set_microphone()
+    def start(self, background=True):
+        # the recognition session starts while the operator picks a microphone;
+        # background=False runs the same steps one after another, for comparison
+        profiler = startup.PROFILER
+        session = None
+        if self.persistent_session:
+            session = profiler.background("speech.session", self._start_session, foreground=not background)
+        with profiler.step("microphone.select"):
+            self._set_microphone()
+        if session is not None:
+            session.result()
         # self._set_tello()
+        if background:
+            profiler.background("mediapipe.hands", gesture_utils.get_hands_detector)
+        return profiler.ready()
+
+    def run(self):
+        self.start()
+        self.capture.start()
+        METRICS.start_flush("metrics.jsonl")  # per-stage latency percentiles every 10 s
         threading.Thread(target=self.listen_for_key, daemon=True).start()
         try:
             while True:
                 time.sleep(1)
         except KeyboardInterrupt:
             print("Exiting...")
+        finally:
+            self.capture.close()
 
     def gesture_test(self):
         for i in range(10):
@@ -162,55 +330,44 @@ class RobartistController:
 
     def gesture_show_off(self):
         self.kill = False  # Reset the flag at the start
-        last_gesture = None
-        last_command_time = 0
-        cooldown = 2
+        # a gesture acts once it is steady for a few frames; held moves repeat
+        recognizer = TemporalGestureRecognizer(repeatable=("fist", "victory", "index_up"))
 
-        print("Starting gesture control mode. Press 'v' to exit or 'q' in window.")
+        def on_gesture(gesture, packet):
+            # runs on the pipeline's inference thread for every classified frame
+            if throttled("gesture"):
+                print("Gesture:", gesture)
 
-        while not self.kill:  # <--- Modify here
-            try:
-                frame = self.frame_reader.frame
-                if frame is None:
-                    time.sleep(0.1)
+            for event in recognizer.update(gesture, packet.capture_time):
+                if event.kind == RELEASE:
                     continue
+                if event.gesture == "open_palm":
+                    self.executor.submit("takeoff", self.drone.takeoff, kind=ACTION)
+                elif event.gesture == "fist":
+                    self.executor.submit("gesture_down", self.drone.move_down, 30, kind=MOVE)
+                elif event.gesture == "victory":
+                    self.executor.submit("gesture_rotate", self.drone.rotate_clockwise, 45, kind=MOVE)
+                elif event.gesture == "index_up":
+                    self.executor.submit("gesture_up", self.drone.move_up, 30, kind=MOVE)
+                elif event.gesture == "thumb_up":
+                    print("Thumb up gesture detected. Exiting gesture mode.")
+                    return False
 
-                gesture = detect_gesture(frame)
-                print("Gesture:", gesture)
+        print("Starting gesture control mode. Press 'v' to exit or 'q' in window.")
 
-                current_time = time.time()
-                if gesture == "thumb_up":
-                    print("Thumb up gesture detected. Exiting gesture mode.")
-                    break
-                if gesture != last_gesture and (current_time - last_command_time > cooldown):
-                    if gesture == "open_palm":
-                        self.drone.takeoff()
-                    elif gesture == "fist":
-                        self.drone.move_down(30)
-                    elif gesture == "victory":
-                        self.drone.rotate_clockwise(45)
-                    elif gesture == "index_up":
-                        self.drone.move_up(30)
-
-                    last_command_time = current_time
-                    last_gesture = gesture
-
-                cv2.putText(frame, f"Gesture: {gesture}", (30, 50),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
-                cv2.imshow("Gesture Control", frame)
-                if cv2.waitKey(10) & 0xFF in [ord('q'), 27]:
-                    print("Key 'q' or ESC pressed. Exiting gesture mode.")
-                    break
-
-                time.sleep(0.03)
-            except KeyboardInterrupt:
-                break
-            except Exception as e:
-                print(f"[Gesture Loop Error] {e}")
-                logging.error(f"Error inside gesture control loop: {e}")
-                time.sleep(0.5)
+        # capture, gesture inference and display run as separate stages; stale frames are dropped
+        self.executor.recorder = self.recorder
+        reader = self._video()
+        pipeline = GesturePipeline(lambda: reader.frame, on_gesture, should_stop=lambda: self.kill,
+                                   recorder=self.recorder, telemetry=self.telemetry,
+                                   preprocess=self.preprocess)
+        try:
+            pipeline.run()
+        except KeyboardInterrupt:
+            print("Gesture control interrupted by user.")
 
         self.drone.streamoff()
+        self.video = None  # restart the stream next time
         cv2.destroyAllWindows()
 
 
@@ -1,3 +1,5 @@
+import startup  # first, so the imports below show up in the startup profile
+startup.PROFILER.track_imports()
 import sounddevice as sd
 import numpy as np
 import threading
@@ -5,26 +7,64 @@ import logging
 import queue
 import json
 import os
-from vosk import Model, KaldiRecognizer
 from djitellopy import Tello
 from dotenv import load_dotenv
 import time
 import keyboard  # pip install keyboard
 import cv2
-from gesture_utils import detect_gesture
+import gesture_utils
+from frame_pipeline import GesturePipeline
+from audio_stream import MicrophoneStream, block_rms
+from voice_commands import CommandRegistry
+from command_executor import CommandExecutor, MOVE, ACTION, SAFETY
+from metrics import METRICS, throttled
+from gesture_temporal import TemporalGestureRecognizer, RELEASE
+from telemetry import TelemetryStore
+from frame_preprocess import FramePreprocessor
+from capture import CaptureRecorder
 
 class RobartistController:
     def __init__(self, model_path):
         self.samplerate = 16000
         self.channels = 1
         self.device_id = 0
-        self.model = Model(model_path)
-        self.recognizer = KaldiRecognizer(self.model, self.samplerate)
-        self.audio_queue = queue.Queue()
         self.drone = Tello()
+        self.executor = CommandExecutor()  # all drone I/O happens on its thread
+        self.commands = CommandRegistry()
+        self.commands.bind_all({
+            "takeoff": lambda: self.executor.submit("takeoff", self._takeoff, kind=ACTION),
+            "land": lambda: self.executor.submit("land", self.drone.land, kind=SAFETY),
+            "forward": lambda: self.executor.submit("forward", self.drone.move_forward, 30, kind=MOVE),
+            "backward": lambda: self.executor.submit("backward", self.drone.move_back, 30, kind=MOVE),
+            "left": lambda: self.executor.submit("left", self.drone.move_left, 30, kind=MOVE),
+            "right": lambda: self.executor.submit("right", self.drone.move_right, 30, kind=MOVE),
+            "stop": lambda: self.executor.submit("stop", self.drone.send_rc_control, 0, 0, 0, 0, kind=SAFETY),
+            "picture": self._take_picture,
+            "record": self._toggle_recording,
+            "clip": self._save_clip,
+            "burst": self._burst,
+            "bazinga": lambda: self.executor.submit("bazinga", self.drone.rotate_counter_clockwise, 45, kind=MOVE),
+            "banana": self.gesture_show_off,
+        })
+        self.model_path = model_path
+        self.recognizer = None  # KaldiRecognizer, loaded in the background by start()
+        self.video = None       # Warmup of the video stream start, see _video()
+        self.audio_queue = queue.Queue()
+        self.streaming = True           # False: old fixed 5 s recording
+        self.listen_seconds = 5         # max length of one streamed utterance
+        self.partial_stable_chunks = 2  # identical partials needed before acting on one
+        self.speech_rms_threshold = 500
+        self.command_fired = threading.Event()
+        self.latencies = []
         self.connected = False
         logging.basicConfig(level=logging.INFO, filename='robartist.log', format='%(asctime)s - %(levelname)s - %(message)s')
         self.kill = False
+        self.recorder = None  # set a FlightRecorder to record gesture flights for replay
+        self.telemetry = TelemetryStore()  # state stream history, filled once the drone is connected
+        # full-size frames, no letterbox: the gesture pipeline shares one RGB view per frame
+        self.preprocess = FramePreprocessor(size=None, img_size=None)
+        # photos / clips / flight video, encoded on background threads into captures/
+        self.capture = CaptureRecorder(self._current_frame)
 
     def connect_drone(self, address):
         try:
@@ -38,16 +78,43 @@ class RobartistController:
     def _set_tello(self):
         try:
             self.drone.connect()
+            self.telemetry.start(self.drone.get_current_state)
             battery_level = self.drone.get_battery()
             print(f"Tello battery level: {battery_level}%")
             self.connected = True
-            self.drone.streamon()
-            self.frame_reader = self.drone.get_frame_read()
-            time.sleep(2)  # <== Add this to allow stream to initialize
-            logging.info("Tello connected and video stream started.")
+            logging.info("Tello connected.")
+            # voice commands do not need video: the stream comes up in the background
+            self.video = startup.PROFILER.background("tello.video", self._start_video)
         except Exception as e:
             logging.error(f"Error in _set_tello: {e}")
 
+    def _start_video(self):
+        # streamon and wait for the first decoded frame instead of a fixed 2 s sleep
+        self.drone.streamon()
+        reader = self.drone.get_frame_read()
+        deadline = time.monotonic() + 5
+        while reader.frame.shape[:2] == (300, 400) and time.monotonic() < deadline:  # djitellopy's placeholder
+            time.sleep(0.05)
+        logging.info("Tello video stream started.")
+        return reader
+
+    def _stream(self):
+        # start the stream in the background unless it is up or coming up; never waits
+        if self.video is None:
+            self.video = startup.PROFILER.background("tello.video", self._start_video)
+        return self.video
+
+    def _video(self):
+        # the frame reader; starts the stream on first use, or waits for the background start
+        return self._stream().result()
+
+    def _load_speech(self):
+        from vosk import Model, KaldiRecognizer
+
+        model = Model(self.model_path)
+        # restrict decoding to the command phrases: faster and more accurate on the small model
+        return KaldiRecognizer(model, self.samplerate, self.commands.grammar())
+
     def _set_microphone(self):
         devices = sd.query_devices()
         print("Available microphones:")
@@ -67,36 +134,44 @@ class RobartistController:
         logging.info(f"Voice command received: {command}")
         print(f"[Voice Command] {command}")
         try:
-            if "take" in command:
-                self.drone.takeoff()
-                self.drone.hover()
-            elif "land" in command:
-                self.drone.land()
-            elif "forward" in command:
-                self.drone.move_forward(30)
-            elif "backward" in command:
-                self.drone.move_back(30)
-            elif "left" in command:
-                self.drone.move_left(30)
-            elif "right" in command:
-                self.drone.move_right(30)
-            elif "stop" in command or "hover" in command:
-                self.drone.send_rc_control(0, 0, 0, 0)
-            elif "picture" in command:
-                frame = self.drone.get_frame_read().frame
-                import cv2
-                cv2.imwrite("customer_photo.jpg", frame)
-                print("Picture taken.")
-            elif "bazinga" in command:
-                self.drone.rotate_counter_clockwise(45)
-            elif "banana" in command:
-                self.gesture_show_off()
-                # self.gesture_test()
-            else:
+            if self.commands.dispatch(command) is None:
                 print(f"Unrecognized command: {command}")
         except Exception as e:
             logging.error(f"Failed to execute command '{command}': {e}")
 
+    def _takeoff(self):
+        self.drone.takeoff()
+        self.drone.hover()
+
+    def _current_frame(self):
+        # newest decoded frame while the stream is up, else None; capture never starts the stream itself
+        if self.video is None or not self.video.done():
+            return None
+        return self.video.result().frame
+
+    # capture commands only queue the stream start: photo() / burst() arm on the next frame
+    def _take_picture(self):
+        self._stream()
+        path = self.capture.photo()
+        print(f"Picture taken: {path}" if path else "Picture skipped: encoders busy.")
+
+    def _toggle_recording(self):
+        if self.capture.recording:
+            self.capture.stop_recording()
+            print(f"Recording stopped: {self.capture.stats()}")
+        else:
+            self._stream()
+            self.capture.start_recording()
+            print("Recording flight video.")
+
+    def _save_clip(self):
+        path = self.capture.save_last(5)
+        print(f"Saving the last 5 s: {path}" if path else "No recent video to save.")
+
+    def _burst(self):
+        self._stream()
+        print(f"Burst: {len(self.capture.burst(5))} photos")
+
     def record_and_process(self):
         print("Recording for 5 seconds...")
         audio_data = sd.rec(int(5 * self.samplerate), samplerate=self.samplerate, channels=self.channels, dtype='int16', device=self.device_id)
@@ -115,21 +190,109 @@ class RobartistController:
             partial = json.loads(self.recognizer.PartialResult())
             print(f"Could not recognize: {partial.get('partial', '')}")
 
+    def stream_and_process(self):
+        # Open the mic and let the recognition worker consume blocks as they arrive;
+        # stop as soon as it fires a command or after listen_seconds.
+        print(f"Listening (up to {self.listen_seconds} seconds)...")
+        self.command_fired.clear()
+        self.audio_queue.put(("start", time.monotonic()))
+        with MicrophoneStream(self.samplerate, self.channels, self.device_id, audio_queue=self.audio_queue):
+            self.command_fired.wait(self.listen_seconds)
+        self.audio_queue.put(("end", time.monotonic()))
+
+    def _recognition_worker(self):
+        fired = False
+        key_time = speech_end = None
+        last_partial, stable = "", 0
+        while True:
+            item = self.audio_queue.get()
+            if item[0] == "start":
+                self.recognizer.Reset()
+                fired = False
+                key_time, speech_end = item[1], None
+                last_partial, stable = "", 0
+                continue
+            if item[0] == "end":
+                if not fired:
+                    text = json.loads(self.recognizer.FinalResult()).get("text", "")
+                    if text:
+                        self._dispatch(text, "final", key_time, speech_end)
+                    else:
+                        print("Could not recognize any command.")
+                continue
+            if fired:
+                continue  # rest of an utterance that already produced a command
+
+            capture_time, data = item
+            if block_rms(data) > self.speech_rms_threshold:
+                speech_end = capture_time
+
+            if self.recognizer.AcceptWaveform(data):
+                text = json.loads(self.recognizer.Result()).get("text", "")
+                if self._match_command(text):
+                    fired = self._dispatch(text, "final", key_time, speech_end)
+                last_partial, stable = "", 0
+            else:
+                partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+                stable = stable + 1 if partial and partial == last_partial else 0
+                last_partial = partial
+                if stable >= self.partial_stable_chunks and self._match_command(partial):
+                    fired = self._dispatch(partial, "partial", key_time, speech_end)
+
+    def _match_command(self, text):
+        return self.commands.resolve(text) is not None
+
+    def _dispatch(self, text, source, key_time, speech_end):
+        now = time.monotonic()
+        self.command_fired.set()
+        since_key = (now - key_time) * 1000 if key_time else float('nan')
+        if speech_end is not None:
+            latency = (now - speech_end) * 1000
+            self.latencies.append(latency)
+            logging.info(f"Command latency ({source} result): {latency:.0f} ms after end of speech, "
+                         f"{since_key:.0f} ms after key press, median {np.median(self.latencies):.0f} ms "
+                         f"over {len(self.latencies)} commands")
+        else:
+            logging.info(f"Command latency ({source} result): no speech detected, {since_key:.0f} ms after key press")
+        self._handle_command(text)
+        return True
+
     def listen_for_key(self):
         print("Press 'v' to talk...")
         while True:
             if keyboard.read_key() == 'v':
-                self.record_and_process()
+                if self.streaming:
+                    self.stream_and_process()
+                else:
+                    self.record_and_process()
+
+    def start(self, background=True):
+        # the speech model loads and the drone connects while the operator picks a microphone;
+        # background=False runs the same steps one after another, for comparison
+        profiler = startup.PROFILER
+        speech = profiler.background("vosk.model", self._load_speech, foreground=not background)
+        tello = profiler.background("tello.connect", self._set_tello, foreground=not background)
+        with profiler.step("microphone.select"):
+            self._set_microphone()
+        self.recognizer = speech.result()
+        tello.result()
+        if background:
+            profiler.background("mediapipe.hands", gesture_utils.get_hands_detector)
+        return profiler.ready()
 
     def run(self):
-        self._set_microphone()
-        self._set_tello()
+        self.start()
+        self.capture.start()
+        METRICS.start_flush("metrics.jsonl")  # per-stage latency percentiles every 10 s
+        threading.Thread(target=self._recognition_worker, daemon=True).start()
         threading.Thread(target=self.listen_for_key, daemon=True).start()
         try:
             while True:
                 time.sleep(1)  # Keep main thread alive
         except KeyboardInterrupt:
             print("Exiting...")
+        finally:
+            self.capture.close()
     
     def gesture_test(self):
         for i in range(10):
@@ -137,61 +300,45 @@ class RobartistController:
             time.sleep(1)
     
     def gesture_show_off(self):
-        last_gesture = None
-        last_command_time = 0
-        cooldown = 2  # seconds
+        # a gesture acts once it is steady for a few frames; held moves repeat
+        recognizer = TemporalGestureRecognizer(repeatable=("fist", "victory", "index_up"))
 
-        print("Starting gesture control mode. Press 'q' in window or Ctrl+C to exit.")
+        def on_gesture(gesture, packet):
+            # runs on the pipeline's inference thread for every classified frame
+            if throttled("gesture"):
+                print("Gesture:", gesture)
 
-        while True:
-            try:
-                frame = self.frame_reader.frame
-                if frame is None:
-                    print("Warning: Empty frame received.")
-                    time.sleep(0.1)
+            for event in recognizer.update(gesture, packet.capture_time):
+                if event.kind == RELEASE:
                     continue
+                if event.gesture == "open_palm":
+                    self.executor.submit("takeoff", self.drone.takeoff, kind=ACTION)
+                    print("Gesture: open_palm → Takeoff")
+                elif event.gesture == "fist":
+                    self.executor.submit("gesture_down", self.drone.move_down, 30, kind=MOVE)
+                elif event.gesture == "victory":
+                    self.executor.submit("gesture_rotate", self.drone.rotate_clockwise, 45, kind=MOVE)
+                elif event.gesture == "index_up":
+                    self.executor.submit("gesture_up", self.drone.move_up, 30, kind=MOVE)
+                elif event.gesture == "thumb_up":
+                    print("Gesture: thumb_up → Exit gesture mode")
+                    return False
 
-                gesture = detect_gesture(frame)
-                print("Gesture:", gesture)
+        print("Starting gesture control mode. Press 'q' in window or Ctrl+C to exit.")
 
-                current_time = time.time()
-                if gesture == "thumb_up":
-                    print("Gesture: thumb_up → Exit gesture mode")
-                    break
-                if gesture != last_gesture and (current_time - last_command_time > cooldown):
-                    if gesture == "open_palm":
-                        self.drone.takeoff()
-                        print("Gesture: open_palm → Takeoff")
-                    elif gesture == "fist":
-                        self.drone.move_down(30)
-                    elif gesture == "victory":
-                        self.drone.rotate_clockwise(45)
-                    elif gesture == "index_up":
-                        self.drone.move_up(30)
-
-                    last_command_time = current_time
-                    last_gesture = gesture
-
-                cv2.putText(frame, f"Gesture: {gesture}", (30, 50),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
-
-                cv2.imshow("Gesture Control", frame)
-                key = cv2.waitKey(10) & 0xFF
-                if key == ord('q') or key == 27:
-                    print("Exiting gesture control.")
-                    break
-
-                time.sleep(0.03)
-
-            except KeyboardInterrupt:
-                print("Gesture control interrupted by user.")
-                break
-            except Exception as e:
-                print(f"[Gesture Loop Error] {e}")
-                logging.error(f"Error inside gesture control loop: {e}")
-                time.sleep(0.5)
+        # capture, gesture inference and display run as separate stages; stale frames are dropped
+        self.executor.recorder = self.recorder
+        reader = self._video()
+        pipeline = GesturePipeline(lambda: reader.frame, on_gesture, recorder=self.recorder,
+                                   telemetry=self.telemetry,
+                                   preprocess=self.preprocess)
+        try:
+            pipeline.run()
+        except KeyboardInterrupt:
+            print("Gesture control interrupted by user.")
 
         self.drone.streamoff()
+        self.video = None  # restart the stream next time
         cv2.destroyAllWindows()
 
 
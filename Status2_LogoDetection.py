@@ -1,86 +1,150 @@
-import torch
 import cv2
+import numpy as np
+from detector_backends import DetectorBackend
+from frame_preprocess import PreparedFrame
+from metrics import span, throttled
+
+TEXT_CLASS = 0
+ICON_CLASS = 1
+
+DETECTION_DTYPE = np.dtype([('box', np.float32, 4), ('conf', np.float32), ('cls', np.int16)])
+
+
+class DetectionResult:
+    """One frame's detections, converted once and summarized for the query methods."""
+
+    def __init__(self, frame_id, pred, frame_shape):
+        rows = pred.cpu().numpy() if hasattr(pred, 'cpu') else np.asarray(pred, dtype=np.float32)
+        rows = rows.reshape(-1, 6)
+        self.frame_id = frame_id
+        self.frame_shape = tuple(frame_shape[:2])
+        self.detections = np.empty(len(rows), dtype=DETECTION_DTYPE)
+        self.detections['box'] = rows[:, :4]
+        self.detections['conf'] = rows[:, 4]
+        self.detections['cls'] = rows[:, 5]
+        self.classes = sorted(set(self.detections['cls'].tolist()))
+
+        # best (highest confidence) box per class, with its area ratio and center offset
+        h, w = self.frame_shape
+        self.best = {}
+        for cls in self.classes:
+            idx = np.flatnonzero(self.detections['cls'] == cls)
+            det = self.detections[idx[np.argmax(self.detections['conf'][idx])]]
+            x1, y1, x2, y2 = det['box'].tolist()
+            self.best[cls] = {
+                'box': (x1, y1, x2, y2),
+                'conf': float(det['conf']),
+                'area_ratio': (x2 - x1) * (y2 - y1) / (h * w),
+                'offset': (((x1 + x2) / 2 - w / 2) / (w / 2), ((y1 + y2) / 2 - h / 2) / (h / 2)),
+            }
+
+    def has(self, cls):
+        return cls in self.best
+
 
 class LogoDetector:
-    def __init__(self, model_path='best.pt', img_size = 640, device = 'cpu'):
-        self.model = torch.hub.load('ultralytics/yolov5', 'custom', path=model_path)
+    def __init__(self, model_path='best.pt', img_size = 640, device = 'cpu', backend = 'eager', quantize = False,
+                 process = False):
+        # backend: 'eager', 'torchscript' or 'onnx' (ONNX Runtime); quantize=True for int8 ONNX
+        # process=True runs the model in a worker process fed through shared memory
+        backend_cls = DetectorBackend
+        if process:
+            from process_detectors import ProcessBackend
+            backend_cls = ProcessBackend
+        self.backend = backend_cls(backend, model_path, img_size, device, quantize=quantize, conf=0.5, iou=0.45)
+        self.model = self.backend.model
         self.model_path = model_path
         self.img_size = img_size
         self.device = device
-        self.model.conf = 0.5
-        self.model.iou = 0.45
-        self.img_size = img_size
         self.frame = None
         self.pred = None
+        self.result = None
+        self._frame_count = 0
 
-    def get_frame(self, frame):
+    def detect(self, frame, frame_id=None):
+        # Run inference once per frame; with the same frame_id the cached result is returned.
+        # frame may be a PreparedFrame (built with img_size = self.img_size): its letterbox is
+        # fed to the model as is and the boxes come back in prepared.image pixels
+        prepared = frame if isinstance(frame, PreparedFrame) and frame.letterbox is not None else None
+        if frame_id is None and prepared is not None:
+            frame_id = ('prepared', prepared.seq)
+        if frame_id is not None and self.result is not None and self.result.frame_id == frame_id:
+            return self.result
+        if frame_id is None:
+            self._frame_count += 1
+            frame_id = ('auto', self._frame_count)
+        if isinstance(frame, PreparedFrame):
+            frame = frame.image
         self.frame = frame
-        results = self.model(frame)
-        self.pred = results.xyxy[0]
-    
-    def detect(self,frame):
-        self.frame = frame
-        results = self.model(frame)
-        self.pred = results.xyxy[0]
+        if prepared is not None:
+            self.pred = prepared.to_image_boxes(np.array(self.backend.infer(prepared.letterbox), dtype=np.float32))
+        else:
+            self.pred = self.backend.infer(frame)
+        with span("yolo.postprocess"):
+            self.result = DetectionResult(frame_id, self.pred, frame.shape)
+        return self.result
+
+    get_frame = detect
+
+    def _icon(self):
+        if self.result is None:
+            return None
+        return self.result.best.get(ICON_CLASS)
 
     def is_target_found(self):
-        has_text = False
-        has_icon = False
-        if self.pred is None:
+        if self.result is None:
             return False
-        for *xyxy, conf, cls in self.pred:
-            if int(cls) == 0:
-                has_text = True
-            elif int(cls) == 1:
-                has_icon = True
-        return has_text and has_icon
+        return self.result.has(TEXT_CLASS) and self.result.has(ICON_CLASS)
 
     def get_offset(self, frame_shape):
+        icon = self._icon()
+        if icon is None:
+            return None
+        if tuple(frame_shape[:2]) == self.result.frame_shape:
+            return icon['offset'][0]
+        x1, _, x2, _ = icon['box']
         width = frame_shape[1]
-        for *xyxy, conf, cls in self.pred:
-            if int(cls) == 1:  # 找 icon 类
-                x1, _, x2, _ = xyxy
-                center_x = (x1 + x2) / 2
-                return (center_x - width / 2) / (width / 2)
-        return None
+        return ((x1 + x2) / 2 - width / 2) / (width / 2)
 
     def is_centered(self, frame_shape, threshold=0.3):
         offset = self.get_offset(frame_shape)
         if offset is None:
             return False
-        offset = float(offset.item()) if hasattr(offset, 'item') else float(offset)
         return abs(offset) < threshold
 
     def is_close_enough(self, frame_shape, size_threshold=0.02):
-        h, w = frame_shape[:2]
-        frame_area = h * w
-        for *xyxy, conf, cls in self.pred:
-            if int(cls) == 1:
-                # Convert all xyxy to float safely
-                x1, y1, x2, y2 = [float(x.item()) if hasattr(x, 'item') else float(x) for x in xyxy]
-                box_area = (x2 - x1) * (y2 - y1)
-                ratio = box_area / frame_area
-                print(f"📏 icon area ratio: {ratio:.4f}")
-                return ratio > size_threshold
-        return False
+        icon = self._icon()
+        if icon is None:
+            return False
+        if tuple(frame_shape[:2]) == self.result.frame_shape:
+            ratio = icon['area_ratio']
+        else:
+            x1, y1, x2, y2 = icon['box']
+            ratio = (x2 - x1) * (y2 - y1) / (frame_shape[0] * frame_shape[1])
+        if throttled("icon_area_ratio"):
+            print(f"📏 icon area ratio: {ratio:.4f}")
+        return ratio > size_threshold
 
 
     def draw_boxes(self, frame):
-        if self.pred is None:
+        if self.result is None:
             return frame
-        for *xyxy, conf, cls in self.pred:
-            x1, y1, x2, y2 = map(int, xyxy)
-            label = f"{int(cls)} ({conf:.2f})"
-            color = (0, 255, 0) if int(cls) == 0 else (255, 0, 0)
+        for det in self.result.detections:
+            x1, y1, x2, y2 = map(int, det['box'])
+            cls = int(det['cls'])
+            label = f"{cls} ({det['conf']:.2f})"
+            color = (0, 255, 0) if cls == TEXT_CLASS else (255, 0, 0)
             cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
             cv2.putText(frame, label, (x1, y1 - 10),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
         return frame
 
+    def close(self):
+        # stop the worker process of a process=True detector
+        if hasattr(self.backend, 'close'):
+            self.backend.close()
+
     def get_detected_classes(self):
-        classes = set()
-        if self.pred is None:
+        if self.result is None:
             return []
-        for *_, cls in self.pred:
-            classes.add(int(cls))
-        return list(classes)
\ No newline at end of file
+        return list(self.result.classes)
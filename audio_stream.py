@@ -0,0 +1,55 @@
+# audio_stream.py
+import queue
+import time
+
+import numpy as np
+
+
+class MicrophoneStream:
+    """Push microphone blocks into a queue as (capture_time, bytes) as soon as they arrive.
+
+    The sounddevice callback runs on the PortAudio thread, so it only timestamps
+    and enqueues; recognition happens on whoever consumes the queue.
+    """
+
+    def __init__(self, samplerate=16000, channels=1, device=None, block_seconds=0.1, audio_queue=None):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.device = device
+        self.blocksize = int(samplerate * block_seconds)
+        self.audio_queue = audio_queue if audio_queue is not None else queue.Queue()
+        self.stream = None
+        self.overflows = 0
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            self.overflows += 1
+        self.audio_queue.put((time.monotonic(), bytes(indata)))
+
+    def start(self):
+        import sounddevice as sd  # here, so block_rms and the benches work without PortAudio
+
+        self.stream = sd.RawInputStream(samplerate=self.samplerate, blocksize=self.blocksize,
+                                        device=self.device, channels=self.channels,
+                                        dtype='int16', callback=self._callback)
+        self.stream.start()
+        return self
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def block_rms(data):
+    samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+    if samples.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(samples * samples)))
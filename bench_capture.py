@@ -0,0 +1,138 @@
+# bench_capture.py
+# Does recording and photo capture slow the control loop? A 20 Hz loop (the rc servo rate)
+# runs while a synthetic camera delivers frames; either the loop itself writes the photos and
+# the video frames (as _take_picture's cv2.imwrite did), or CaptureRecorder does it on its
+# encoder threads. Reports loop lateness, written / dropped frames and encode latencies.
+#   python bench_capture.py --seconds 10 --size 1280x720 --fps 30
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from capture import CaptureRecorder
+from metrics import METRICS
+
+
+class SyntheticCamera:
+    # a new frame array every 1/fps seconds, like djitellopy's BackgroundFrameRead
+    def __init__(self, size, fps):
+        w, h = size
+        rng = np.random.default_rng(0)
+        base = cv2.resize(rng.integers(0, 256, (h // 8, w // 8, 3), dtype=np.uint8), (w, h))
+        self.frames = [np.roll(base, 7 * i, axis=1) for i in range(30)]
+        self.fps = fps
+        self.frame = None
+        self.delivered = 0
+        self._stop = threading.Event()
+
+    def start(self):
+        def run():
+            next_time = time.monotonic()
+            while not self._stop.is_set():
+                self.frame = self.frames[self.delivered % len(self.frames)].copy()
+                self.delivered += 1
+                next_time += 1.0 / self.fps
+                time.sleep(max(0.0, next_time - time.monotonic()))
+        threading.Thread(target=run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+def control_loop(seconds, rate, on_tick):
+    # lateness of each tick behind its schedule, seconds
+    lateness = []
+    start = next_time = time.monotonic()
+    tick = 0
+    while time.monotonic() - start < seconds:
+        lateness.append(max(0.0, time.monotonic() - next_time))
+        on_tick(tick)
+        tick += 1
+        next_time += 1.0 / rate
+        time.sleep(max(0.0, next_time - time.monotonic()))
+    return np.array(lateness) * 1000
+
+
+def run_inline(camera, seconds, rate, directory, fps):
+    h, w = camera.frames[0].shape[:2]
+    writer = cv2.VideoWriter(os.path.join(directory, "inline.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+    state = {"last": None, "written": 0, "photos": 0}
+
+    def on_tick(tick):
+        frame = camera.frame
+        if frame is not state["last"]:
+            state["last"] = frame
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+            state["written"] += 1
+        if tick % rate == 0:  # a "picture" command every second
+            cv2.imwrite(os.path.join(directory, f"photo_{tick}.jpg"), frame)
+            state["photos"] += 1
+
+    lateness = control_loop(seconds, rate, on_tick)
+    writer.release()
+    return lateness, {"video_frames": state["written"], "photos": state["photos"]}
+
+
+def run_capture(camera, seconds, rate, directory, fps):
+    capture = CaptureRecorder(lambda: camera.frame, directory=directory, fps=fps).start()
+    capture.start_recording()
+
+    def on_tick(tick):
+        if tick % rate == 0:
+            capture.photo()
+        if tick == rate * 3:
+            capture.burst(5)
+
+    lateness = control_loop(seconds, rate, on_tick)
+    capture.save_last(3.0)
+    capture.close()
+    return lateness, capture.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--size", default="1280x720", help="frame size, WxH")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--rate", type=int, default=20, help="control loop rate, Hz")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.split("x"))
+    results = {}
+    for mode, run in (("inline", run_inline), ("capture", run_capture)):
+        METRICS.reset()
+        camera = SyntheticCamera(size, args.fps).start()
+        time.sleep(0.2)
+        with tempfile.TemporaryDirectory() as directory:
+            lateness, counts = run(camera, args.seconds, args.rate, directory, args.fps)
+            files = len(os.listdir(directory))
+        camera.stop()
+        row = {"loop_late_p50_ms": round(float(np.percentile(lateness, 50)), 2),
+               "loop_late_p99_ms": round(float(np.percentile(lateness, 99)), 2),
+               "loop_late_max_ms": round(float(lateness.max()), 2),
+               "frames_delivered": camera.delivered, "files": files, **counts}
+        results[mode] = row
+        print(f"{mode:>8}: control loop late p50 {row['loop_late_p50_ms']:.1f} ms, p99 {row['loop_late_p99_ms']:.1f} ms, "
+              f"max {row['loop_late_max_ms']:.1f} ms; video frames {row['video_frames']} of "
+              f"{camera.delivered} delivered, {files} files")
+        if mode == "capture":
+            video, jpeg = row["capture.video_encode"], row["capture.jpeg_encode"]
+            print(f"          dropped video frames {row['dropped_video_frames']}, dropped jobs {row['dropped_jobs']}, "
+                  f"segments {row['segments']}, photos {row['photos']}, clips {row['clips']}")
+            if video["count"] and jpeg["count"]:
+                print(f"          video encode p50 {video['p50_ms']:.1f} ms/frame (max {1000 / video['mean_ms']:.0f} fps "
+                      f"on one thread), jpeg encode p50 {jpeg['p50_ms']:.1f} ms, p95 {jpeg['p95_ms']:.1f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# bench_detector.py
+# Latency percentiles and detection agreement of the CPU detector backends, on a folder of frames.
+#   python bench_detector.py frames/ --backends eager torchscript onnx onnx-int8 --img-size 640 416
+import argparse
+import glob
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from detector_backends import DetectorBackend, agreement, parse_backend
+
+
+def load_frames(folder, limit):
+    paths = sorted(p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(folder, f"*.{ext}")))
+    if not paths:
+        raise SystemExit(f"No frames found in {folder}")
+    return [cv2.imread(p) for p in paths[:limit]]
+
+
+def run(backend, frames):
+    latencies, outputs = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        outputs.append(backend.infer(frame))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies), outputs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("frames", help="folder of .jpg/.png frames")
+    parser.add_argument("--weights", default="best.pt")
+    parser.add_argument("--backends", nargs="+", default=["eager", "torchscript", "onnx", "onnx-int8"])
+    parser.add_argument("--img-size", type=int, nargs="+", default=[640])
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames, args.limit)
+    print(f"{len(frames)} frames from {args.frames}")
+    # the baseline is eager PyTorch at the first image size
+    _, reference = run(DetectorBackend("eager", args.weights, args.img_size[0]), frames)
+
+    rows = []
+    for img_size in args.img_size:
+        for spec in args.backends:
+            name, quantize = parse_backend(spec)
+            backend = DetectorBackend(name, args.weights, img_size, quantize=quantize)
+            latencies, outputs = run(backend, frames)
+            matched = total = 0
+            for ref, out in zip(reference, outputs):
+                m, t = agreement(ref, out)
+                matched, total = matched + m, total + t
+            row = {"backend": backend.name, "img_size": img_size,
+                   "p50_ms": float(np.percentile(latencies, 50)),
+                   "p90_ms": float(np.percentile(latencies, 90)),
+                   "p99_ms": float(np.percentile(latencies, 99)),
+                   "agreement": matched / total if total else 1.0}
+            rows.append(row)
+            print(f"{row['backend']:>16} @{img_size:<4} p50 {row['p50_ms']:7.1f} ms  p90 {row['p90_ms']:7.1f} ms  "
+                  f"p99 {row['p99_ms']:7.1f} ms  agreement {row['agreement'] * 100:5.1f}%")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
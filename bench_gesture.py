@@ -0,0 +1,121 @@
+# bench_gesture.py
+# Micro-benchmark: original per-frame gesture rules vs the single-hand path (alone, and after
+# detect_gesture's landmark -> array conversion) and the vectorized batch classifier.
+#   python bench_gesture.py                    # synthetic hands
+#   python bench_gesture.py --data hands.npy   # recorded (N, 21, 3) landmark array
+import argparse
+import math
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from gesture_utils import classify_landmarks, classify_landmarks_batch, landmarks_to_array
+
+
+def legacy_classify(landmarks):
+    # body of the original detect_gesture, after MediaPipe returned a hand
+    def distance(p1, p2):
+        return math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
+
+    def is_fist(landmarks):
+        tip_ids = [4, 8, 12, 16, 20]
+        tips = [landmarks[i] for i in tip_ids]
+        total_dist = 0
+        count = 0
+        for i in range(len(tips)):
+            for j in range(i+1, len(tips)):
+                total_dist += distance(tips[i], tips[j])
+                count += 1
+        avg_dist = total_dist / count
+        return avg_dist < 0.2
+
+    if is_fist(landmarks):
+        return "fist"
+
+    thumb_up = landmarks[4].y < landmarks[3].y
+    other_folded = True
+    for tip_id, pip_id in zip([8, 12, 16, 20], [6, 10, 14, 18]):
+        if landmarks[tip_id].y < landmarks[pip_id].y:
+            other_folded = False
+            break
+    if thumb_up and other_folded:
+        return "thumb_up"
+
+    index_straight = landmarks[8].y < landmarks[6].y
+    other_folded = True
+    for tip_id, pip_id in zip([12, 16, 20], [10, 14, 18]):
+        if landmarks[tip_id].y < landmarks[pip_id].y:
+            other_folded = False
+            break
+    if index_straight and other_folded:
+        return "index_up"
+
+    fingers = []
+    for tip_id, pip_id in zip([8, 12, 16, 20], [6, 10, 14, 18]):
+        fingers.append(landmarks[tip_id].y < landmarks[pip_id].y)
+    if fingers[0] and fingers[1] and not any(fingers[2:]):
+        return "victory"
+    if all(fingers):
+        return "open_palm"
+    return "unknown"
+
+
+def synthetic_hands(n, seed=0):
+    # random hands with the tips pushed above/below their PIP joints so every label shows up
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0.2, 0.8, size=(n, 21, 3))
+    spread = rng.uniform(0.0, 0.3, size=(n, 1, 1))
+    points[:, [4, 8, 12, 16, 20], :2] = (points[:, [0], :2]
+                                         + rng.normal(0, 1, size=(n, 5, 2)) * spread)
+    return points
+
+
+def as_landmarks(points):
+    return [[SimpleNamespace(x=x, y=y, z=z) for x, y, z in hand] for hand in points]
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", help="recorded landmarks saved as .npy, shape (N, 21, 3)")
+    parser.add_argument("-n", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    points = np.load(args.data) if args.data else synthetic_hands(args.n)
+    hands = as_landmarks(points)
+    n = len(points)
+
+    legacy = [legacy_classify(h) for h in hands]
+    single = [classify_landmarks(p) for p in points]
+    rows = [classify_landmarks(landmarks_to_array(h)) for h in hands]  # detect_gesture's route
+    batch = classify_landmarks_batch(points).tolist()
+    mismatches = sum(a != b for a, b in zip(legacy, batch))
+    mismatches += sum(a != b for a, b in zip(legacy, single))
+    mismatches += sum(a != b for a, b in zip(legacy, rows))
+    labels, counts = np.unique(batch, return_counts=True)
+    print(f"{n} hands, labels: {dict(zip(labels.tolist(), counts.tolist()))}")
+    print(f"label mismatches vs original: {mismatches}")
+
+    t_legacy = best_of(lambda: [legacy_classify(h) for h in hands], args.repeat)
+    t_single = best_of(lambda: [classify_landmarks(p) for p in points], args.repeat)
+    t_rows = best_of(lambda: [classify_landmarks(landmarks_to_array(h)) for h in hands], args.repeat)
+    t_batch = best_of(lambda: classify_landmarks_batch(points), args.repeat)
+    for name, t in (("original", t_legacy), ("single", t_single), ("landmarks", t_rows), ("batch", t_batch)):
+        print(f"{name:>10}: {t / n * 1e6:8.2f} us/hand  ({t_legacy / t:5.1f}x)")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
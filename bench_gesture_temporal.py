@@ -0,0 +1,133 @@
+# bench_gesture_temporal.py
+# gesture_show_off's old 2 s cooldown vs. TemporalGestureRecognizer on labelled gesture sequences.
+#   python bench_gesture_temporal.py                          # synthetic noisy sequences with ground truth
+#   python bench_gesture_temporal.py --recording flights/run1  # recorded "gesture" events of a flight
+# Ground truth for a recording is every run of at least --min-run identical labels.
+import argparse
+import json
+import random
+
+import numpy as np
+
+from gesture_temporal import RELEASE, TemporalGestureRecognizer
+
+COMMAND_GESTURES = ("open_palm", "fist", "victory", "index_up", "thumb_up")
+OTHER_LABELS = ("no_hand", "unknown")
+TOLERANCE = 0.3  # a command this long after its gesture ended still counts as that gesture
+
+
+def synthetic(seconds, fps, noise, seed):
+    # (labels, times, segments); segments are (gesture, start, end) of the intended gestures
+    rng = random.Random(seed)
+    labels, times, segments = [], [], []
+    t = 0.0
+    while t < seconds:
+        gesture = rng.choice(COMMAND_GESTURES)
+        hold = rng.uniform(0.3, 2.5)
+        gap = rng.uniform(0.3, 1.5)
+        segments.append((gesture, t, t + hold))
+        for i in range(int((hold + gap) * fps)):
+            ft = t + i / fps
+            label = gesture if ft < t + hold else rng.choice(OTHER_LABELS)
+            if rng.random() < noise:
+                label = rng.choice(COMMAND_GESTURES + OTHER_LABELS)  # single-frame misclassification
+            labels.append(label)
+            times.append(ft)
+        t += hold + gap
+    return labels, times, segments
+
+
+def from_recording(path, min_run):
+    from flight_recorder import FlightRecording
+
+    recording = FlightRecording(path)
+    events = [e for e in recording.events_of("gesture") if e.get("frame") is not None]
+    if not events:
+        raise SystemExit(f"No gesture events in {path}")
+    labels = [e["gesture"] for e in events]
+    times = [float(recording.times[e["frame"]]) for e in events]
+    segments, start = [], 0
+    for i in range(1, len(labels) + 1):
+        if i == len(labels) or labels[i] != labels[start]:
+            if labels[start] in COMMAND_GESTURES and i - start >= min_run:
+                segments.append((labels[start], times[start], times[i - 1]))
+            start = i
+    return labels, times, segments
+
+
+def cooldown_policy(cooldown=2.0):
+    # the old gesture_show_off rule
+    last = {"gesture": None, "t": float("-inf")}
+
+    def fire(gesture, t):
+        if gesture != last["gesture"] and t - last["t"] > cooldown:
+            last["gesture"], last["t"] = gesture, t
+            return [gesture] if gesture in COMMAND_GESTURES else []
+        return []
+
+    return fire
+
+
+def temporal_policy(**options):
+    recognizer = TemporalGestureRecognizer(**options)
+
+    def fire(gesture, t):
+        return [e.gesture for e in recognizer.update(gesture, t) if e.kind != RELEASE and e.gesture in COMMAND_GESTURES]
+
+    return fire
+
+
+def evaluate(name, fire, labels, times, segments):
+    commands = [(g, t) for label, t in zip(labels, times) for g in fire(label, t)]
+    latencies, missed = [], 0
+    for gesture, start, end in segments:
+        hits = [t for g, t in commands if g == gesture and start <= t <= end + TOLERANCE]
+        if hits:
+            latencies.append(hits[0] - start)
+        else:
+            missed += 1
+    false = sum(1 for g, t in commands
+                if not any(g == sg and ss <= t <= se + TOLERANCE for sg, ss, se in segments))
+    latencies = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {"policy": name, "segments": len(segments), "commands": len(commands), "missed": missed,
+            "false_triggers": false, "latency_mean_ms": float(latencies.mean()),
+            "latency_p95_ms": float(np.percentile(latencies, 95))}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recording", help="flight_recorder directory with gesture events")
+    parser.add_argument("--min-run", type=int, default=8, help="recordings: labels in a row that count as a gesture")
+    parser.add_argument("--seconds", type=float, default=600.0)
+    parser.add_argument("--fps", type=float, default=30.0, help="gesture inference rate of the synthetic sequence")
+    parser.add_argument("--noise", type=float, default=0.1, help="per-frame misclassification probability")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--commit-frames", type=int, default=4)
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.recording:
+        labels, times, segments = from_recording(args.recording, args.min_run)
+        source = args.recording
+    else:
+        labels, times, segments = synthetic(args.seconds, args.fps, args.noise, args.seed)
+        source = f"synthetic, {args.fps:.0f} fps, {args.noise * 100:.0f}% noise"
+    print(f"{len(labels)} classifications, {len(segments)} gestures ({source})")
+
+    rows = [evaluate("cooldown 2 s", cooldown_policy(), labels, times, segments),
+            evaluate(f"temporal {args.commit_frames}/{args.window}",
+                     temporal_policy(window=args.window, commit_frames=args.commit_frames,
+                                     repeatable=("fist", "victory", "index_up")),
+                     labels, times, segments)]
+    for r in rows:
+        print(f"{r['policy']:>14}: latency {r['latency_mean_ms']:6.0f} ms (p95 {r['latency_p95_ms']:6.0f}) | "
+              f"missed {r['missed']:4d}/{r['segments']} | false triggers {r['false_triggers']:4d} | "
+              f"commands {r['commands']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
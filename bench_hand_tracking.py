@@ -0,0 +1,96 @@
+# bench_hand_tracking.py
+# Full-frame detect_gesture vs. AdaptiveHandTracker, with and without ROI crops, on recorded footage.
+#   python bench_hand_tracking.py flight.mp4
+#   python bench_hand_tracking.py flights/run1 --budget-ms 10     # flight_recorder directory
+# Use footage with a hand in it: on hand-free footage the tracker never has a box,
+# so the ROI path (the "roi" count) is never exercised.
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from gesture_utils import detect_gesture
+from hand_tracking import AdaptiveHandTracker
+
+
+def load_footage(path, limit):
+    # (frames, fps, rgb) from a video file (BGR) or a flight recording (its meta.json order)
+    if os.path.isdir(path):
+        from flight_recorder import FlightRecording
+        recording = FlightRecording(path)
+        n = min(limit, len(recording))
+        times = recording.times[:n]
+        fps = (n - 1) / float(times[-1] - times[0]) if n > 1 and times[-1] > times[0] else 30.0
+        return [np.array(recording.frame(i)) for i in range(n)], fps, recording.order == "rgb"
+    capture = cv2.VideoCapture(path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    while len(frames) < limit:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    if not frames:
+        raise SystemExit(f"No frames read from {path}")
+    return frames, fps, False
+
+
+def run(name, detect, frames, fps, rgb=False):
+    labels, times = [], []
+    cpu_start = time.process_time()
+    for frame in frames:
+        start = time.perf_counter()
+        labels.append(detect(frame, rgb=rgb))
+        times.append((time.perf_counter() - start) * 1000)
+    cpu_per_frame = (time.process_time() - cpu_start) / len(frames)
+    times = np.array(times)
+    return labels, {"mode": name, "ms_per_frame": float(times.mean()), "p95_ms": float(np.percentile(times, 95)),
+                    "cpu_percent_at_source_fps": cpu_per_frame * fps * 100}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("footage", help="video file or flight_recorder directory")
+    parser.add_argument("--limit", type=int, default=1800)
+    parser.add_argument("--budget-ms", type=float, default=15.0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    frames, fps, rgb = load_footage(args.footage, args.limit)
+    print(f"{len(frames)} {'RGB' if rgb else 'BGR'} frames at {fps:.1f} fps from {args.footage}")
+    detect_gesture(frames[0], rgb=rgb)  # load the model outside the timing
+    baseline, full = run("full-frame", detect_gesture, frames, fps, rgb)
+    full["hand_frames"] = sum(label != "no_hand" for label in baseline)
+    rows = [full]
+    for name, roi in (("adaptive", False), ("adaptive+roi", True)):
+        tracker = AdaptiveHandTracker(budget_ms=args.budget_ms, roi=roi)
+        tracker(frames[0], rgb=rgb)
+        tracker.reset()
+        tracker.stats = dict.fromkeys(tracker.stats, 0)
+        labels, row = run(name, tracker, frames, fps, rgb)
+        row["hand_frames"] = sum(label != "no_hand" for label in labels)
+        row["agreement"] = float(np.mean([a == b for a, b in zip(baseline, labels)]))
+        row.update(tracker.stats)
+        row["final_complexity"], row["final_stride"] = tracker.complexity, tracker.stride
+        rows.append(row)
+
+    for r in rows:
+        print(f"{r['mode']:>12}: {r['ms_per_frame']:6.2f} ms/frame (p95 {r['p95_ms']:6.2f}), "
+              f"CPU {r['cpu_percent_at_source_fps']:5.1f}% of one core at {fps:.0f} fps, "
+              f"hand in {r['hand_frames']}/{len(frames)} frames")
+    if not full["hand_frames"]:
+        print("warning: no hand found in the footage, so the ROI path was not measured")
+    for r in rows[1:]:
+        print(f"{r['mode']:>12}: {r['agreement'] * 100:.1f}% same gestures as full-frame | full {r['full']}, roi {r['roi']}, "
+              f"static skips {r['static_skips']}, rate skips {r['rate_skips']} | "
+              f"complexity {r['final_complexity']}, stride {r['final_stride']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main()
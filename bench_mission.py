@@ -0,0 +1,141 @@
+# bench_mission.py
+# The LogoHunting mission end to end against the local simulator: the notebook's original
+# flow (fixed sleeps, stepped search, stop-and-go approach, four separate slides) vs.
+# MissionRunner running LOGO_HUNT (merged motions, pipelined detection, YawSearch).
+#   python bench_mission.py --bearings 60 200 --detect-ms 80
+import argparse
+import json
+import logging
+import time
+
+import cv2
+import numpy as np
+
+from bench_yaw_search import make_detector, place_target
+from mission_plan import LOGO_HUNT, MissionRunner, RoundTripCounter
+from telemetry import TelemetryStore
+from tello_sim import TelloSimulator, connect_tello
+from visual_servo import approach_moves
+from yaw_search import YawSearch
+
+FRAME_SIZE = (640, 480)
+
+
+def legacy_detect(read_frame, detect, max_retries=1):
+    # yolo_detect: one retry per failure, 1 s apart
+    for attempt in range(max_retries + 1):
+        box, _ = detect(read_frame())
+        if box is not None:
+            return box
+        time.sleep(1)
+    return None
+
+
+def legacy_mission(tello, read_frame, detect, max_steps=50):
+    # take_off, rotate_until_target_found (first lap), fly_toward_icon (hybrid=False), side_slide_to_text
+    tello.get_battery()
+    time.sleep(2)
+    tello.takeoff()
+    time.sleep(2)
+
+    box = None
+    for _ in range(12):
+        box = legacy_detect(read_frame, detect)
+        if box is not None:
+            break
+        tello.rotate_clockwise(30)  # rotate_drone, then the loop's own pause
+        time.sleep(1)
+        time.sleep(1)
+    if box is None:
+        return False
+
+    for _ in range(max_steps):
+        box = legacy_detect(read_frame, detect, max_retries=3)
+        if box is None:
+            return False
+        moves = approach_moves(box, FRAME_SIZE)
+        if moves is None:
+            break
+        for name, amount in moves:
+            if name.startswith("turn_"):
+                (tello.rotate_clockwise if name == "turn_right" else tello.rotate_counter_clockwise)(amount)
+                time.sleep(1)
+            else:
+                getattr(tello, name)(amount)
+                if name == "move_forward":
+                    time.sleep(1)
+    else:
+        return False
+
+    for _ in range(4):
+        tello.move_right(30)
+        time.sleep(1)
+    tello.rotate_clockwise(180)
+    time.sleep(2)
+    return True
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bearings", type=float, nargs="+", default=[60, 200])
+    parser.add_argument("--detect-ms", type=float, default=80.0, help="simulated detector latency")
+    parser.add_argument("--modes", nargs="+", default=["legacy", "plan"])
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    detect = make_detector(args.detect_ms)
+    rows = []
+    with TelloSimulator() as sim:
+        tello = connect_tello()
+        tello.LOGGER.setLevel(logging.WARNING)
+        tello.streamon()
+        reader = tello.get_frame_read()
+        telemetry = TelemetryStore().start(tello.get_current_state)
+        counter = RoundTripCounter(tello)
+        time.sleep(2)
+
+        def read_frame():
+            return cv2.resize(reader.frame, FRAME_SIZE)
+
+        def search():
+            result = YawSearch(tello, read_frame, detect, frame_width=FRAME_SIZE[0]).run()
+            return None if result is None else result.box
+
+        for mode in args.modes:
+            for bearing in args.bearings:
+                sim.position[:] = 0.0
+                sim.yaw = 0.0
+                place_target(sim, bearing)
+                sim.renderer.target[2] = 100.0  # 20 cm above the takeoff height
+                time.sleep(0.5)
+                before = dict(counter.counts)
+                start = time.monotonic()
+                if mode == "legacy":
+                    ok = legacy_mission(tello, read_frame, detect)
+                else:
+                    runner = MissionRunner(tello, read_frame, detect, search=search, telemetry=telemetry,
+                                           frame_size=FRAME_SIZE)
+                    ok = runner.run(LOGO_HUNT)["ok"]
+                elapsed = time.monotonic() - start
+                counts = {k: counter.counts[k] - before[k] for k in before}
+                rows.append({"mode": mode, "bearing": bearing, "ok": ok, "seconds": round(elapsed, 2),
+                             "round_trips": counts["control"] + counts["read"], "rc_packets": counts["no_reply"]})
+                r = rows[-1]
+                print(f"{mode:>6} bearing {bearing:5.0f}: {'done' if ok else 'FAILED'} in {r['seconds']:6.2f} s, "
+                      f"{r['round_trips']} round trips, {r['rc_packets']} rc packets")
+                tello.land()
+        telemetry.stop()
+        tello.end()
+    for mode in args.modes:
+        done = [r for r in rows if r["mode"] == mode and r["ok"]]
+        if done:
+            print(f"{mode:>6}: mean {np.mean([r['seconds'] for r in done]):.2f} s, "
+                  f"{np.mean([r['round_trips'] for r in done]):.1f} round trips over {len(done)} runs")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
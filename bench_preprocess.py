@@ -0,0 +1,102 @@
+# bench_preprocess.py
+# Per-frame preprocessing cost when the gesture and logo detectors share a frame: each
+# consumer converting its own copy (get_camera_frame's resize, detect_gesture's cvtColor,
+# YOLOv5 AutoShape's letterbox) vs. one FramePreprocessor pass into reused buffers.
+#   python bench_preprocess.py --frames 300 --source 960x720 --order rgb
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from frame_preprocess import PAD_VALUE, FramePreprocessor
+
+
+def yolo_letterbox(image, img_size=640, stride=32):
+    # YOLOv5 AutoShape's letterbox(auto=False) of one image to its stride-aligned inference shape
+    h, w = image.shape[:2]
+    gain = img_size / max(h, w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    box_w, box_h = -(-new_w // stride) * stride, -(-new_h // stride) * stride
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    dw, dh = (box_w - new_w) / 2, (box_h - new_h) / 2
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    return cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(PAD_VALUE,) * 3)
+
+
+def separate(frame, size, img_size, order):
+    # what each consumer does today on its own
+    resized = cv2.resize(frame, size)                                   # get_camera_frame
+    converted = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)                # detect_gesture, whatever the order
+    boxed = yolo_letterbox(converted if order == "bgr" else resized, img_size)  # AutoShape
+    return resized.nbytes + converted.nbytes + boxed.nbytes
+
+
+def make_shared(size, img_size, order):
+    preprocess = FramePreprocessor(size=size, order=order, img_size=img_size)
+
+    def shared(frame):
+        prepared = preprocess(frame)
+        slot = preprocess.slots[(preprocess.next_slot - 1) % len(preprocess.slots)]
+        written = 0
+        if slot.image_buf is not None:
+            written += prepared.image.nbytes
+        if slot.rgb_buf is not None:
+            written += prepared.rgb.nbytes
+        if slot.inner is not None:
+            written += slot.inner.nbytes
+        return written
+    return shared, preprocess
+
+
+def measure(fn, frames):
+    # ms per frame, peak transient allocation per frame (bytes, tracemalloc) and bytes written per frame
+    for frame in frames[:5]:
+        fn(frame)  # first calls allocate the shared buffers
+    start = time.perf_counter()
+    for frame in frames:
+        fn(frame)
+    ms = (time.perf_counter() - start) / len(frames) * 1000
+    peaks, written = [], 0
+    tracemalloc.start()
+    for frame in frames:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        written += fn(frame)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return ms, float(np.mean(peaks)), written / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--source", default="960x720", help="camera frame size, WxH")
+    parser.add_argument("--size", default="640x480", help="size the detectors work at, WxH")
+    parser.add_argument("--img-size", type=int, default=640)
+    parser.add_argument("--order", choices=["rgb", "bgr"], default="rgb",
+                        help="channel order of camera frames (djitellopy delivers RGB)")
+    args = parser.parse_args()
+
+    src_w, src_h = (int(v) for v in args.source.split("x"))
+    size = tuple(int(v) for v in args.size.split("x"))
+    rng = np.random.default_rng(0)
+    # distinct frames, as a stream delivers them (a repeated frame would hit the preprocessor's cache)
+    frames = [rng.integers(0, 256, (src_h, src_w, 3), dtype=np.uint8) for _ in range(min(args.frames, 30))]
+    frames = [frames[i % len(frames)].copy() for i in range(args.frames)]
+
+    shared, preprocess = make_shared(size, args.img_size, args.order)
+    rows = [("separate copies", measure(lambda f: separate(f, size, args.img_size, args.order), frames)),
+            ("FramePreprocessor", measure(shared, frames))]
+    print(f"{args.frames} frames {args.source} ({args.order}) -> {args.size}, letterbox {args.img_size}:")
+    for name, (ms, peak, written) in rows:
+        print(f"  {name:>18}: {ms:6.2f} ms/frame, {peak / 1e6:6.2f} MB allocated/frame, "
+              f"{written / 1e6:6.2f} MB written/frame")
+    print(f"  FramePreprocessor buffer sets allocated: {preprocess.allocations}")
+
+
+if __name__ == "__main__":
+    main()
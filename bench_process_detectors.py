@@ -0,0 +1,128 @@
+# bench_process_detectors.py
+# Detector throughput in-process vs. in a worker process (shared-memory frames), while
+# other Python threads compete for the GIL the way the audio thread, keyboard listener
+# and djitellopy's frame reader do in the controller.
+#
+#   python bench_process_detectors.py --kind gesture --frames frames/
+#   python bench_process_detectors.py --kind logo --weights best.pt --load-threads 3
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from process_detectors import DetectorProcess
+
+
+def load_frames(folder, limit):
+    if folder is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (720, 960, 3), dtype=np.uint8) for _ in range(8)]
+    paths = sorted(p for ext in ("jpg", "jpeg", "png") for p in glob.glob(os.path.join(folder, f"*.{ext}")))
+    if not paths:
+        raise SystemExit(f"No frames found in {folder}")
+    return [cv2.imread(p) for p in paths[:limit]]
+
+
+class Background:
+    """Pure-Python busy threads plus a 10 ms ticker, standing in for the controller's other threads."""
+
+    def __init__(self, threads):
+        self.stop = threading.Event()
+        self.work = [0] * threads
+        self.lateness = []
+        self.threads = [threading.Thread(target=self._busy, args=(i,), daemon=True) for i in range(threads)]
+        self.threads.append(threading.Thread(target=self._tick, daemon=True))
+
+    def _busy(self, i):
+        while not self.stop.is_set():
+            total = 0
+            for k in range(1000):
+                total += k * k
+            self.work[i] += 1
+
+    def _tick(self):
+        next_time = time.perf_counter()
+        while not self.stop.is_set():
+            next_time += 0.01
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+            self.lateness.append(max(0.0, time.perf_counter() - next_time))
+
+    def __enter__(self):
+        for t in self.threads:
+            t.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        for t in self.threads:
+            t.join()
+
+
+def run(name, frames, seconds, load_threads, detect=None, process=None, depth=1):
+    done = 0
+    with Background(load_threads) as bg:
+        start = time.perf_counter()
+        if process is not None and depth > 1:
+            # pipelined: keep `depth` frames in flight
+            while time.perf_counter() - start < seconds:
+                while len(process._in_flight) < depth:
+                    process.submit(frames[done % len(frames)])
+                process.collect()
+                done += 1
+            while process._in_flight:
+                process.collect()
+        else:
+            while time.perf_counter() - start < seconds:
+                detect(frames[done % len(frames)])
+                done += 1
+        elapsed = time.perf_counter() - start
+    return {"mode": name, "detector_fps": done / elapsed,
+            "background_kloops_per_s": sum(bg.work) / elapsed,
+            "tick_late_p99_ms": float(np.percentile(bg.lateness, 99) * 1000) if bg.lateness else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kind", choices=["gesture", "logo"], default="gesture")
+    parser.add_argument("--frames", help="folder of .jpg/.png frames (default: synthetic 960x720)")
+    parser.add_argument("--weights", default="best.pt")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--load-threads", type=int, default=2, help="competing Python threads")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames, args.limit)
+    if args.kind == "gesture":
+        from gesture_utils import detect_gesture
+        local = detect_gesture
+        options = {}
+    else:
+        from detector_backends import DetectorBackend
+        local = DetectorBackend("eager", args.weights).infer
+        options = {"name": "eager", "weights": args.weights}
+
+    rows = [run("in-process", frames, args.seconds, args.load_threads, detect=local)]
+    process = DetectorProcess(args.kind, **options)
+    try:
+        rows.append(run("process", frames, args.seconds, args.load_threads, detect=process))
+        rows.append(run("process-pipelined", frames, args.seconds, args.load_threads, process=process, depth=2))
+    finally:
+        process.close()
+
+    print(f"{args.kind}, {len(frames)} frames, {args.load_threads} competing threads, {os.cpu_count()} CPUs")
+    for row in rows:
+        print(f"{row['mode']:>18}: {row['detector_fps']:7.1f} fps | background {row['background_kloops_per_s']:8.0f} "
+              f"kloops/s | 10 ms tick late p99 {row['tick_late_p99_ms']:6.2f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
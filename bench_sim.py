@@ -0,0 +1,152 @@
+# bench_sim.py
+# End-to-end latency benchmarks against the local Tello simulator (tello_sim.py).
+# Prints one JSON document so results can be diffed between runs.
+#
+#   python bench_sim.py --json results.json
+#   python bench_sim.py --modes null gesture logo --weights best.pt --video flight.mp4
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+from tello_sim import TelloSimulator, connect_tello, read_frame_marker
+
+
+def summary(values_ms):
+    values = np.asarray(values_ms, dtype=float)
+    if values.size == 0:
+        return {"n": 0}
+    return {"n": int(values.size), "p50": round(float(np.percentile(values, 50)), 2),
+            "p95": round(float(np.percentile(values, 95)), 2), "max": round(float(values.max()), 2)}
+
+
+def command_rtt(tello, n):
+    rtts = []
+    for _ in range(n):
+        start = time.perf_counter()
+        tello.query_battery()
+        rtts.append((time.perf_counter() - start) * 1000)
+    return summary(rtts)
+
+
+def motion_acks(tello, n):
+    acks = {"takeoff": [], "move_forward 20": [], "rotate_clockwise 30": []}
+    start = time.perf_counter()
+    tello.takeoff()
+    acks["takeoff"].append((time.perf_counter() - start) * 1000)
+    for _ in range(n):
+        start = time.perf_counter()
+        tello.move_forward(20)
+        acks["move_forward 20"].append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        tello.rotate_clockwise(30)
+        acks["rotate_clockwise 30"].append((time.perf_counter() - start) * 1000)
+    return {name: summary(values) for name, values in acks.items()}
+
+
+def stream_fps(sim, reader, duration):
+    # distinct frames seen by the client, and emission -> decoded-frame latency
+    seen = {}
+    start = time.monotonic()
+    while time.monotonic() - start < duration:
+        frame_id = read_frame_marker(reader.frame)
+        if frame_id not in seen and frame_id in sim.frame_times:
+            seen[frame_id] = time.monotonic()
+        time.sleep(0.002)
+    latencies = [(t - sim.frame_times[i]) * 1000 for i, t in seen.items()]
+    return len(seen) / duration, summary(latencies)
+
+
+def load_mode(mode, weights):
+    # per-frame work of each control mode; returns None when its dependencies are missing
+    if mode == "null":
+        return lambda frame: None
+    if mode == "gesture":
+        from gesture_utils import detect_gesture, get_hands_detector
+        get_hands_detector()  # imports MediaPipe now, so a missing install skips the mode
+        return detect_gesture
+    if mode == "logo":
+        from Status2_LogoDetection import LogoDetector
+        detector = LogoDetector(weights)
+
+        def logo(frame):
+            detector.detect(frame)
+            return detector.get_offset(frame.shape)
+        return logo
+    raise ValueError(mode)
+
+
+def frame_to_command(sim, tello, reader, work, duration):
+    # frame leaves the drone -> decoded -> processed -> rc command arrives at the drone
+    sent = []
+    last_id = None
+    log_start = len(sim.command_log)
+    start = time.monotonic()
+    frames = 0
+    while time.monotonic() - start < duration:
+        frame = reader.frame
+        frame_id = read_frame_marker(frame)
+        if frame_id == last_id or frame_id not in sim.frame_times:
+            time.sleep(0.001)
+            continue
+        last_id = frame_id
+        work(frame)
+        frames += 1
+        tello.send_rc_control(0, 0, 0, 0)
+        sent.append(frame_id)
+        time.sleep(0.002)  # djitellopy drops rc commands sent less than 1 ms apart
+    time.sleep(0.2)
+    received = [t for t, command in sim.command_log[log_start:] if command.startswith("rc ")]
+    latencies = [(t - sim.frame_times[i]) * 1000 for i, t in zip(sent, received)]
+    result = summary(latencies)
+    result["fps"] = round(frames / duration, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--time-scale", type=float, default=1.0, help="<1 shortens simulated ack delays")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per streaming measurement")
+    parser.add_argument("-n", type=int, default=20, help="repetitions for command timings")
+    parser.add_argument("--modes", nargs="+", default=["null", "gesture", "logo"])
+    parser.add_argument("--weights", default="best.pt")
+    parser.add_argument("--video", help="stream this file instead of the rendered scene")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {"time_scale": args.time_scale, "duration_s": args.duration}
+    with TelloSimulator(video_path=args.video, time_scale=args.time_scale) as sim:
+        tello = connect_tello()
+        tello.LOGGER.setLevel(logging.WARNING)
+        results["command_rtt_ms"] = command_rtt(tello, args.n)
+        results["motion_ack_ms"] = motion_acks(tello, max(1, args.n // 5))
+
+        tello.streamon()
+        reader = tello.get_frame_read()
+        time.sleep(1.0)
+        fps, frame_latency = stream_fps(sim, reader, args.duration)
+        results["stream_fps"] = round(fps, 2)
+        results["frame_latency_ms"] = frame_latency
+
+        results["frame_to_command_ms"] = {}
+        for mode in args.modes:
+            try:
+                work = load_mode(mode, args.weights)
+            except Exception as e:
+                results["frame_to_command_ms"][mode] = {"skipped": str(e)}
+                continue
+            results["frame_to_command_ms"][mode] = frame_to_command(sim, tello, reader, work, args.duration)
+
+        tello.land()
+        tello.end()  # streamoff must reach the simulator before it shuts down
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# bench_speech.py
+# Speech session setup time and per-utterance latency:
+#   per-utterance: a new recognizer session for every utterance, audio pushed after a fixed
+#                  4 s recording (old path; the unrecorded rest of the 4 s is added to its latency)
+#   persistent:    one session for the whole run, audio pushed block by block while it is "spoken"
+#
+#   python bench_speech.py --wav land.wav   # Azure when AZURE_SPEECH_KEY is set
+# Without a key the fake backend runs instead. Its setup and result delays are scripted, so
+# that run only checks the harness (feeding, timing, missed counting); its numbers measure nothing.
+import argparse
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+from dotenv import load_dotenv
+
+from audio_stream import block_rms
+from speech_backends import AzureSpeechBackend, FakeSpeechBackend
+
+SAMPLERATE = 16000
+BLOCK = 1600  # 100 ms, same as MicrophoneStream
+RECORD_SECONDS = 4
+
+
+def load_audio(path):
+    if path is None:
+        # 1 s of tone ("speech") followed by 0.5 s of silence
+        t = np.arange(SAMPLERATE) / SAMPLERATE
+        tone = (3000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+        return np.concatenate([tone, np.zeros(SAMPLERATE // 2, dtype=np.int16)]).tobytes()
+    with wave.open(path, "rb") as wav:
+        if wav.getframerate() != SAMPLERATE or wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise SystemExit("Expected a 16 kHz mono 16-bit WAV file")
+        return wav.readframes(wav.getnframes())
+
+
+class ResultWaiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.time = None
+
+    def __call__(self, text):
+        self.time = time.perf_counter()
+        self.event.set()
+
+
+def speech_end_offset(audio):
+    # byte offset just past the last block above the voice threshold
+    end = 0
+    for i in range(0, len(audio), BLOCK * 2):
+        if block_rms(audio[i:i + BLOCK * 2]) > 500:
+            end = i + BLOCK * 2
+    return min(end, len(audio))
+
+
+def run_per_utterance(make_backend, audio, n):
+    # speech ends, the fixed recording runs out, then the session is built and fed
+    recording_tail = max(RECORD_SECONDS - speech_end_offset(audio) / 2 / SAMPLERATE, 0)
+    setups, latencies, missed = [], [], 0
+    for _ in range(n):
+        waiter = ResultWaiter()
+        start = time.perf_counter()
+        backend = make_backend()
+        backend.start(waiter)
+        setups.append(backend.setup_time)
+        backend.write(audio)
+        waiter.event.wait(10)
+        backend.stop()
+        if waiter.time is None:
+            missed += 1
+        else:
+            latencies.append(recording_tail + waiter.time - start)
+    return setups, latencies, missed
+
+
+def run_persistent(make_backend, audio, n):
+    waiter = ResultWaiter()
+    backend = make_backend()
+    backend.start(waiter)
+    speech_end = speech_end_offset(audio)
+    latencies, missed = [], 0
+    for _ in range(n):
+        waiter.event.clear()
+        waiter.time = None
+        end = None
+        for i in range(0, len(audio), BLOCK * 2):
+            backend.write(audio[i:i + BLOCK * 2])
+            if i + BLOCK * 2 >= speech_end and end is None:
+                end = time.perf_counter()
+            if waiter.event.is_set():
+                break
+            time.sleep(BLOCK / SAMPLERATE)
+        waiter.event.wait(10)
+        if waiter.time is None or end is None:
+            missed += 1  # no result, or one before the speech end was fed: no latency to measure
+        else:
+            latencies.append(waiter.time - end)
+    backend.stop()
+    return [backend.setup_time], latencies, missed
+
+
+def report(name, setups, latencies, missed):
+    if not latencies:
+        print(f"{name:>21}: setup {np.mean(setups) * 1000:7.1f} ms x {len(setups)}, no utterance recognized "
+              f"({missed} missed)")
+        return
+    lat = np.array(latencies) * 1000
+    print(f"{name:>21}: setup {np.mean(setups) * 1000:7.1f} ms x {len(setups)}, "
+          f"latency p50 {np.percentile(lat, 50):7.1f} ms  p95 {np.percentile(lat, 95):7.1f} ms "
+          f"({len(lat)} utterances, {missed} missed)")
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wav", help="16 kHz mono recording of one command")
+    parser.add_argument("-n", type=int, default=5, help="utterances per mode")
+    args = parser.parse_args()
+
+    audio = load_audio(args.wav)
+    key = os.getenv("AZURE_SPEECH_KEY")
+    if key:
+        region = os.getenv("AZURE_REGION", "eastus2")
+        make_backend = lambda: AzureSpeechBackend(key, region, SAMPLERATE)
+    else:
+        print("AZURE_SPEECH_KEY not set: harness self-test with FakeSpeechBackend. Its setup and result "
+              "delays are scripted, so the numbers below are not a measurement of either mode.")
+        # the fake answers 300 ms after speech ends, like Azure's segmentation timeout
+        seconds = min(speech_end_offset(audio) / 2 / SAMPLERATE + 0.3, len(audio) / 2 / SAMPLERATE)
+        make_backend = lambda: FakeSpeechBackend(["land"] * args.n, SAMPLERATE, utterance_seconds=seconds,
+                                                 setup_delay=0.3, result_delay=0.05)
+
+    suffix = "" if key else " (fake)"
+    report("per-utterance" + suffix, *run_per_utterance(make_backend, audio, args.n))
+    report("persistent" + suffix, *run_persistent(make_backend, audio, args.n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# bench_startup.py
+# Startup cost: per-module import time in a fresh interpreter, and launch -> "ready for
+# first command" of the Vosk controller against the local simulator, with its heavy
+# init run one step after another (sequential) or warmed during microphone selection.
+#   python bench_startup.py --model vosk-model-small-en-us-0.15 --operator-delay 3 --json startup.json
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from tello_sim import TelloSimulator
+
+MODULES = ["gesture_utils", "frame_pipeline", "Status2_LogoDetection", "flight_recorder", "swarm",
+           "RobartistController_press_vosk", "RobartistController_press_azure"]
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+CONTROLLER_SNIPPET = """
+import time
+import startup
+import RobartistController_press_vosk as controller_module
+from djitellopy import Tello
+from tello_sim import COMMAND_PORT
+
+controller = controller_module.RobartistController({model!r})
+controller.drone = Tello(host="127.0.0.1")
+controller.drone.address = ("127.0.0.1", COMMAND_PORT)
+controller._set_microphone = lambda: time.sleep({operator_delay})  # the operator picking a microphone
+controller.start(background={background})
+controller.drone.end()
+"""
+
+
+def run_child(code, env=None):
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env=env, cwd=os.path.dirname(os.path.abspath(__file__)), timeout=120)
+    if result.returncode:
+        return None, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+    return result.stdout, None
+
+
+def import_times(repeat):
+    rows = []
+    for module in MODULES:
+        times, error = [], None
+        for _ in range(repeat):
+            out, error = run_child(IMPORT_SNIPPET.format(module=module))
+            if error:
+                break
+            times.append(float(out.strip().splitlines()[-1]))
+        row = {"module": module, "import_ms": round(float(np.median(times)) * 1000, 1) if times else None}
+        if error:
+            row["error"] = error
+        rows.append(row)
+        print(f"  import {module:<34} " + (f"{row['import_ms']:8.1f} ms" if times else f"skipped ({error})"))
+    return rows
+
+
+def controller_ready(model, operator_delay, background, repeat):
+    runs = []
+    with TelloSimulator(time_scale=0.2):
+        for _ in range(repeat):
+            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+                profile_path = f.name
+            env = dict(os.environ, STARTUP_PROFILE=profile_path)
+            code = CONTROLLER_SNIPPET.format(model=model, operator_delay=operator_delay, background=background)
+            _, error = run_child(code, env)
+            if error:
+                os.unlink(profile_path)
+                return {"error": error}
+            with open(profile_path) as f:
+                runs.append(json.load(f))
+            os.unlink(profile_path)
+    ready = [r["ready_s"] for r in runs]
+    steps = {}
+    for entry in runs[-1]["entries"]:
+        if entry["kind"] != "import":
+            steps[entry["name"]] = round(entry["seconds"], 3)
+    return {"ready_s": round(float(np.median(ready)), 3), "steps_s": steps}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=os.getenv("VOSK_MODEL_PATH", "vosk-model-small-en-us-0.15"))
+    parser.add_argument("--operator-delay", type=float, default=3.0, help="seconds the operator takes to pick a mic")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    print("Fresh-interpreter import times (median):")
+    results = {"imports": import_times(args.repeat)}
+    print(f"Launch -> ready, Vosk controller on the simulator, operator takes {args.operator_delay:.1f} s:")
+    for mode, background in (("sequential", False), ("background", True)):
+        row = controller_ready(args.model, args.operator_delay, background, args.repeat)
+        results[mode] = row
+        if "error" in row:
+            print(f"  {mode:>10}: skipped ({row['error']})")
+        else:
+            steps = ", ".join(f"{name} {seconds:.2f} s" for name, seconds in row["steps_s"].items())
+            print(f"  {mode:>10}: ready after {row['ready_s']:.2f} s ({steps})")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
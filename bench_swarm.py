@@ -0,0 +1,121 @@
+# bench_swarm.py
+# How per-drone latency and ground-station CPU scale with the swarm size, using one
+# tello_sim.py process per simulated drone on 127.0.0.2, 127.0.0.3, ...
+#
+#   python bench_swarm.py --drones 1 2 4 6 --mode gesture --json swarm.json
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from metrics import METRICS
+from swarm import VIDEO_BASE_PORT, GestureBatch, LogoBatch, Swarm, SwarmDrone
+from tello_sim import COMMAND_PORT
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def start_sims(n, time_scale, fps):
+    sims = [subprocess.Popen([sys.executable, "tello_sim.py", "--host", f"127.0.0.{i + 2}",
+                              "--time-scale", str(time_scale), "--fps", str(fps)],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) for i in range(n)]
+    time.sleep(2.0)  # imports + socket setup
+    return sims
+
+
+async def poll_battery(swarm, duration, period):
+    # every drone answers a read every period, concurrently
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        await swarm.send("all", "battery?")
+        await asyncio.sleep(period)
+
+
+def stage(name):
+    hist = METRICS.histograms.get(name)
+    return hist.summary() if hist is not None else {"count": 0}
+
+
+def run(n, args, process_batch):
+    METRICS.reset()
+    sims = start_sims(n, args.time_scale, args.fps)
+    drones = [SwarmDrone(f"sim{i}", f"127.0.0.{i + 2}", command_port=COMMAND_PORT, video_port=VIDEO_BASE_PORT + i)
+              for i in range(n)]
+    swarm = Swarm(drones, bind_ip="127.0.0.1")
+    try:
+        swarm.start(video=True)
+        results = {}
+        swarm.start_inference(process_batch, lambda name, result, packet: results.setdefault(name, 0))
+        time.sleep(1.0)  # first keyframes
+        METRICS.reset()
+        frames_before = swarm.pool.frames
+        cpu_before, wall_before = cpu_seconds(), time.monotonic()
+        asyncio.run_coroutine_threadsafe(poll_battery(swarm, args.duration, 0.2), swarm.loop).result()
+        wall = time.monotonic() - wall_before
+        cpu = cpu_seconds() - cpu_before
+        frames = swarm.pool.frames - frames_before
+
+        per_drone = {d.name: {"rtt": stage(f"swarm.{d.name}.rtt"),
+                              "frame_to_result": stage(f"swarm.{d.name}.frame_to_result")} for d in drones}
+        row = {
+            "drones": n,
+            "rtt_p50_ms": float(np.mean([v["rtt"].get("p50_ms", np.nan) for v in per_drone.values()])),
+            "rtt_p95_ms": float(np.mean([v["rtt"].get("p95_ms", np.nan) for v in per_drone.values()])),
+            "frame_to_result_p50_ms": float(np.mean([v["frame_to_result"].get("p50_ms", np.nan)
+                                                     for v in per_drone.values()])),
+            "result_fps_per_drone": frames / wall / n,
+            "mean_batch": swarm.pool.mean_batch,
+            "ground_cpu_percent": cpu / wall * 100,
+            "per_drone": per_drone,
+        }
+    finally:
+        swarm.stop()
+        for sim in sims:
+            sim.terminate()
+        for sim in sims:
+            sim.wait()
+        time.sleep(0.5)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drones", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--mode", choices=["null", "gesture", "logo"], default="null")
+    parser.add_argument("--weights", default="best.pt")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--time-scale", type=float, default=0.1)
+    parser.add_argument("--fps", type=int, default=30, help="video fps of each simulated drone")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.mode == "gesture":
+        process_batch = GestureBatch()
+    elif args.mode == "logo":
+        process_batch = LogoBatch(args.weights)
+    else:
+        process_batch = lambda items: [None] * len(items)  # decode + batching cost only
+
+    rows = []
+    for n in args.drones:
+        row = run(n, args, process_batch)
+        rows.append(row)
+        print(f"{n} drones: rtt p50 {row['rtt_p50_ms']:6.1f} ms p95 {row['rtt_p95_ms']:6.1f} ms | "
+              f"frame->result p50 {row['frame_to_result_p50_ms']:6.1f} ms, {row['result_fps_per_drone']:5.1f} fps/drone, "
+              f"batch {row['mean_batch']:.2f} | ground station CPU {row['ground_cpu_percent']:5.1f}%")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
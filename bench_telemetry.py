@@ -0,0 +1,63 @@
+# bench_telemetry.py
+# TelemetryStore vs. a plain list of state dicts (what the flight recorder keeps) for
+# the queries control code makes: latest state, state at a frame's capture time, last second.
+#   python bench_telemetry.py --minutes 60
+import argparse
+import bisect
+import time
+
+import numpy as np
+
+from telemetry import FIELDS, TelemetryStore
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=60.0, help="flight length at 10 Hz state")
+    parser.add_argument("-n", type=int, default=2000, help="queries per measurement")
+    args = parser.parse_args()
+
+    samples = int(args.minutes * 600)
+    rng = np.random.default_rng(0)
+    times = np.cumsum(rng.uniform(0.09, 0.11, samples))
+    states = [{name: float(v) for name, v in zip(FIELDS, row)} for row in rng.normal(size=(samples, len(FIELDS)))]
+    queries = rng.uniform(times[0], times[-1], args.n)
+
+    store = TelemetryStore(capacity=samples)
+    append_us = timed(lambda i: store.append(states[i], times[i]), samples)
+    log_times, log_states = [], []
+    list_append_us = timed(lambda i: (log_times.append(times[i]), log_states.append(states[i])), samples)
+
+    def list_nearest(t):
+        i = bisect.bisect_left(log_times, t)
+        return min((j for j in (i - 1, i) if 0 <= j < len(log_times)), key=lambda j: abs(log_times[j] - t))
+
+    def list_window(t):
+        return [s for lt, s in zip(log_times, log_states) if t - 1.0 <= lt <= t]  # scan, as ad hoc log parsing does
+
+    rows = [
+        ("append", append_us, list_append_us),
+        ("latest", timed(lambda i: store.latest(), args.n), timed(lambda i: log_states[-1], args.n)),
+        ("nearest(frame time)", timed(lambda i: store.nearest(queries[i]), args.n),
+         timed(lambda i: list_nearest(queries[i]), args.n)),
+        ("window(1 s)", timed(lambda i: store.window(queries[i] - 1.0, queries[i]), min(args.n, 200)),
+         timed(lambda i: list_window(queries[i]), min(args.n, 200))),
+    ]
+    print(f"{samples} samples ({args.minutes:.0f} min at 10 Hz); microseconds per call")
+    print(f"{'':>20}  {'TelemetryStore':>14}  {'list of dicts':>14}")
+    for name, ours, theirs in rows:
+        print(f"{name:>20}  {ours:14.2f}  {theirs:14.2f}")
+    values = store.window(float("-inf"))[1]
+    print(f"memory: {store.times.nbytes + store.values.nbytes} bytes in arrays, column mean of 'h' "
+          f"over the flight in one call: {np.nanmean(values[:, FIELDS.index('h')]):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# bench_yaw_search.py
+# Time to find the target: rotate_until_target_found's stepped search vs. YawSearch,
+# against the local Tello simulator with the icon placed at several bearings.
+#   python bench_yaw_search.py --bearings 45 150 270 --detect-ms 80
+# The icon is found with a color mask plus an artificial delay standing in for YOLO.
+import argparse
+import json
+import logging
+import math
+import time
+
+import numpy as np
+
+from tello_sim import TelloSimulator, connect_tello
+from yaw_search import YawSearch
+
+
+def make_detector(detect_ms):
+    def detect(frame):
+        start = time.perf_counter()
+        a, g, c = frame[..., 0], frame[..., 1], frame[..., 2]
+        # the simulator's orange icon, whether the reader delivers BGR or RGB
+        ys, xs = np.nonzero((np.maximum(a, c) > 200) & (np.minimum(a, c) < 40) & (g < 120))
+        time.sleep(max(0.0, detect_ms / 1000 - (time.perf_counter() - start)))
+        if xs.size < 30:
+            return None, 0.0
+        return [xs.min(), ys.min(), xs.max(), ys.max()], 0.9
+    return detect
+
+
+def step_search(tello, read_frame, detect, renderer):
+    # rotate_until_target_found's first lap: detect (one retry, 1 s apart), rotate 30 deg, wait 1 s
+    for _ in range(12):
+        for attempt in range(2):
+            box, _ = detect(read_frame())
+            if box is not None:
+                x1, _, x2, _ = box  # heading plus the box offset, as YawSearch reports it
+                offset = math.degrees(math.atan(((x1 + x2) / 2 - renderer.width / 2) / renderer.focal))
+                return float(tello.get_yaw()) + offset
+            time.sleep(1)
+        tello.rotate_clockwise(30)
+        time.sleep(1)
+    return None
+
+
+def place_target(sim, bearing, distance=300.0):
+    # icon `bearing` degrees clockwise from the drone's current heading, at its height
+    heading = math.radians(sim.yaw + bearing)
+    sim.renderer.target = np.array([sim.position[0] + distance * math.cos(heading),
+                                    sim.position[1] - distance * math.sin(heading), sim.position[2]])
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bearings", type=float, nargs="+", default=[45, 150, 270])
+    parser.add_argument("--detect-ms", type=float, default=80.0, help="simulated detector latency")
+    parser.add_argument("--yaw-speed", type=int, default=40)
+    parser.add_argument("--modes", nargs="+", default=["step", "continuous"])
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    detect = make_detector(args.detect_ms)
+    rows = []
+    with TelloSimulator() as sim:
+        tello = connect_tello()
+        tello.LOGGER.setLevel(logging.WARNING)
+        tello.streamon()
+        reader = tello.get_frame_read()
+        time.sleep(2)
+        tello.takeoff()
+        for mode in args.modes:
+            for bearing in args.bearings:
+                tello.send_rc_control(0, 0, 0, 0)
+                time.sleep(0.3)
+                place_target(sim, bearing)
+                time.sleep(0.5)  # let frames rendered before the move drain from the stream
+                start_yaw = sim.yaw
+                start = time.monotonic()
+                if mode == "step":
+                    heading = step_search(tello, lambda: reader.frame, detect, sim.renderer)
+                else:
+                    result = YawSearch(tello, lambda: reader.frame, detect, yaw_speed=args.yaw_speed).run()
+                    heading = None if result is None else result.target_heading
+                elapsed = time.monotonic() - start
+                error = None if heading is None else abs((heading - start_yaw - bearing + 180) % 360 - 180)
+                rows.append({"mode": mode, "bearing": bearing, "found": heading is not None,
+                             "time_to_find_s": round(elapsed, 2),
+                             "heading_error_deg": None if error is None else round(error, 1)})
+                r = rows[-1]
+                print(f"{mode:>10} bearing {bearing:5.0f}: {'found' if r['found'] else 'MISSED'} in "
+                      f"{r['time_to_find_s']:6.2f} s, heading error {r['heading_error_deg']} deg")
+        tello.land()
+        tello.end()
+    for mode in args.modes:
+        times = [r["time_to_find_s"] for r in rows if r["mode"] == mode and r["found"]]
+        if times:
+            print(f"{mode:>10}: mean time to find {np.mean(times):.2f} s over {len(times)} bearings")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# box_tracker.py
+import cv2
+import numpy as np
+
+
+def box_to_state(box):
+    x1, y1, x2, y2 = box
+    w, h = x2 - x1, y2 - y1
+    return np.array([(x1 + x2) / 2, (y1 + y2) / 2, w * h]), w / max(h, 1e-6)
+
+
+def state_to_box(cx, cy, area, aspect):
+    area = max(area, 1.0)
+    h = np.sqrt(area / aspect)
+    w = area / h
+    return [cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]
+
+
+class BoxKalmanFilter:
+    """Constant-velocity Kalman filter on a box's center and area.
+
+    State is [cx, cy, area, vx, vy, varea] in pixels per frame; the box aspect
+    ratio is taken from the latest measurement.
+    """
+
+    def __init__(self, box, process_noise=1.0, measurement_noise=4.0):
+        z, self.aspect = box_to_state(box)
+        self.x = np.concatenate([z, np.zeros(3)])
+        self.P = np.diag([10.0, 10.0, 100.0, 100.0, 100.0, 1000.0])
+        self.F = np.eye(6)
+        self.F[:3, 3:] = np.eye(3)
+        self.H = np.eye(3, 6)
+        self.Q = np.diag([1.0, 1.0, 10.0, 1.0, 1.0, 10.0]) * process_noise
+        self.R = np.diag([1.0, 1.0, 100.0]) * measurement_noise
+
+    def predict(self):
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        return self.box()
+
+    def update(self, box):
+        z, self.aspect = box_to_state(box)
+        y = z - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(6) - K @ self.H) @ self.P
+        return self.box()
+
+    def box(self):
+        cx, cy, area = self.x[:3]
+        return state_to_box(cx, cy, area, self.aspect)
+
+
+def create_cv_tracker():
+    # KCF/CSRT need opencv-contrib; MIL ships with plain opencv-python
+    for name in ("TrackerKCF_create", "TrackerCSRT_create", "TrackerMIL_create"):
+        for owner in (cv2, getattr(cv2, "legacy", None)):
+            if owner is not None and hasattr(owner, name):
+                return getattr(owner, name)()
+    return None
+
+
+class DetectThenTrack:
+    """Run the full detector only every few frames and track the box in between.
+
+    detect_fn(frame) returns (box, confidence) or (None, 0). Between detections
+    the box is propagated by an OpenCV tracker (when available) smoothed by a
+    BoxKalmanFilter. Track confidence starts at the detection confidence and
+    decays every tracked frame; a new detection runs every `redetect_every`
+    frames or as soon as confidence falls below `min_confidence`. A missed
+    detection keeps returning the predicted box for up to `max_misses` frames,
+    so short dropouts do not look like a lost target.
+
+    Tracking assumes frames of continuous motion. After a discrete drone move
+    (move_*, rotate_*) call moved(): the next step() runs the detector and
+    starts a new filter, so no velocity learned from (or across) motion the
+    drone itself caused is extrapolated; if that detection misses, the track is
+    lost rather than coasting on a pre-move box.
+    """
+
+    def __init__(self, detect_fn, redetect_every=5, min_confidence=0.35, decay=0.9,
+                 max_misses=3, use_cv_tracker=True):
+        self.detect_fn = detect_fn
+        self.redetect_every = redetect_every
+        self.min_confidence = min_confidence
+        self.decay = decay
+        self.max_misses = max_misses
+        self.use_cv_tracker = use_cv_tracker
+        self.reset()
+        self.detections = 0
+        self.tracked_frames = 0
+
+    def reset(self):
+        self.kalman = None
+        self.cv_tracker = None
+        self.confidence = 0.0
+        self.since_detection = 0
+        self.misses = 0
+        self.after_move = False
+
+    def moved(self):
+        # the camera jumped (a discrete move / turn finished): detect on the next frame, no extrapolation
+        self.after_move = True
+
+    def _start(self, frame, box, confidence):
+        # a new filter on first acquisition, after a loss or after a discrete move; a periodic
+        # redetect of the live track corrects the existing one, so its velocity estimate survives
+        if self.kalman is None or self.after_move:
+            self.kalman = BoxKalmanFilter(box)
+        else:
+            self.kalman.predict()
+            self.kalman.update(box)
+        self.confidence = confidence
+        self.since_detection = 0
+        self.misses = 0
+        self.after_move = False
+        self.cv_tracker = create_cv_tracker() if self.use_cv_tracker else None
+        if self.cv_tracker is not None:
+            x1, y1, x2, y2 = [int(v) for v in box]
+            self.cv_tracker.init(frame, (x1, y1, max(x2 - x1, 1), max(y2 - y1, 1)))
+
+    def step(self, frame):
+        # icon box for this frame, or None when the target is lost
+        tracking = self.kalman is not None
+        if (not tracking or self.after_move or self.since_detection + 1 >= self.redetect_every
+                or self.confidence < self.min_confidence):
+            self.detections += 1
+            box, confidence = self.detect_fn(frame)
+            if box is not None:
+                self._start(frame, box, confidence)
+                return list(box)
+            if not tracking or self.after_move:
+                self.reset()
+                return None
+            self.misses += 1
+            if self.misses > self.max_misses:
+                self.reset()
+                return None
+        return self._track(frame)
+
+    def _track(self, frame):
+        self.tracked_frames += 1
+        self.since_detection += 1
+        predicted = self.kalman.predict()
+        self.confidence *= self.decay
+        if self.cv_tracker is not None:
+            ok, (x, y, w, h) = self.cv_tracker.update(frame)
+            if ok:
+                return self.kalman.update([x, y, x + w, y + h])
+            self.confidence *= 0.5  # appearance lost: coast on the motion model, redetect soon
+        return predicted
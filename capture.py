@@ -0,0 +1,285 @@
+# capture.py
+import collections
+import datetime
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from metrics import METRICS, log_every, observe
+
+ENCODE_METRICS = ("capture.jpeg_encode", "capture.photo_lag", "capture.video_encode", "capture.video_lag",
+                  "capture.clip_encode")
+
+
+class FrameRing:
+    """The last `seconds` of frames with their capture times; holds references, never copies."""
+
+    def __init__(self, seconds=5.0, fps=30):
+        self.frames = collections.deque(maxlen=max(1, int(seconds * fps)))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def append(self, t, frame):
+        with self._lock:
+            self.frames.append((t, frame))
+
+    def latest(self):
+        # (capture time, frame) or None while empty
+        with self._lock:
+            return self.frames[-1] if self.frames else None
+
+    def since(self, t):
+        # [(capture time, frame), ...] captured at or after t, oldest first
+        with self._lock:
+            return [item for item in self.frames if item[0] >= t]
+
+
+class CaptureRecorder:
+    """Photos, clips and flight video from the camera stream, encoded off the control loop.
+
+    A capture thread polls read_frame and keeps the last `ring_seconds` in a
+    FrameRing. photo(), burst() and save_last() only pick frames and queue
+    JPEG / MP4 jobs on a worker pool; start_recording() streams every frame to
+    an encoder thread writing `segment_seconds` MP4 segments. All files get
+    timestamped names under `directory`. When the encoders fall behind, frames
+    and jobs are dropped and counted instead of queueing without bound, so the
+    command and control threads never wait on the disk.
+
+    read_frame must return a new array per frame (djitellopy's reader does) or
+    None while there is no stream; the ring keeps about ring_seconds * fps
+    frames alive (about 2 MB each at 960x720). order is the channel order of
+    the frames, converted to BGR for OpenCV on the encoder threads.
+    """
+
+    def __init__(self, read_frame, directory="captures", fps=30, ring_seconds=5.0, segment_seconds=60.0,
+                 workers=2, max_backlog=8, video_queue=60, jpeg_quality=90, order="rgb"):
+        self.read_frame = read_frame
+        self.directory = directory
+        self.fps = fps
+        self.segment_seconds = segment_seconds
+        self.jpeg_quality = jpeg_quality
+        self.order = order
+        self.max_backlog = max_backlog
+        self.ring = FrameRing(ring_seconds, fps)
+        self.counts = dict.fromkeys(("captured", "photos", "clips", "video_frames", "segments",
+                                     "dropped_video_frames", "dropped_jobs"), 0)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="capture-encode")
+        self._backlog = 0
+        self._armed = collections.deque()  # photo paths waiting for upcoming frames (burst)
+        self._arm_every = 1
+        self._arm_skip = 0
+        self._lock = threading.Lock()
+        self._video_queue = queue.Queue(maxsize=video_queue)
+        self._video_thread = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ----- capture -----
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        last = None
+        while not self._stop.is_set():
+            try:
+                frame = self.read_frame()
+            except Exception as e:
+                log_every("capture.read", f"Capture: read_frame failed: {e}", 5.0, logging.WARNING)
+                frame = None
+            if frame is None or frame is last:
+                time.sleep(0.005)  # no stream, or no new frame decoded yet
+                continue
+            last = frame
+            t = time.monotonic()
+            self.ring.append(t, frame)
+            self._count("captured")
+            self._fire_armed(t, frame)
+            # stop_recording clears _video_thread under the lock, so nothing is queued behind its sentinel
+            with self._lock:
+                if self._video_thread is not None:
+                    try:
+                        self._video_queue.put_nowait((t, frame))
+                    except queue.Full:
+                        self.counts["dropped_video_frames"] += 1
+
+    def _fire_armed(self, t, frame):
+        with self._lock:
+            if not self._armed:
+                return
+            if self._arm_skip:
+                self._arm_skip -= 1
+                return
+            path = self._armed.popleft()
+            self._arm_skip = self._arm_every - 1
+        self._submit(self._write_photo, t, frame, path)
+
+    def _count(self, name):
+        # counters are bumped from the capture, encoder and pool threads
+        with self._lock:
+            self.counts[name] += 1
+
+    # ----- files -----
+    def _path(self, kind, suffix, stamp=None):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = stamp or datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        return os.path.join(self.directory, f"{kind}_{stamp}{suffix}")
+
+    def _bgr(self, frame):
+        return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR) if self.order == "rgb" else frame
+
+    def _submit(self, fn, *args):
+        # queue an encode job; False (and counted) when the pool is already max_backlog jobs behind
+        with self._lock:
+            if self._backlog >= self.max_backlog:
+                self.counts["dropped_jobs"] += 1
+                return False
+            self._backlog += 1
+
+        def job():
+            try:
+                fn(*args)
+            except Exception as e:
+                logging.error(f"Capture: {fn.__name__} failed: {e}")
+            finally:
+                with self._lock:
+                    self._backlog -= 1
+
+        self.pool.submit(job)
+        return True
+
+    def _write_photo(self, t, frame, path):
+        start = time.perf_counter()
+        cv2.imwrite(path, self._bgr(frame), [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        observe("capture.jpeg_encode", time.perf_counter() - start)
+        observe("capture.photo_lag", time.monotonic() - t)
+        self._count("photos")
+
+    def _write_clip(self, frames, path):
+        start = time.perf_counter()
+        h, w = frames[0][1].shape[:2]
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (w, h))
+        try:
+            for _, frame in frames:
+                if frame.shape[:2] == (h, w):
+                    writer.write(self._bgr(frame))
+        finally:
+            writer.release()
+        observe("capture.clip_encode", time.perf_counter() - start)
+        self._count("clips")
+
+    # ----- requests (return at once, the work happens on the encoders) -----
+    def photo(self):
+        # JPEG of the newest frame (or of the next one, when none arrived in the last 0.5 s);
+        # returns the file path, or None when the encoders are too far behind
+        path = self._path("photo", ".jpg")
+        latest = self.ring.latest()
+        if latest is not None and time.monotonic() - latest[0] < 0.5:
+            return path if self._submit(self._write_photo, latest[0], latest[1], path) else None
+        with self._lock:
+            self._armed.append(path)
+        return path
+
+    def burst(self, count=5, every=3):
+        # `count` photos of the upcoming frames, one every `every` frames; returns their paths
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        paths = [self._path("burst", f"_{i:02d}.jpg", stamp) for i in range(count)]
+        with self._lock:
+            self._armed.extend(paths)
+            self._arm_every = max(1, every)
+        return paths
+
+    def save_last(self, seconds=5.0):
+        # MP4 of the frames captured in the last `seconds` (as far as the ring reaches); path or None
+        frames = self.ring.since(time.monotonic() - seconds)
+        if not frames:
+            return None
+        path = self._path("clip", ".mp4")
+        return path if self._submit(self._write_clip, frames, path) else None
+
+    # ----- continuous recording -----
+    @property
+    def recording(self):
+        return self._video_thread is not None
+
+    def start_recording(self):
+        with self._lock:
+            if self._video_thread is not None:
+                return
+            thread = self._video_thread = threading.Thread(target=self._record, name="capture-video", daemon=True)
+        thread.start()
+
+    def stop_recording(self):
+        with self._lock:
+            thread, self._video_thread = self._video_thread, None
+        if thread is not None:
+            self._video_queue.put(None)
+            thread.join()
+            # anything left behind the sentinel would start the next recording with stale
+            # video; it was never written, so count it as dropped
+            while True:
+                try:
+                    item = self._video_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    self._count("dropped_video_frames")
+
+    def _record(self):
+        # one writer at a time; a new segment every segment_seconds, after a gap in the stream
+        # (e.g. streamoff between gesture sessions) or when the frame size changes
+        session = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        writer, segment_start, last_t, size, index = None, 0.0, 0.0, None, 0
+        while True:
+            item = self._video_queue.get()
+            if item is None:
+                break
+            t, frame = item
+            h, w = frame.shape[:2]
+            if writer is None or t - segment_start >= self.segment_seconds or t - last_t > 2.0 or (w, h) != size:
+                if writer is not None:
+                    writer.release()
+                path = self._path("flight", f"_{index:03d}.mp4", session)
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (w, h))
+                segment_start, size, index = t, (w, h), index + 1
+                self._count("segments")
+                logging.info(f"Capture: recording to {path}")
+            last_t = t
+            start = time.perf_counter()
+            writer.write(self._bgr(frame))
+            observe("capture.video_encode", time.perf_counter() - start)
+            observe("capture.video_lag", time.monotonic() - t)
+            self._count("video_frames")
+        if writer is not None:
+            writer.release()
+
+    # ----- reporting / shutdown -----
+    def stats(self):
+        # counters plus encode latency percentiles (also in METRICS, flushed to metrics.jsonl)
+        with self._lock:
+            report = dict(self.counts)
+            report["backlog"] = self._backlog
+        report["video_queue"] = self._video_queue.qsize()
+        for name in ENCODE_METRICS:
+            report[name] = METRICS.histogram(name).summary()
+        return report
+
+    def close(self):
+        # stop capturing, finish the current segment and every queued photo / clip
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.stop_recording()
+        self.pool.shutdown(wait=True)
+        logging.info(f"Capture: {dict(self.counts)}")
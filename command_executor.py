@@ -0,0 +1,168 @@
+# command_executor.py
+import collections
+import logging
+import threading
+import time
+
+from metrics import observe
+
+MOVE = "move"        # movement intent: a newer one replaces any still waiting
+ACTION = "action"    # runs in order (takeoff, flips, ...)
+SAFETY = "safety"    # land / stop: jumps the queue and cancels waiting moves and actions
+
+
+class CommandRecord:
+    def __init__(self, name, kind, on_done=None):
+        self.name = name
+        self.kind = kind
+        self.on_done = on_done
+        self.enqueued = time.monotonic()
+        self.sent = None
+        self.acked = None
+        self.error = None
+        self.dropped = False
+        self.done = threading.Event()
+
+    @property
+    def ok(self):
+        # sent and acknowledged without an error (False while pending, when dropped or failed)
+        return self.done.is_set() and not self.dropped and self.error is None
+
+    def _finish(self):
+        self.done.set()
+        if self.on_done is not None:
+            try:
+                self.on_done(self)
+            except Exception as e:
+                logging.error(f"Drone command {self.name}: on_done failed: {e}")
+
+    @property
+    def queue_ms(self):
+        return None if self.sent is None else (self.sent - self.enqueued) * 1000
+
+    @property
+    def ack_ms(self):
+        return None if self.acked is None else (self.acked - self.sent) * 1000
+
+
+class CommandExecutor:
+    """Runs blocking djitellopy calls on one background thread.
+
+    submit() returns immediately. Waiting movement commands are coalesced so only
+    the newest intent is sent, safety commands go to the front of the queue and
+    cancel everything but other safety commands (a takeoff queued before a land
+    must not run after it), and
+    every command's enqueue -> send -> ack times are kept in `records`.
+    on_done(record) runs on the executor thread once the command is acked,
+    failed or dropped; state that depends on the drone actually executing it
+    (e.g. whether it is flying) belongs there, not at submit time.
+    """
+
+    def __init__(self, maxsize=8, history=200):
+        self.maxsize = maxsize
+        self.records = collections.deque(maxlen=history)
+        self.dropped = 0
+        self.recorder = None  # FlightRecorder: log every executed command
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, name, fn, *args, kind=ACTION, on_done=None):
+        record = CommandRecord(name, kind, on_done)
+        with self._cond:
+            if kind == SAFETY:
+                self._drop(lambda r: r.kind != SAFETY)
+                position = sum(1 for r, *_ in self._pending if r.kind == SAFETY)
+                self._pending.insert(position, (record, fn, args))
+            else:
+                if kind == MOVE:
+                    self._drop(lambda r: r.kind == MOVE)
+                self._pending.append((record, fn, args))
+                while len(self._pending) > self.maxsize:
+                    oldest = next((e for e in self._pending if e[0].kind != SAFETY), None)
+                    if oldest is None:
+                        break
+                    self._pending.remove(oldest)
+                    self._mark_dropped(oldest[0])
+            self._cond.notify()
+        return record
+
+    def _drop(self, match):
+        for entry in [e for e in self._pending if match(e[0])]:
+            self._pending.remove(entry)
+            self._mark_dropped(entry[0])
+
+    def _mark_dropped(self, record):
+        record.dropped = True
+        self.dropped += 1
+        self.records.append(record)
+        logging.info(f"Drone command {record.name} dropped for a newer one")
+        record._finish()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._busy = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                if not self._running:
+                    return
+                record, fn, args = self._pending.popleft()
+                self._busy = True
+
+            record.sent = time.monotonic()
+            try:
+                fn(*args)
+            except Exception as e:
+                record.error = e
+                logging.error(f"Drone command {record.name} failed: {e}")
+            record.acked = time.monotonic()
+            self.records.append(record)
+            if self.recorder is not None:
+                self.recorder.command(record.name, *args, t=record.sent, acked=record.acked,
+                                      error=None if record.error is None else str(record.error))
+            observe("command.queue", record.sent - record.enqueued)
+            observe("command.ack", record.acked - record.sent)
+            logging.info(f"Drone command {record.name}: queued {record.queue_ms:.0f} ms, "
+                         f"ack {record.ack_ms:.0f} ms")
+            record._finish()
+
+    def wait_idle(self, timeout=None):
+        # block until every submitted command has been sent and acknowledged
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def stop(self, timeout=None):
+        self.wait_idle(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+
+def check_safety_order():
+    # a takeoff waiting behind a busy worker must not run after a later land
+    executed = []
+    executor = CommandExecutor()
+    release = threading.Event()
+    executor.submit("busy", release.wait)
+    time.sleep(0.05)
+    finished = []
+    takeoff = executor.submit("takeoff", executed.append, "takeoff", kind=ACTION, on_done=finished.append)
+    executor.submit("move", executed.append, "move", kind=MOVE)
+    executor.submit("land", executed.append, "land", kind=SAFETY)
+    release.set()
+    executor.stop(timeout=2.0)
+    if executed != ["land"] or not takeoff.dropped:
+        raise AssertionError(f"safety ordering broken: executed {executed}")
+    if finished != [takeoff] or takeoff.ok:
+        raise AssertionError("on_done not told that the takeoff was dropped")
+    print("CommandExecutor: land cancels the queued takeoff and move, and reports the drop")
+
+
+if __name__ == "__main__":
+    check_safety_order()
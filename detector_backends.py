@@ -0,0 +1,74 @@
+# detector_backends.py
+import numpy as np
+
+from metrics import span
+from model_store import load_model
+
+# backend name -> model_store format; YOLOv5's DetectMultiBackend picks the runtime
+# (PyTorch, torch.jit, ONNX Runtime with CPUExecutionProvider) from the file type
+BACKEND_FORMATS = {"eager": "pt", "torchscript": "torchscript", "onnx": "onnx"}
+
+
+class DetectorBackend:
+    """CPU YOLOv5 inference through PyTorch eager, TorchScript or ONNX Runtime.
+
+    Every backend honors img_size and returns detections as an (N, 6) float
+    array of x1, y1, x2, y2, conf, cls in frame pixels. quantize=True runs a
+    dynamically int8-quantized ONNX model (onnx backend only).
+    """
+
+    def __init__(self, name="eager", weights="best.pt", img_size=640, device="cpu",
+                 quantize=False, conf=0.5, iou=0.45):
+        if name not in BACKEND_FORMATS:
+            raise ValueError(f"Unknown backend {name!r}, choose from {sorted(BACKEND_FORMATS)}")
+        self.name = name + ("-int8" if quantize else "")
+        self.img_size = img_size
+        self.model = load_model(weights, BACKEND_FORMATS[name], img_size, device, conf, iou, quantize=quantize)
+        self.names = self.model.names
+
+    def infer(self, frame):
+        with span("yolo.infer"):
+            results = self.model(frame, size=self.img_size)
+            return results.xyxy[0].cpu().numpy()
+
+    def infer_batch(self, frames):
+        # one forward pass for several frames (eager only: the exported artifacts have batch size 1)
+        if not self.name.startswith("eager"):
+            return [self.infer(frame) for frame in frames]
+        with span("yolo.infer_batch"):
+            results = self.model(list(frames), size=self.img_size)
+            return [pred.cpu().numpy() for pred in results.xyxy]
+
+
+def parse_backend(spec):
+    # "onnx-int8" -> ("onnx", True)
+    if spec.endswith("-int8"):
+        return spec[:-len("-int8")], True
+    return spec, False
+
+
+def box_iou(a, b):
+    # IoU matrix between (N, 4) and (M, 4) xyxy boxes
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def agreement(reference, detections, iou_threshold=0.5):
+    # (matched, total): greedy same-class matches at IoU >= threshold; total counts both sides' boxes
+    matched = 0
+    for cls in np.union1d(reference[:, 5], detections[:, 5]):
+        ref = reference[reference[:, 5] == cls, :4]
+        det = detections[detections[:, 5] == cls, :4]
+        if len(ref) == 0 or len(det) == 0:
+            continue
+        iou = box_iou(ref, det)
+        while iou.size and iou.max() >= iou_threshold:
+            i, j = np.unravel_index(np.argmax(iou), iou.shape)
+            matched += 1
+            iou[i, :] = 0
+            iou[:, j] = 0
+    return matched, max(len(reference), len(detections))
@@ -0,0 +1,379 @@
+# flight_recorder.py
+# Records a flight (camera frames, drone state, detections, commands) with monotonic
+# timestamps, and replays it through the detectors and control logic offline.
+#
+# A recording is a directory:
+#   meta.json          encoding, channel order, frame count, duration
+#   frames_000.bin...  frame payloads (raw pixels or JPEG), new chunk every chunk_bytes
+#   index.bin          one INDEX_DTYPE row per frame; memory-mapped by the reader
+#   events.jsonl       {"t": ..., "type": "state" | "command" | "detection" | ..., ...} per line
+#
+#   python flight_recorder.py info flights/run1
+#   python flight_recorder.py replay flights/run1 --mode gesture            # as fast as possible
+#   python flight_recorder.py replay flights/run1 --mode approach --speed 1 # real time
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+INDEX_DTYPE = np.dtype([("t", "<f8"), ("chunk", "<u4"), ("offset", "<u8"), ("size", "<u4"),
+                        ("height", "<u2"), ("width", "<u2"), ("channels", "<u1"), ("jpeg", "<u1")])
+CHUNK_BYTES = 256 << 20
+
+# Tello methods that are logged as commands by RecordingDrone
+RECORDED_CALLS = ("takeoff", "land", "move_", "rotate_", "send_rc_control", "go_xyz_speed", "flip",
+                  "emergency")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+class FlightRecorder:
+    """Append-only flight recording; every write method is thread safe.
+
+    encoding="jpeg" keeps recordings small, "raw" keeps exact pixels and lets the
+    reader return frames without decoding. order is the channel order of the
+    frames as given (djitellopy delivers RGB); they are stored as is and the
+    order goes to meta.json, so a replay feeds them to the detectors the same way.
+    """
+
+    def __init__(self, path, encoding="jpeg", jpeg_quality=90, chunk_bytes=CHUNK_BYTES, order="rgb"):
+        if encoding not in ("jpeg", "raw"):
+            raise ValueError(f"Unknown frame encoding: {encoding}")
+        if order not in ("rgb", "bgr"):
+            raise ValueError(f"order must be 'rgb' or 'bgr', not {order!r}")
+        if os.path.exists(os.path.join(path, "index.bin")):
+            raise FileExistsError(f"{path} already holds a recording")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.encoding = encoding
+        self.order = order
+        self.jpeg_quality = jpeg_quality
+        self.chunk_bytes = chunk_bytes
+        self.start = time.monotonic()
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._index = open(os.path.join(path, "index.bin"), "wb")
+        self._events = open(os.path.join(path, "events.jsonl"), "w")
+        self._chunk = -1
+        self._chunk_file = None
+        self._chunk_size = 0
+        self._stop = threading.Event()
+        self._threads = []
+        self._open_chunk()
+
+    def _open_chunk(self):
+        if self._chunk_file is not None:
+            self._chunk_file.close()
+        self._chunk += 1
+        self._chunk_file = open(os.path.join(self.path, f"frames_{self._chunk:03d}.bin"), "wb")
+        self._chunk_size = 0
+
+    def frame(self, image, t=None):
+        # store one frame; returns its index, which events can refer to
+        t = time.monotonic() if t is None else t
+        if self.encoding == "jpeg":
+            payload = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])[1]
+        else:
+            payload = np.ascontiguousarray(image)
+        data = payload.tobytes()
+        channels = image.shape[2] if image.ndim == 3 else 1
+        with self._lock:
+            if self._chunk_size and self._chunk_size + len(data) > self.chunk_bytes:
+                self._open_chunk()
+            row = np.array([(t, self._chunk, self._chunk_size, len(data), image.shape[0], image.shape[1],
+                             channels, self.encoding == "jpeg")], dtype=INDEX_DTYPE)
+            self._chunk_file.write(data)
+            self._index.write(row.tobytes())
+            self._chunk_size += len(data)
+            index = self.frames
+            self.frames += 1
+        return index
+
+    def event(self, kind, t=None, **data):
+        record = {"t": time.monotonic() if t is None else t, "type": kind}
+        record.update(data)
+        line = json.dumps(record, default=_json_default)
+        with self._lock:
+            self._events.write(line + "\n")
+
+    def state(self, state, t=None):
+        self.event("state", t, state=state)
+
+    def command(self, name, *args, t=None, **extra):
+        self.event("command", t, name=name, args=list(args), **extra)
+
+    def detection(self, frame, t=None, **data):
+        self.event("detection", t, frame=frame, **data)
+
+    def start_state(self, get_state, hz=10.0):
+        # poll the drone state (e.g. Tello.get_current_state) in the background
+        def loop():
+            while not self._stop.wait(1.0 / hz):
+                try:
+                    self.state(dict(get_state()))
+                except Exception:
+                    pass
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def wrap(self, drone):
+        return RecordingDrone(drone, self)
+
+    def close(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        with self._lock:
+            for f in (self._chunk_file, self._index, self._events):
+                f.close()
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({"version": 1, "encoding": self.encoding, "order": self.order, "frames": self.frames, "chunks": self._chunk + 1,
+                       "duration": time.monotonic() - self.start, "created": time.time()}, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordingDrone:
+    """Wraps a Tello: every call passes through, control commands are also logged with send and ack times."""
+
+    def __init__(self, drone, recorder):
+        self._drone = drone
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attr = getattr(self._drone, name)
+        if not callable(attr) or not name.startswith(RECORDED_CALLS):
+            return attr
+
+        def call(*args, **kwargs):
+            sent = time.monotonic()
+            error = None
+            try:
+                return attr(*args, **kwargs)
+            except Exception as e:
+                error = str(e)
+                raise
+            finally:
+                self._recorder.command(name, *args, t=sent, acked=time.monotonic(), error=error)
+
+        return call
+
+
+class FlightRecording:
+    """Read side of a recording: memory-mapped index and frame chunks, events in memory."""
+
+    def __init__(self, path):
+        self.path = path
+        meta_path = os.path.join(path, "meta.json")
+        self.meta = json.load(open(meta_path)) if os.path.exists(meta_path) else {}
+        index_path = os.path.join(path, "index.bin")
+        if os.path.getsize(index_path):
+            self.index = np.memmap(index_path, dtype=INDEX_DTYPE, mode="r")
+        else:
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+        with open(os.path.join(path, "events.jsonl")) as f:
+            self.events = [json.loads(line) for line in f if line.strip()]
+        self._chunks = {}
+        states = [e for e in self.events if e["type"] == "state"]
+        self._state_times = [e["t"] for e in states]
+        self._states = [e["state"] for e in states]
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def order(self):
+        # channel order of the frames; recordings older than the "order" field all came from djitellopy (RGB)
+        return self.meta.get("order", "rgb")
+
+    @property
+    def times(self):
+        return self.index["t"]
+
+    def _chunk(self, chunk):
+        data = self._chunks.get(chunk)
+        if data is None:
+            data = self._chunks[chunk] = np.memmap(os.path.join(self.path, f"frames_{chunk:03d}.bin"),
+                                                   dtype=np.uint8, mode="r")
+        return data
+
+    def frame(self, i):
+        # raw frames are read-only views into the memory map; JPEG frames are decoded
+        row = self.index[i]
+        data = self._chunk(int(row["chunk"]))[int(row["offset"]):int(row["offset"]) + int(row["size"])]
+        if row["jpeg"]:
+            return cv2.imdecode(np.asarray(data), cv2.IMREAD_UNCHANGED)
+        shape = (int(row["height"]), int(row["width"])) + ((int(row["channels"]),) if row["channels"] > 1 else ())
+        return data.reshape(shape)
+
+    def events_of(self, kind):
+        return [e for e in self.events if e["type"] == kind]
+
+    def state_at(self, t):
+        # latest recorded state at or before t
+        i = bisect.bisect_right(self._state_times, t)
+        return self._states[i - 1] if i else None
+
+    def telemetry(self):
+        # the recorded states as a TelemetryStore, for windowed / per-frame queries
+        from telemetry import TelemetryStore
+
+        store = TelemetryStore(capacity=max(1, len(self._states)))
+        for t, state in zip(self._state_times, self._states):
+            store.append(state, t)
+        return store
+
+
+def replay(recording, decide, speed=None, start=0, stop=None, frames=None):
+    """Feed the recorded frames, in order, through decide(index, frame, t, state).
+
+    frames limits the replay to those frame indices (e.g. the frames the live
+    run made its decisions on); by default every frame in [start, stop) is fed.
+    speed=None (or 0) runs as fast as possible, 1.0 at recorded speed. Decisions
+    depend only on recorded data, so a replay is repeatable; returns the
+    [(frame index, decision), ...] list for every non-None decision.
+    """
+    stop = len(recording) if stop is None else stop
+    indices = range(start, stop) if frames is None else sorted(i for i in frames if start <= i < stop)
+    decisions = []
+    if not len(indices):
+        return decisions
+    t0 = float(recording.times[indices[0]])
+    wall0 = time.perf_counter()
+    for i in indices:
+        t = float(recording.times[i])
+        if speed:
+            time.sleep(max(0.0, wall0 + (t - t0) / speed - time.perf_counter()))
+        decision = decide(i, recording.frame(i), t, recording.state_at(t))
+        if decision is not None:
+            decisions.append((i, decision))
+    return decisions
+
+
+def digest(decisions):
+    # short fingerprint of a decision list: equal digests = identical replays
+    return hashlib.sha1(json.dumps(decisions, default=_json_default).encode()).hexdigest()[:12]
+
+
+def gesture_decider(order="rgb", **recognizer_options):
+    # detect_gesture on every frame plus gesture_show_off's temporal recognizer, on recorded time;
+    # order is the recording's channel order, so frames reach MediaPipe as they did live
+    from gesture_temporal import RELEASE, TemporalGestureRecognizer
+    from gesture_utils import detect_gesture
+
+    recognizer_options.setdefault("repeatable", ("fist", "victory", "index_up"))
+    recognizer = TemporalGestureRecognizer(**recognizer_options)
+
+    def decide(i, frame, t, state):
+        gesture = detect_gesture(frame, rgb=order == "rgb")
+        fires = [f"{e.kind} {e.gesture}" for e in recognizer.update(gesture, t) if e.kind != RELEASE]
+        return {"gesture": gesture, "fires": fires}
+
+    return decide
+
+
+def approach_decider(weights="best.pt", hybrid=True, live=None, **detector_options):
+    # fly_toward_icon's per-step logic: LogoDetector (+ DetectThenTrack when hybrid) -> approach_moves.
+    # live maps frame index -> recorded "decision" event: replay only those frames (replay(frames=...)),
+    # so the tracker sees exactly what the live loop's tracker saw; a step 0 starts a new
+    # fly_toward_icon call and boxes found by retries / re-search bypass the tracker and reset it
+    from box_tracker import DetectThenTrack
+    from Status2_LogoDetection import ICON_CLASS, LogoDetector
+    from visual_servo import approach_moves
+
+    detector = LogoDetector(weights, **detector_options)
+
+    def detect_icon(frame):
+        icon = detector.detect(frame).best.get(ICON_CLASS)
+        return (None, 0.0) if icon is None else (list(icon["box"]), icon["conf"])
+
+    tracker = DetectThenTrack(detect_icon, redetect_every=5) if hybrid else None
+
+    def decide(i, frame, t, state):
+        event = (live or {}).get(i, {})
+        if hybrid and event.get("step") == 0:
+            tracker.reset()
+        if hybrid and event.get("source", "track") == "track":
+            box = tracker.step(frame)
+        else:
+            box = detect_icon(frame)[0]
+            if hybrid:
+                tracker.reset()
+        if box is None:
+            return {"icon": None, "moves": None}
+        moves = approach_moves(box, (frame.shape[1], frame.shape[0]))
+        if hybrid and moves is not None:
+            tracker.moved()  # as fly_toward_icon does after executing the moves
+        return {"icon": [round(float(v), 1) for v in box], "moves": "arrived" if moves is None else moves}
+
+    return decide
+
+
+def compare(recording, decisions, kind, key):
+    # (matching, compared): replayed decision[key] vs. the live "kind" events recorded for the same frames
+    live = {e["frame"]: e.get(key) for e in recording.events_of(kind) if "frame" in e}
+    replayed = {i: json.loads(json.dumps(d.get(key), default=_json_default)) for i, d in decisions}
+    shared = [i for i in live if i in replayed]
+    return sum(live[i] == replayed[i] for i in shared), len(shared)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["info", "replay"])
+    parser.add_argument("path")
+    parser.add_argument("--mode", choices=["gesture", "approach"], default="gesture")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = recorded speed, 0 = as fast as possible")
+    parser.add_argument("--weights", default="best.pt")
+    parser.add_argument("--json", help="write the decisions to this file")
+    args = parser.parse_args()
+
+    recording = FlightRecording(args.path)
+    if args.command == "info":
+        kinds = {}
+        for e in recording.events:
+            kinds[e["type"]] = kinds.get(e["type"], 0) + 1
+        duration = float(recording.times[-1] - recording.times[0]) if len(recording) > 1 else 0.0
+        print(json.dumps({"meta": recording.meta, "frames": len(recording), "seconds": round(duration, 2),
+                          "events": kinds}, indent=2))
+        return
+
+    if args.mode == "gesture":
+        decide, live_kind, key, frames = gesture_decider(recording.order), "gesture", "gesture", None
+    else:
+        live = {e["frame"]: e for e in recording.events_of("decision") if e.get("frame") is not None}
+        decide, live_kind, key = approach_decider(args.weights, live=live), "decision", "moves"
+        frames = sorted(live)  # search / retry frames the live loop did not decide on are skipped
+    start = time.perf_counter()
+    decisions = replay(recording, decide, speed=args.speed, frames=frames)
+    elapsed = time.perf_counter() - start
+    matched, compared = compare(recording, decisions, live_kind, key)
+    fed = len(recording) if frames is None else len(frames)
+    print(f"{fed} frames in {elapsed:.2f} s ({fed / max(elapsed, 1e-9):.1f} fps), "
+          f"{len(decisions)} decisions, digest {digest(decisions)}")
+    if compared:
+        print(f"matches the live flight on {matched}/{compared} recorded decisions")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(decisions, f, default=_json_default)
+
+
+if __name__ == "__main__":
+    main()
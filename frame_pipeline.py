@@ -0,0 +1,185 @@
+# frame_pipeline.py
+import collections
+import logging
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from gesture_utils import detect_gesture
+from metrics import observe, span
+
+
+class FramePacket:
+    def __init__(self, seq, image):
+        self.seq = seq
+        self.capture_time = time.monotonic()
+        self.image = image
+        self.gesture = None
+        self.inferred_time = None
+        self.record_index = None
+        self.state = None  # drone state nearest capture_time, when the pipeline has telemetry
+        self.prepared = None  # shared resized / RGB views while it is classified, with a FramePreprocessor
+
+
+class LatestSlot:
+    """Single-slot buffer: put() overwrites, so a slow reader skips stale frames instead of queueing them."""
+
+    def __init__(self):
+        self._item = None
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            self._item = item
+            self._cond.notify_all()
+
+    def get(self, after_seq=-1, timeout=None):
+        # newest item with seq > after_seq, or None on timeout
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._item is not None and self._item.seq > after_seq, timeout):
+                return None
+            return self._item
+
+    def peek(self):
+        return self._item
+
+
+class GesturePipeline:
+    """Capture -> inference -> render, each stage on its own thread.
+
+    Capture and inference run as daemon threads; rendering (imshow/waitKey) runs in
+    the thread that calls run(). Stages talk through LatestSlot buffers, so the
+    gesture loop runs at inference speed and the display at camera speed.
+    on_gesture(gesture, packet) is called from the inference thread for every
+    classified frame; returning False stops the pipeline. With a FlightRecorder,
+    every captured frame and every gesture is recorded for offline replay. With a
+    TelemetryStore, packet.state is the drone state nearest the frame's capture time.
+    With a FramePreprocessor, the inference thread preprocesses each frame it picks
+    up (holding its buffers until on_gesture returns) and classify gets the
+    PreparedFrame instead of the raw image; frames it skips are never converted.
+    """
+
+    def __init__(self, read_frame, on_gesture, classify=detect_gesture,
+                 window="Gesture Control", should_stop=None, report_every=5.0, recorder=None, telemetry=None,
+                 preprocess=None):
+        self.read_frame = read_frame
+        self.on_gesture = on_gesture
+        self.classify = classify
+        self.window = window
+        self.should_stop = should_stop or (lambda: False)
+        self.report_every = report_every
+        self.recorder = recorder
+        self.telemetry = telemetry
+        self.preprocess = preprocess
+        self.captured = LatestSlot()
+        self.inferred = LatestSlot()
+        self.stop_event = threading.Event()
+        self.infer_latency = collections.deque(maxlen=300)
+        self.display_latency = collections.deque(maxlen=300)
+        self.counts = {"captured": 0, "inferred": 0, "displayed": 0}
+        self.skipped = 0  # frames inference never saw because a newer one arrived
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _running(self):
+        return not self.stop_event.is_set() and not self.should_stop()
+
+    def _capture(self):
+        seq = 0
+        last = None
+        while self._running():
+            with span("frame.capture"):
+                frame = self.read_frame()
+            if frame is None or frame is last:
+                time.sleep(0.005)  # the reader has not decoded a new frame yet
+                continue
+            last = frame
+            seq += 1
+            packet = FramePacket(seq, frame)
+            if self.recorder is not None:
+                packet.record_index = self.recorder.frame(frame, packet.capture_time)
+            self.captured.put(packet)
+            self.counts["captured"] += 1
+
+    def _infer(self):
+        seq = 0
+        while self._running():
+            packet = self.captured.get(seq, timeout=0.1)
+            if packet is None:
+                continue
+            self.skipped += packet.seq - seq - 1
+            seq = packet.seq
+            try:
+                if self.telemetry is not None:
+                    packet.state = self.telemetry.nearest(packet.capture_time, max_age=0.5)
+                if self.preprocess is not None:
+                    packet.prepared = self.preprocess(packet.image, hold=True)
+                packet.gesture = self.classify(packet.prepared or packet.image)
+                packet.inferred_time = time.monotonic()
+                self.infer_latency.append(packet.inferred_time - packet.capture_time)
+                observe("gesture.capture_to_result", packet.inferred_time - packet.capture_time)
+                self.counts["inferred"] += 1
+                self.inferred.put(packet)
+                if self.recorder is not None:
+                    self.recorder.event("gesture", packet.inferred_time, frame=packet.record_index,
+                                        gesture=packet.gesture)
+                if self.on_gesture(packet.gesture, packet) is False:
+                    self.stop()
+            except Exception as e:
+                print(f"[Gesture Loop Error] {e}")
+                logging.error(f"Error inside gesture control loop: {e}")
+            finally:
+                if packet.prepared is not None:
+                    packet.prepared.release()
+
+    def _render(self):
+        seq = 0
+        last_report = time.monotonic()
+        while self._running():
+            packet = self.captured.get(seq, timeout=0.1)
+            if packet is not None:
+                seq = packet.seq
+                result = self.inferred.peek()
+                gesture = result.gesture if result is not None else "..."
+                image = packet.image.copy()  # inference may still be reading the original
+                cv2.putText(image, f"Gesture: {gesture}", (30, 50),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
+                state = self.telemetry.latest() if self.telemetry is not None else None
+                if state is not None:
+                    cv2.putText(image, f"h {state['h']:.0f} cm  bat {state['bat']:.0f}%", (30, 90),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 0), 2)
+                cv2.imshow(self.window, image)
+                self.display_latency.append(time.monotonic() - packet.capture_time)
+                self.counts["displayed"] += 1
+            if cv2.waitKey(1) & 0xFF in (ord('q'), 27):
+                print("Key 'q' or ESC pressed. Exiting gesture mode.")
+                self.stop()
+            if time.monotonic() - last_report > self.report_every:
+                self._report(time.monotonic() - last_report)
+                last_report = time.monotonic()
+
+    def _report(self, elapsed):
+        def ms(values):
+            return np.percentile(np.array(values) * 1000, 50) if values else float('nan')
+        rates = {k: v / elapsed for k, v in self.counts.items()}
+        logging.info(f"Gesture pipeline: capture {rates['captured']:.1f} fps, inference {rates['inferred']:.1f} fps, "
+                     f"display {rates['displayed']:.1f} fps, capture->gesture p50 {ms(self.infer_latency):.0f} ms, "
+                     f"capture->display p50 {ms(self.display_latency):.0f} ms, "
+                     f"stale frames skipped {self.skipped} total")
+        self.counts = dict.fromkeys(self.counts, 0)
+
+    def run(self):
+        workers = [threading.Thread(target=self._capture, daemon=True),
+                   threading.Thread(target=self._infer, daemon=True)]
+        for w in workers:
+            w.start()
+        try:
+            self._render()
+        finally:
+            self.stop()
+            for w in workers:
+                w.join(timeout=1.0)
+            cv2.destroyWindow(self.window)
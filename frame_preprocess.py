@@ -0,0 +1,231 @@
+# frame_preprocess.py
+import math
+import threading
+
+import cv2
+import numpy as np
+
+from metrics import span
+
+PAD_VALUE = 114  # YOLOv5's letterbox gray
+
+
+def _read_only(array):
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class PreparedFrame:
+    """The views of one captured frame that the detectors consume; read-only, shared.
+
+    image: resized to the preprocessor's size, in the source's channel order
+    rgb: image in RGB (the same array when the source is already RGB)
+    letterbox: rgb scaled to img_size on its long side and padded to a stride
+    multiple, the shape YOLOv5's AutoShape would letterbox to itself (None when
+    the preprocessor has no img_size)
+    """
+
+    def __init__(self, seq, source, image, rgb, letterbox, scale, pad, owner=None, slot=None):
+        self.seq = seq
+        self.source = source
+        self.image = image
+        self.rgb = rgb
+        self.letterbox = letterbox
+        self.scale = scale
+        self.pad = pad  # (left, top) in letterbox pixels
+        self._owner = owner
+        self._slot = slot
+        self._held = 0
+
+    def release(self):
+        # undo one hold=True: the slot may be refilled once nothing holds it
+        if self._held:
+            self._held -= 1
+            self._owner._release(self._slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def to_image_boxes(self, boxes):
+        # xyxy boxes in letterbox pixels -> image pixels, in place
+        left, top = self.pad
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - left) / self.scale
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - top) / self.scale
+        return boxes
+
+
+class _Slot:
+    # one set of preallocated buffers and the read-only views handed out over them
+    def __init__(self, source_shape, size, rgb_source, img_size, stride):
+        h, w = source_shape[:2]
+        out_w, out_h = size or (w, h)
+        self.key = (source_shape, size)
+        self.users = 0  # holders of the PreparedFrame over these buffers; never refilled while > 0
+        self.image_buf = np.empty((out_h, out_w, 3), np.uint8) if (out_w, out_h) != (w, h) else None
+        self.image = _read_only(self.image_buf) if self.image_buf is not None else None
+        self.rgb_buf = None if rgb_source else np.empty((out_h, out_w, 3), np.uint8)
+        self.rgb = None if self.rgb_buf is None else _read_only(self.rgb_buf)
+
+        self.letterbox = self.letterbox_buf = self.inner = self.scaled_buf = None
+        self.scale, self.pad = 1.0, (0, 0)
+        if img_size:
+            self.scale = img_size / max(out_w, out_h)
+            new_w, new_h = int(round(out_w * self.scale)), int(round(out_h * self.scale))
+            box_w, box_h = math.ceil(new_w / stride) * stride, math.ceil(new_h / stride) * stride
+            self.pad = ((box_w - new_w) // 2, (box_h - new_h) // 2)
+            self.new_size = (new_w, new_h)
+            if (new_w, new_h, box_w, box_h) != (out_w, out_h, out_w, out_h):
+                # padding is written once here; every frame only refills the inner region
+                self.letterbox_buf = np.full((box_h, box_w, 3), PAD_VALUE, np.uint8)
+                left, top = self.pad
+                self.inner = self.letterbox_buf[top:top + new_h, left:left + new_w]
+                if self.scale != 1.0 and not self.inner.flags.c_contiguous:
+                    self.scaled_buf = np.empty((new_h, new_w, 3), np.uint8)
+                self.letterbox = _read_only(self.letterbox_buf)
+
+
+class FramePreprocessor:
+    """One preprocessing pass per captured frame, into preallocated, reused buffers.
+
+    Call it with each frame from the camera: the resized, RGB and letterboxed
+    views (PreparedFrame) are computed once and shared read-only by every
+    consumer (gesture recognition, LogoDetector, LogoHunting's YOLO calls), in
+    place of each of them resizing / converting / letterboxing its own copy.
+    Calling it again with the same source frame returns the same PreparedFrame.
+
+    Buffers are a ring of `slots` sets, so a PreparedFrame stays valid while
+    fewer than `slots` newer frames have been processed, or until it is
+    released when it was taken with hold=True: held slots are skipped, and a
+    call finding every slot held raises instead of overwriting one. Consumers on
+    another thread than the producer must hold. order is the channel
+    order of the source frames: djitellopy's BackgroundFrameRead decodes to RGB.
+    size=None keeps the source size; img_size=None skips the letterbox.
+    """
+
+    def __init__(self, size=(640, 480), order="rgb", img_size=640, stride=32, slots=4):
+        if order not in ("rgb", "bgr"):
+            raise ValueError(f"order must be 'rgb' or 'bgr', not {order!r}")
+        self.size = tuple(size) if size else None
+        self.order = order
+        self.img_size = img_size
+        self.stride = stride
+        self.slots = [None] * slots
+        self.next_slot = 0
+        self.seq = 0
+        self.allocations = 0  # buffer sets allocated (once per slot, again only if the source shape changes)
+        self.recent = [None] * slots
+        self._lock = threading.Lock()
+
+    def __call__(self, frame, hold=False):
+        with self._lock:
+            last = self.recent[(self.next_slot - 1) % len(self.slots)]
+            if last is not None and last.source is frame:
+                if hold:
+                    self._hold(last)
+                return last
+            index = self._free_slot()
+            self.next_slot = (index + 1) % len(self.slots)
+            self.seq += 1
+            seq = self.seq
+            slot = self.slots[index]
+            if slot is None or slot.key != (frame.shape, self.size):
+                slot = self.slots[index] = _Slot(frame.shape, self.size, self.order == "rgb",
+                                                 self.img_size, self.stride)
+                self.allocations += 1
+            slot.users += 1  # while filling, so no other caller picks it
+        try:
+            prepared = self._fill(slot, frame, seq)
+        finally:
+            with self._lock:
+                slot.users -= 1
+        prepared._owner, prepared._slot = self, slot
+        with self._lock:
+            self.recent[index] = prepared
+            if hold:
+                self._hold(prepared)
+        return prepared
+
+    process = __call__
+
+    def _free_slot(self):
+        # the next slot in ring order that nobody holds (called under _lock)
+        for step in range(len(self.slots)):
+            index = (self.next_slot + step) % len(self.slots)
+            slot = self.slots[index]
+            if slot is None or slot.users == 0:
+                return index
+        raise RuntimeError(f"All {len(self.slots)} preprocessing slots are held; release() PreparedFrames")
+
+    def _hold(self, prepared):
+        # called under _lock
+        prepared._slot.users += 1
+        prepared._held += 1
+
+    def _release(self, slot):
+        with self._lock:
+            slot.users -= 1
+
+    def _fill(self, slot, frame, seq):
+        if slot.users != 1:
+            raise RuntimeError("Preprocessing slot reused while a PreparedFrame still holds it")
+        with span("frame.preprocess"):
+            if slot.image_buf is not None:
+                cv2.resize(frame, (slot.image_buf.shape[1], slot.image_buf.shape[0]), dst=slot.image_buf)
+                image = slot.image
+            else:
+                image = _read_only(frame)  # already the wanted size: no copy
+            if slot.rgb_buf is not None:
+                cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=slot.rgb_buf)
+                rgb = slot.rgb
+            else:
+                rgb = image
+
+            letterbox = None
+            if self.img_size:
+                if slot.letterbox_buf is None:
+                    letterbox = rgb  # scale 1 and already stride-aligned
+                else:
+                    if slot.scale == 1.0:
+                        np.copyto(slot.inner, rgb)
+                    elif slot.scaled_buf is not None:
+                        cv2.resize(rgb, slot.new_size, dst=slot.scaled_buf)
+                        np.copyto(slot.inner, slot.scaled_buf)
+                    else:
+                        cv2.resize(rgb, slot.new_size, dst=slot.inner)
+                    letterbox = slot.letterbox
+        return PreparedFrame(seq, frame, image, rgb, letterbox, slot.scale, slot.pad)
+
+    def find(self, image):
+        # the PreparedFrame whose image (or rgb) view is `image`, if it is still in the ring
+        with self._lock:
+            for prepared in self.recent:
+                if prepared is not None and (prepared.image is image or prepared.rgb is image):
+                    return prepared
+        return None
+
+
+def check_slot_pinning():
+    # a held PreparedFrame's views keep their pixels while more frames than there are slots go through
+    preprocess = FramePreprocessor(size=(2, 2), img_size=None, order="rgb", slots=2)
+    frames = [np.full((4, 4, 3), i, np.uint8) for i in range(6)]
+    with preprocess(frames[0], hold=True) as held:
+        for frame in frames[1:]:
+            preprocess(frame)
+        assert (held.rgb == 0).all(), "held slot was refilled"
+        try:
+            with preprocess(frames[1], hold=True):
+                preprocess(frames[2])
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("reused a held slot instead of raising")
+    preprocess(frames[3])  # released: the ring is free again
+    print("frame_preprocess: held slots are never refilled")
+
+
+if __name__ == "__main__":
+    check_slot_pinning()
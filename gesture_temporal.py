@@ -0,0 +1,91 @@
+# gesture_temporal.py
+import collections
+import time
+
+from metrics import observe
+
+COMMIT = "commit"
+REPEAT = "repeat"
+RELEASE = "release"
+
+NO_GESTURE = ("no_hand", "unknown")
+
+
+class GestureEvent:
+    def __init__(self, kind, gesture, t, latency=None, hand=0):
+        self.kind = kind
+        self.gesture = gesture
+        self.t = t
+        self.latency = latency  # commit: seconds from the first frame showing the gesture
+        self.hand = hand
+
+    def __repr__(self):
+        return f"GestureEvent({self.kind}, {self.gesture}, t={self.t:.3f})"
+
+
+class _HandState:
+    def __init__(self, window):
+        self.votes = collections.deque(maxlen=window)  # (label, t); label None below min_confidence
+        self.held = None
+        self.next_repeat = None
+
+
+class TemporalGestureRecognizer:
+    """Turns per-frame classifications into gesture events, per hand.
+
+    A gesture commits once `commit_frames` of the last `window` classifications
+    agree on it (each with confidence >= min_confidence), so one misclassified
+    frame neither triggers nor blocks it. While it stays held, gestures in
+    `repeatable` repeat every `repeat_every` s after `repeat_after` s. It is
+    released after `release_frames` frames without it; then the same gesture can
+    commit again. Commit latency (first frame -> commit) goes to the
+    "gesture.commit_latency" metric.
+    """
+
+    def __init__(self, window=5, commit_frames=4, min_confidence=0.5, release_frames=3,
+                 repeatable=(), repeat_after=0.8, repeat_every=0.5, ignore=NO_GESTURE):
+        self.window = window
+        self.commit_frames = commit_frames
+        self.min_confidence = min_confidence
+        self.release_frames = release_frames
+        self.repeatable = set(repeatable)
+        self.repeat_after = repeat_after
+        self.repeat_every = repeat_every
+        self.ignore = set(ignore)
+        self.hands = {}
+        self.latencies = collections.deque(maxlen=200)
+
+    def reset(self):
+        self.hands = {}
+
+    def update(self, gesture, t=None, confidence=1.0, hand=0):
+        # feed one classification; returns the (possibly empty) list of events it causes
+        t = time.monotonic() if t is None else t
+        state = self.hands.get(hand)
+        if state is None:
+            state = self.hands[hand] = _HandState(self.window)
+        label = gesture if confidence >= self.min_confidence else None
+        state.votes.append((label, t))
+        labels = [v for v, _ in state.votes]
+
+        events = []
+        if state.held is not None:
+            recent = labels[-self.release_frames:]
+            if len(recent) == self.release_frames and state.held not in recent:
+                events.append(GestureEvent(RELEASE, state.held, t, hand=hand))
+                state.held = None
+            elif state.held in self.repeatable and t >= state.next_repeat and label == state.held:
+                events.append(GestureEvent(REPEAT, state.held, t, hand=hand))
+                state.next_repeat = t + self.repeat_every
+
+        if label is not None and label not in self.ignore and label != state.held:
+            if labels.count(label) >= self.commit_frames:
+                if state.held is not None:
+                    events.append(GestureEvent(RELEASE, state.held, t, hand=hand))
+                latency = t - next(vt for v, vt in state.votes if v == label)
+                events.append(GestureEvent(COMMIT, label, t, latency, hand))
+                state.held = label
+                state.next_repeat = t + self.repeat_after
+                self.latencies.append(latency)
+                observe("gesture.commit_latency", latency)
+        return events
@@ -1,78 +1,153 @@
 # gesture_utils.py
+import threading
+
 import cv2
-import mediapipe as mp
-import math
-mp_hands = mp.solutions.hands
-hands_detector = mp_hands.Hands(max_num_hands=1)
-mp_draw = mp.solutions.drawing_utils
+import numpy as np
+
+from frame_preprocess import PreparedFrame
+from metrics import span
+
+# MediaPipe takes about a second to import and its Hands graph more to build, so both
+# happen on first use; mp_hands, mp_draw and hands_detector are still importable
+# from here through __getattr__ below.
+_hands_detector = None
+_hands_lock = threading.Lock()
+
+GESTURE_LABELS = np.array(["fist", "thumb_up", "index_up", "victory", "open_palm", "unknown"])
+
+FINGERTIP_IDS = [4, 8, 12, 16, 20]
+FINGER_TIP_IDS = np.array([8, 12, 16, 20])   # index, middle, ring, pinky
+FINGER_PIP_IDS = np.array([6, 10, 14, 18])
+FIST_THRESHOLD = 0.2
 
-def detect_gesture(frame):
-    image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands_detector.process(image_rgb)
+# all 10 fingertip pairs, used for the average tip distance of the fist check
+_pair_i, _pair_j = np.triu_indices(len(FINGERTIP_IDS), k=1)
+_TIP_PAIR_A = np.array(FINGERTIP_IDS)[_pair_i]
+_TIP_PAIR_B = np.array(FINGERTIP_IDS)[_pair_j]
+FINGERTIP_PAIRS = len(_TIP_PAIR_A)
+_TIP_PAIRS = np.stack([_TIP_PAIR_A, _TIP_PAIR_B])
+
+# finger code: each tip (thumb, then FINGER_TIP_IDS) against the joint below it, one bit per finger
+_CODE_IDS = np.concatenate([[4], FINGER_TIP_IDS, [3], FINGER_PIP_IDS])
+_CODE_WEIGHTS = np.array([16, 1, 2, 4, 8])
+
+
+def _code_label(code):
+    # the rules after the fist check, in the same priority order as the per-frame checks
+    thumb_up, fingers = code & 16, code & 15
+    if thumb_up and not fingers:
+        return "thumb_up"
+    return {1: "index_up", 3: "victory", 15: "open_palm"}.get(fingers, "unknown")
+
+
+_CODE_LABELS = [_code_label(code) for code in range(32)]
+_CODE_CHOICE = np.array([GESTURE_LABELS.tolist().index(label) for label in _CODE_LABELS])
+
+
+def get_hands_detector():
+    # the shared MediaPipe Hands instance, created on first call
+    global _hands_detector
+    with _hands_lock:
+        if _hands_detector is None:
+            import mediapipe as mp
+            _hands_detector = mp.solutions.hands.Hands(max_num_hands=1)
+        return _hands_detector
+
+
+def __getattr__(name):
+    if name == "hands_detector":
+        return get_hands_detector()
+    if name in ("mp_hands", "mp_draw"):
+        import mediapipe as mp
+        return mp.solutions.hands if name == "mp_hands" else mp.solutions.drawing_utils
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def landmarks_to_array(landmarks):
+    # MediaPipe landmark list -> (21, 3) float array of x, y, z
+    return np.array([(p.x, p.y, p.z) for p in landmarks], dtype=np.float64)
+
+
+def _hand_features(points):
+    # one hand (21, 2+) or a batch (N, 21, 2+) of float landmarks -> (fist mask, finger code);
+    # classify_landmarks and classify_landmarks_batch both go through here
+    # ===== 0. Fist: fingertips bunched together =====
+    pairs = points[..., _TIP_PAIRS, :2]
+    diff = pairs[..., 0, :, :] - pairs[..., 1, :, :]
+    fist = np.sqrt((diff * diff).sum(axis=-1)).sum(axis=-1) / FINGERTIP_PAIRS < FIST_THRESHOLD
+    # bit k set when tip k is above its lower joint: thumb (16), index (1), middle (2), ring (4), pinky (8)
+    y = points[..., _CODE_IDS, 1]
+    code = (y[..., :5] < y[..., 5:]) @ _CODE_WEIGHTS
+    return fist, code
+
+
+def classify_landmarks_batch(points):
+    """Classify many hands at once.
+
+    points: array of shape (N, 21, 2+) with normalized x, y (z is ignored).
+    Returns an array of N gesture labels.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim == 2:
+        points = points[None]
+    fist, code = _hand_features(points)
+    return GESTURE_LABELS[np.where(fist, 0, _CODE_CHOICE[code])]
+
+
+def classify_landmarks(points):
+    # one hand, (21, 2+) array: the same vectorized features and table as the batch, for N = 1
+    fist, code = _hand_features(np.asarray(points, dtype=np.float64))
+    return "fist" if fist else _CODE_LABELS[code]
+
+
+_gesture_process = None  # DetectorProcess when hand tracking runs out of process
+
+
+def use_gesture_process(enabled=True):
+    """Run detect_gesture's MediaPipe work in a worker process (True) or in this process (False)."""
+    global _gesture_process
+    if enabled and _gesture_process is None:
+        from process_detectors import DetectorProcess
+        _gesture_process = DetectorProcess("gesture")
+    elif not enabled and _gesture_process is not None:
+        _gesture_process.close()
+        _gesture_process = None
+
+
+_adaptive_tracker = None  # AdaptiveHandTracker when adaptive rate control is on
+
+
+def use_adaptive_tracking(enabled=True, **options):
+    """Route detect_gesture through hand_tracking.AdaptiveHandTracker (frame skipping, CPU budget, roi=True for crops)."""
+    global _adaptive_tracker
+    if enabled:
+        from hand_tracking import AdaptiveHandTracker
+        _adaptive_tracker = AdaptiveHandTracker(**options)
+    else:
+        _adaptive_tracker = None
+
+
+def detect_gesture(frame, rgb=False):
+    # frame: a BGR image (RGB when rgb=True), or a frame_preprocess.PreparedFrame whose
+    # shared RGB view is used as is, on every path
+    if isinstance(frame, PreparedFrame):
+        frame, rgb = frame.rgb, True
+    if _adaptive_tracker is not None:
+        return _adaptive_tracker(frame, rgb=rgb)
+    if _gesture_process is not None:
+        with span("gesture.process"):
+            return _gesture_process(frame, rgb=rgb)
+    if rgb:
+        image_rgb = frame
+    else:
+        with span("gesture.preprocess"):
+            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    with span("gesture.mediapipe"):
+        results = get_hands_detector().process(image_rgb)
 
     if results.multi_hand_landmarks:
         hand = results.multi_hand_landmarks[0]
-        landmarks = hand.landmark
-
-        # ===== 0. Fist 检测 =====
-        def distance(p1, p2):
-            return math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
-
-        def is_fist(landmarks):
-            tip_ids = [4, 8, 12, 16, 20]
-            tips = [landmarks[i] for i in tip_ids]
-            total_dist = 0
-            count = 0
-            for i in range(len(tips)):
-                for j in range(i+1, len(tips)):
-                    total_dist += distance(tips[i], tips[j])
-                    count += 1
-            avg_dist = total_dist / count
-            return avg_dist < 0.2
-
-        if is_fist(landmarks):
-            return "fist"
-
-        # ===== Thumb Up 👍 =====
-        thumb_tip_y = landmarks[4].y
-        thumb_ip_y = landmarks[3].y
-        thumb_up = thumb_tip_y < thumb_ip_y
-
-        other_folded = True
-        for tip_id, pip_id in zip([8, 12, 16, 20], [6, 10, 14, 18]):
-            if landmarks[tip_id].y < landmarks[pip_id].y:
-                other_folded = False
-                break
-
-        if thumb_up and other_folded:
-            return "thumb_up"
-
-        # ===== 1. Index Up ☝️ =====
-        index_tip_y = landmarks[8].y
-        index_pip_y = landmarks[6].y
-        index_straight = index_tip_y < index_pip_y
-
-        other_folded = True
-        for tip_id, pip_id in zip([12, 16, 20], [10, 14, 18]):
-            if landmarks[tip_id].y < landmarks[pip_id].y:
-                other_folded = False
-                break
-
-        if index_straight and other_folded:
-            return "index_up"
-
-        # ===== 2. Victory ✌️ =====
-        fingers = []
-        for tip_id, pip_id in zip([8, 12, 16, 20], [6, 10, 14, 18]):
-            fingers.append(landmarks[tip_id].y < landmarks[pip_id].y)
-
-        if fingers[0] and fingers[1] and not any(fingers[2:]):
-            return "victory"
-
-        # ===== 3. Open Palm 🖐️ =====
-        if all(fingers):
-            return "open_palm"
-
-        return "unknown"
-
-    return "no_hand"
\ No newline at end of file
+        with span("gesture.classify"):
+            return classify_landmarks(landmarks_to_array(hand.landmark))
+
+    return "no_hand"
@@ -0,0 +1,178 @@
+# hand_tracking.py
+import time
+
+import cv2
+import numpy as np
+
+from gesture_utils import classify_landmarks, landmarks_to_array, mp_hands
+from metrics import observe
+
+THUMBNAIL_SIZE = (160, 120)
+
+
+class AdaptiveHandTracker:
+    """detect_gesture with a per-frame CPU budget.
+
+    - With roi=True, runs MediaPipe on a crop around the last hand box instead of
+      the whole frame, with a full-frame pass every `reacquire_every` processed
+      frames and whenever the hand is lost in the crop. The crop window stays put while the hand is
+      well inside it, so a tracking-mode graph can carry its hand ROI from frame to
+      frame and skip palm detection; the graph is reset whenever the region it
+      sees changes (a new window, or full frame <-> crop). A static-image graph
+      would rerun palm detection on every crop, which costs more than the
+      full-frame tracking pass it replaces. Off by default: on footage with a hand
+      in view the full-frame tracking graph already follows the hand, and the
+      crops measured slower and lost the hand more often (bench_hand_tracking.py).
+    - Skips inference (repeating the last gesture) while consecutive frames are
+      nearly identical, for at most `max_static_skip` frames in a row.
+    - Keeps a moving average of the inference time; over budget it first drops to
+      the lite model (complexity 0), then processes only every `stride`-th frame.
+      Well under budget it steps back up. Passes that had to load a model are left
+      out of the average.
+    """
+
+    def __init__(self, budget_ms=15.0, roi=False, reacquire_every=15, roi_margin=0.6, min_roi=160,
+                 static_fraction=0.01, max_static_skip=5, max_stride=4, complexity=1):
+        self.budget_ms = budget_ms
+        self.roi = roi
+        self.reacquire_every = reacquire_every
+        self.roi_margin = roi_margin
+        self.min_roi = min_roi
+        self.static_fraction = static_fraction
+        self.max_static_skip = max_static_skip
+        self.max_stride = max_stride
+        self.max_complexity = complexity
+        self.complexity = complexity
+        self.stride = 1
+        self.detectors = {}
+        self.stats = dict.fromkeys(("frames", "full", "roi", "static_skips", "rate_skips"), 0)
+        self.reset()
+
+    def reset(self):
+        self.box = None           # last hand box in pixels (x1, y1, x2, y2)
+        self.gesture = "no_hand"
+        self.thumbnail = None
+        self.static_skips = 0
+        self.since_full = 0
+        self.avg_ms = None
+        self.window = None        # current crop window (x1, y1, x2, y2)
+        self.last_region = None   # region of the previous MediaPipe pass
+        self.warming_up = False  # this pass created a graph, so its time includes the model load
+
+    def _detector(self, region):
+        # tracking mode carries its own hand ROI from call to call, which is only valid
+        # while it keeps seeing the same region
+        detector = self.detectors.get(self.complexity)
+        if detector is None:
+            detector = self.detectors[self.complexity] = mp_hands.Hands(max_num_hands=1,
+                                                                        model_complexity=self.complexity)
+            self.warming_up = True
+        elif region != self.last_region:
+            detector.reset()
+        self.last_region = region
+        return detector
+
+    def _is_static(self, frame, rgb=False):
+        # changed-pixel fraction of a small grayscale copy, measured inside the hand box
+        # when there is one, so finger movement counts even though the hand is small
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY)
+        thumbnail = cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        static = False
+        if self.thumbnail is not None:
+            diff = cv2.absdiff(thumbnail, self.thumbnail)
+            if self.box is not None:
+                sx, sy = THUMBNAIL_SIZE[0] / frame.shape[1], THUMBNAIL_SIZE[1] / frame.shape[0]
+                x1, y1, x2, y2 = self.box
+                diff = diff[int(y1 * sy):int(y2 * sy) + 1, int(x1 * sx):int(x2 * sx) + 1]
+            static = diff.size > 0 and np.count_nonzero(diff > 15) < self.static_fraction * diff.size
+        if not static:
+            self.thumbnail = thumbnail
+        return static
+
+    def _roi(self, shape):
+        # the current window while the hand box keeps half a margin from its edges, else a new one
+        h, w = shape[:2]
+        x1, y1, x2, y2 = self.box
+        if self.window is not None:
+            wx1, wy1, wx2, wy2 = self.window
+            keep = max(x2 - x1, y2 - y1) * self.roi_margin / 2
+            if (x1 - wx1 >= keep or wx1 == 0) and (y1 - wy1 >= keep or wy1 == 0) and \
+                    (wx2 - x2 >= keep or wx2 == w) and (wy2 - y2 >= keep or wy2 == h):
+                return self.window
+        size = max(x2 - x1, y2 - y1) * (1 + 2 * self.roi_margin)
+        size = max(size, self.min_roi)
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        rx1, ry1 = int(max(0, cx - size / 2)), int(max(0, cy - size / 2))
+        rx2, ry2 = int(min(w, cx + size / 2)), int(min(h, cy + size / 2))
+        self.window = (rx1, ry1, rx2, ry2)
+        return self.window
+
+    def _run(self, frame, region, rgb=False):
+        # MediaPipe on frame[region]; hand landmarks normalized to the full frame, or None
+        h, w = frame.shape[:2]
+        x1, y1, x2, y2 = region
+        crop = frame[y1:y2, x1:x2]
+        if not rgb:
+            crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        results = self._detector(region).process(np.ascontiguousarray(crop))
+        if not results.multi_hand_landmarks:
+            return None
+        points = landmarks_to_array(results.multi_hand_landmarks[0].landmark)
+        points[:, 0] = (points[:, 0] * (x2 - x1) + x1) / w
+        points[:, 1] = (points[:, 1] * (y2 - y1) + y1) / h
+        return points
+
+    def _adapt(self, elapsed_ms):
+        self.avg_ms = elapsed_ms if self.avg_ms is None else 0.8 * self.avg_ms + 0.2 * elapsed_ms
+        if self.avg_ms > self.budget_ms:
+            if self.complexity > 0:
+                self.complexity -= 1
+            elif self.stride < self.max_stride:
+                self.stride += 1
+            self.avg_ms = None  # measure the new setting from scratch
+        elif self.avg_ms < 0.5 * self.budget_ms:
+            if self.stride > 1:
+                self.stride -= 1
+                self.avg_ms = None
+            elif self.complexity < self.max_complexity:
+                self.complexity += 1
+                self.avg_ms = None
+
+    def __call__(self, frame, rgb=False):
+        # frame: BGR, or RGB (e.g. a PreparedFrame's rgb view) when rgb=True
+        self.stats["frames"] += 1
+        if self._is_static(frame, rgb) and self.static_skips < self.max_static_skip:
+            self.static_skips += 1
+            self.stats["static_skips"] += 1
+            return self.gesture
+        self.static_skips = 0
+        if self.stride > 1 and self.stats["frames"] % self.stride:
+            self.stats["rate_skips"] += 1
+            return self.gesture
+
+        start = time.perf_counter()
+        self.warming_up = False
+        h, w = frame.shape[:2]
+        points = None
+        if self.roi and self.box is not None and self.since_full < self.reacquire_every:
+            self.since_full += 1
+            self.stats["roi"] += 1
+            points = self._run(frame, self._roi(frame.shape), rgb)
+        if points is None:
+            # no hand yet, reacquisition due, or the hand left the crop
+            self.since_full = 0
+            self.stats["full"] += 1
+            points = self._run(frame, (0, 0, w, h), rgb)
+
+        if points is None:
+            self.box = self.window = None
+            self.gesture = "no_hand"
+        else:
+            xs, ys = points[:, 0] * w, points[:, 1] * h
+            self.box = (xs.min(), ys.min(), xs.max(), ys.max())
+            self.gesture = classify_landmarks(points)
+        elapsed = time.perf_counter() - start
+        observe("gesture.adaptive", elapsed)
+        if not self.warming_up:
+            self._adapt(elapsed * 1000)
+        return self.gesture
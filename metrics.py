@@ -0,0 +1,168 @@
+# metrics.py
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+class Histogram:
+    """Latest `capacity` samples (seconds) in a preallocated ring; percentiles are computed on snapshot.
+
+    add() may be called from several threads at once (the pipeline stages share
+    histograms); its lock covers only the three updates.
+    """
+
+    __slots__ = ("samples", "capacity", "count", "total", "_lock")
+
+    def __init__(self, capacity=2048):
+        self.samples = np.zeros(capacity)
+        self.capacity = capacity
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.samples[self.count % self.capacity] = seconds
+            self.count += 1
+            self.total += seconds
+
+    def summary(self):
+        with self._lock:
+            count, total = self.count, self.total
+            samples = self.samples[:min(count, self.capacity)].copy()
+        if count == 0:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99)) * 1000
+        return {"count": count, "mean_ms": round(total / count * 1000, 3),
+                "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(samples.max()) * 1000, 3)}
+
+
+class Span:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.add(time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Named latency histograms for the hot loops.
+
+    with metrics.span("yolo"): ...       time a block
+    metrics.observe("command.ack", s)    record a duration measured elsewhere
+    Recording costs a couple of microseconds; percentiles are only computed when
+    snapshot() is called, e.g. by the periodic flush to a JSON-lines file or the
+    local HTTP endpoint.
+    """
+
+    def __init__(self, capacity=2048):
+        self.capacity = capacity
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._flush_thread = None
+        self._stop = threading.Event()
+        self._server = None
+
+    def histogram(self, name):
+        hist = self.histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(name, Histogram(self.capacity))
+        return hist
+
+    def observe(self, name, seconds):
+        self.histogram(name).add(seconds)
+
+    def span(self, name):
+        return Span(self.histogram(name))
+
+    def snapshot(self):
+        # copy under the lock: other threads add names through histogram() meanwhile
+        with self._lock:
+            items = sorted(self.histograms.items())
+        return {name: hist.summary() for name, hist in items}
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def flush(self, path):
+        with open(path, "a") as f:
+            f.write(json.dumps({"time": time.time(), "metrics": self.snapshot()}) + "\n")
+
+    def start_flush(self, path="metrics.jsonl", every=10.0):
+        # append a snapshot to `path` every `every` seconds, and once more on stop()
+        if self._flush_thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(every):
+                self.flush(path)
+            self.flush(path)
+
+        self._flush_thread = threading.Thread(target=loop, daemon=True)
+        self._flush_thread.start()
+
+    def serve(self, port=9100, host="127.0.0.1"):
+        # GET http://host:port/ returns the current snapshot as JSON
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(metrics.snapshot(), indent=2).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    def stop(self):
+        self._stop.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join(timeout=2.0)
+            self._flush_thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+_last_emit = {}
+
+
+def throttled(key, interval=1.0):
+    # True at most once per `interval` seconds for each key: rate limit for per-frame prints and logs
+    now = time.monotonic()
+    if now - _last_emit.get(key, -interval) >= interval:
+        _last_emit[key] = now
+        return True
+    return False
+
+
+def log_every(key, message, interval=1.0, level=logging.INFO):
+    if throttled(key, interval):
+        logging.log(level, message)
+
+
+# process-wide registry used by the modules; span/observe are bound shortcuts
+METRICS = Metrics()
+span = METRICS.span
+observe = METRICS.observe
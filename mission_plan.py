@@ -0,0 +1,258 @@
+# mission_plan.py
+import logging
+import time
+
+from metrics import observe
+from visual_servo import DetectionWorker, approach_moves
+
+MIN_MOVE, MAX_MOVE = 20, 500   # Tello SDK limits for move / go distances, cm
+AXES = {"forward": (1, 0, 0), "back": (-1, 0, 0), "left": (0, 1, 0),
+        "right": (0, -1, 0), "up": (0, 0, 1), "down": (0, 0, -1)}
+
+
+# ----- plan steps -----
+def takeoff():
+    return {"op": "takeoff"}
+
+
+def land():
+    return {"op": "land"}
+
+
+def move(direction, cm):
+    return {"op": "move", "direction": direction, "cm": cm}
+
+
+def turn(degrees):
+    # clockwise positive
+    return {"op": "turn", "degrees": degrees}
+
+
+def search():
+    return {"op": "search"}
+
+
+def approach(max_steps=50):
+    return {"op": "approach", "max_steps": max_steps}
+
+
+# the LogoHunting mission cell: find the icon, fly to it, slide along the text, face the audience
+LOGO_HUNT = [takeoff(), search(), approach()] + [move("right", 30)] * 4 + [turn(180)]
+
+
+def merge_motions(steps):
+    """Consecutive moves become one body-frame vector, consecutive turns one turn.
+
+    Moves are not merged across a turn (the body frame changes) or across any
+    other step. Returns new steps; moves come back as {"op": "vector", "xyz": ...}.
+    """
+    merged = []
+    for step in steps:
+        last = merged[-1] if merged else None
+        if step["op"] == "move":
+            delta = [a * step["cm"] for a in AXES[step["direction"]]]
+            if last is not None and last["op"] == "vector":
+                last["xyz"] = [a + b for a, b in zip(last["xyz"], delta)]
+            else:
+                merged.append({"op": "vector", "xyz": delta})
+        elif step["op"] == "turn" and last is not None and last["op"] == "turn":
+            last["degrees"] += step["degrees"]
+        else:
+            merged.append(dict(step))
+    return merged
+
+
+def motion_commands(step, speed=50):
+    # a merged motion -> [(Tello method, args), ...]; one round trip each
+    if step["op"] == "turn":
+        degrees = int(round((step["degrees"] + 180) % 360 - 180))  # shortest way round
+        if degrees == -180:
+            degrees = 180
+        if degrees > 0:
+            return [("rotate_clockwise", (degrees,))]
+        return [("rotate_counter_clockwise", (-degrees,))] if degrees else []
+
+    xyz = [int(round(v)) for v in step["xyz"]]
+    if max(abs(v) for v in xyz) < MIN_MOVE:
+        if any(xyz):
+            logging.info(f"Mission: dropped a {xyz} cm motion below the SDK minimum")
+        return []
+    axes = [i for i, v in enumerate(xyz) if v]
+    chunks = -(-max(abs(v) for v in xyz) // MAX_MOVE)
+    commands = []
+    for i in range(chunks):
+        part = [v * (i + 1) // chunks - v * i // chunks for v in xyz]  # even split, exact total
+        if len(axes) == 1:
+            axis = axes[0]
+            name = ("forward", "left", "up")[axis] if part[axis] > 0 else ("back", "right", "down")[axis]
+            commands.append((f"move_{name}", (abs(part[axis]),)))
+        else:
+            commands.append(("go_xyz_speed", (part[0], part[1], part[2], speed)))
+    return commands
+
+
+class RoundTripCounter:
+    """Counts (and times) the SDK commands a Tello sends, by wrapping its send methods in place."""
+
+    def __init__(self, drone):
+        self.drone = drone
+        self.counts = {"control": 0, "read": 0, "no_reply": 0}
+        self.seconds = 0.0
+        for kind, method in (("control", "send_control_command"), ("read", "send_read_command"),
+                             ("no_reply", "send_command_without_return")):
+            setattr(drone, method, self._wrap(kind, getattr(drone, method)))
+
+    def _wrap(self, kind, send):
+        def counted(*args, **kwargs):
+            self.counts[kind] += 1
+            start = time.perf_counter()
+            try:
+                return send(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+        return counted
+
+    @property
+    def round_trips(self):
+        # commands that wait for a reply; rc / no-reply commands are counted separately
+        return self.counts["control"] + self.counts["read"]
+
+
+class MissionRunner:
+    """Executes a mission plan (see LOGO_HUNT) against a Tello.
+
+    Consecutive motions are merged before sending (merge_motions); each motion
+    waits only for the drone's ack, which Tello sends once the motion is done,
+    plus a state-driven settle when telemetry is given. A DetectionWorker runs
+    for the whole mission, so detection for the next step already runs during
+    the current motion: a result whose frame was captured up to `prefetch_lead`
+    seconds before the ack is accepted instead of waiting for a new one.
+
+    search / approach may be given as callables (e.g. LogoHunting.search_target_yaw
+    and approach_icon_servo); without approach, a pipelined version of
+    fly_toward_icon's stop-and-go steps is used.
+    """
+
+    def __init__(self, drone, read_frame=None, detect=None, search=None, approach=None, telemetry=None,
+                 frame_size=(640, 480), speed=50, prefetch_lead=0.3, settle_timeout=0.5, detection_timeout=2.0):
+        self.drone = drone
+        self.read_frame = read_frame
+        self.detect = detect          # frame -> (box, confidence) or (None, 0)
+        self.search = search          # () -> box or None
+        self.approach = approach      # () -> True once arrived
+        self.telemetry = telemetry
+        self.frame_size = frame_size
+        self.speed = speed
+        self.prefetch_lead = prefetch_lead
+        self.settle_timeout = settle_timeout
+        self.detection_timeout = detection_timeout
+        self.counter = RoundTripCounter(drone)
+        self.worker = None
+        self.motion_end = 0.0
+        self.timings = []
+
+    # ----- motions -----
+    def _send(self, method, args):
+        getattr(self.drone, method)(*args)
+        self.motion_end = time.monotonic()
+
+    def _settle(self):
+        # the ack arrives when the motion is done; with telemetry also wait for the velocities to read zero
+        if self.telemetry is None:
+            return
+        deadline = time.monotonic() + self.settle_timeout
+        while time.monotonic() < deadline:
+            state = self.telemetry.latest()
+            if state is None or (state["t"] > self.motion_end
+                                 and max(abs(state["vgx"]), abs(state["vgy"]), abs(state["vgz"])) <= 1):
+                return
+            time.sleep(0.02)
+
+    def _motions(self, steps):
+        for step in merge_motions(steps):
+            for method, args in motion_commands(step, self.speed):
+                self._send(method, args)
+        self._settle()
+
+    # ----- detection -----
+    def _detection(self):
+        # icon box from a frame captured after the last motion (less prefetch_lead), None if not seen
+        if self.worker is None:
+            return None
+        since = self.motion_end - self.prefetch_lead
+        deadline = time.monotonic() + self.detection_timeout
+        while time.monotonic() < deadline:
+            result, capture_time = self.worker.latest()
+            if result is not None and capture_time >= since:
+                return result[0]
+            time.sleep(0.005)
+        return None
+
+    def _approach_steps(self, max_steps):
+        lost = 0
+        for _ in range(max_steps):
+            box = self._detection()
+            if box is None:
+                lost += 1
+                if lost > 3:
+                    return False
+                continue
+            lost = 0
+            moves = approach_moves(box, self.frame_size)
+            if moves is None:
+                return True
+            steps = []
+            for name, amount in moves:
+                if name.startswith("turn_"):
+                    steps.append(turn(amount if name == "turn_right" else -amount))
+                else:
+                    steps.append(move(name[len("move_"):], amount))
+            self._motions(steps)
+        return False
+
+    # ----- steps -----
+    def _step(self, step):
+        op = step["op"]
+        if op == "takeoff":
+            self._send("takeoff", ())
+            self._settle()
+            return True
+        if op == "land":
+            self._send("land", ())
+            return True
+        if op in ("vector", "turn"):
+            self._motions([step])
+            return True
+        if op == "search":
+            if self._detection() is not None:
+                return True  # already in view when the previous step finished
+            return self.search is not None and self.search() is not None
+        if op == "approach":
+            if self.approach is not None and self.approach():
+                return True
+            return self._approach_steps(step.get("max_steps", 50))
+        raise ValueError(f"unknown mission step: {op}")
+
+    def run(self, plan):
+        # {"ok", "seconds", "round_trips", "steps": [(op, seconds), ...]}
+        start = time.monotonic()
+        if self.detect is not None and self.read_frame is not None:
+            self.worker = DetectionWorker(self.read_frame, self.detect).start()
+        ok = True
+        try:
+            for step in merge_motions(plan):
+                step_start = time.monotonic()
+                ok = self._step(step)
+                self.timings.append((step["op"], round(time.monotonic() - step_start, 2)))
+                if not ok:
+                    logging.warning(f"Mission stopped: {step['op']} failed")
+                    break
+        finally:
+            if self.worker is not None:
+                self.worker.stop()
+        seconds = time.monotonic() - start
+        observe("mission.total", seconds)
+        report = {"ok": ok, "seconds": round(seconds, 2), "round_trips": self.counter.round_trips,
+                  "commands": dict(self.counter.counts), "steps": self.timings}
+        logging.info(f"Mission: {report}")
+        return report
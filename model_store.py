@@ -0,0 +1,128 @@
+# model_store.py
+# Offline YOLOv5 loading: no GitHub access at start-up, optional precompiled
+# TorchScript/ONNX artifacts cached by weights hash, and a warm-up inference.
+#
+#   python model_store.py best.pt --format torchscript   # build the artifact before flight day
+import argparse
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import torch
+
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", ".model_cache")
+SUFFIXES = {"pt": ".pt", "torchscript": ".torchscript", "onnx": ".onnx"}
+
+last_load = {}  # timings of the most recent load_model() call
+
+
+def find_yolov5_repo():
+    # local clone first (see LogoHunting.ipynb), then the copy torch.hub downloaded earlier
+    candidates = [os.getenv("YOLOV5_DIR"), "yolov5",
+                  os.path.join(torch.hub.get_dir(), "ultralytics_yolov5_master")]
+    for path in candidates:
+        if path and os.path.isfile(os.path.join(path, "hubconf.py")):
+            return os.path.abspath(path)
+    raise FileNotFoundError("No local YOLOv5 repository found. Clone https://github.com/ultralytics/yolov5 "
+                            "next to this project or set YOLOV5_DIR.")
+
+
+def weights_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def artifact_path(weights, fmt, img_size):
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    name = f"{stem}-{weights_hash(weights)}-{img_size}{SUFFIXES[fmt]}"
+    return os.path.join(MODEL_CACHE_DIR, name)
+
+
+def export_artifact(weights, fmt, img_size=640, repo=None):
+    # Export weights to TorchScript/ONNX once; later calls reuse the cached file.
+    # Returns (path, built_now).
+    target = artifact_path(weights, fmt, img_size)
+    if os.path.exists(target):
+        return target, False
+    repo = repo or find_yolov5_repo()
+    if repo not in sys.path:
+        sys.path.insert(0, repo)
+    from export import run as yolov5_export
+
+    start = time.perf_counter()
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    yolov5_export(weights=weights, include=(fmt,), imgsz=(img_size, img_size), device="cpu")
+    shutil.move(os.path.splitext(weights)[0] + SUFFIXES[fmt], target)
+    logging.info(f"Exported {weights} to {target} in {time.perf_counter() - start:.1f} s")
+    return target, True
+
+
+def quantize_onnx(path):
+    # dynamic int8 quantization of an exported ONNX model; returns (path, built_now)
+    target = path[:-len(".onnx")] + "-int8.onnx"
+    if os.path.exists(target):
+        return target, False
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    start = time.perf_counter()
+    quantize_dynamic(path, target, weight_type=QuantType.QUInt8)
+    logging.info(f"Quantized {path} to {target} in {time.perf_counter() - start:.1f} s")
+    return target, True
+
+
+def load_model(weights="best.pt", fmt="pt", img_size=640, device="cpu", conf=0.5, iou=0.45,
+               warmup=True, quantize=False):
+    """Load a YOLOv5 hub model from the local repository, never from GitHub.
+
+    fmt is "pt" (eager weights), "torchscript" or "onnx"; the last two are exported
+    once and cached under MODEL_CACHE_DIR keyed by the weights' hash. quantize=True
+    (onnx only) loads a dynamically int8-quantized copy of the ONNX model.
+    """
+    if quantize and fmt != "onnx":
+        raise ValueError("int8 quantization is only available for the onnx format")
+    start = time.perf_counter()
+    repo = find_yolov5_repo()
+    path, built = (weights, False) if fmt == "pt" else export_artifact(weights, fmt, img_size, repo)
+    if quantize:
+        path, quantized_now = quantize_onnx(path)
+        built = built or quantized_now
+    model = torch.hub.load(repo, "custom", path=path, source="local", device=device, _verbose=False)
+    model.conf = conf
+    model.iou = iou
+    loaded = time.perf_counter()
+
+    if warmup:
+        # first inference pays for lazy allocations and kernel selection; do it now, not on the first real frame
+        model(np.zeros((img_size, img_size, 3), dtype=np.uint8), size=img_size)
+    done = time.perf_counter()
+
+    last_load.clear()
+    last_load.update(path=path, format=fmt, start="cold" if built else "warm",
+                     load_s=loaded - start, warmup_s=done - loaded, total_s=done - start)
+    logging.info(f"Loaded {path} ({last_load['start']} start): load {last_load['load_s']:.2f} s, "
+                 f"warm-up {last_load['warmup_s']:.2f} s")
+    return model
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser()
+    parser.add_argument("weights", nargs="?", default="best.pt")
+    parser.add_argument("--format", choices=sorted(SUFFIXES), default="torchscript")
+    parser.add_argument("--img-size", type=int, default=640)
+    parser.add_argument("--int8", action="store_true", help="also quantize (onnx only)")
+    args = parser.parse_args()
+    for _ in range(2):  # first run may export (cold), second reuses the artifact (warm)
+        load_model(args.weights, args.format, args.img_size, quantize=args.int8)
+        print(last_load)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# process_detectors.py
+# Runs a detector (MediaPipe gestures or YOLOv5 logos) in a worker process, so it
+# does not compete with the audio, keyboard and frame-reader threads for the GIL.
+# Frames go through a shared-memory ring buffer without pickling; only small
+# result records (a gesture label, an (N, 6) detection array) come back over a pipe.
+import logging
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAX_FRAME_SHAPE = (720, 960, 3)  # Tello 960x720 BGR
+
+
+class SharedFrameRing:
+    """`slots` uint8 frame buffers of up to max_shape in one shared memory block."""
+
+    def __init__(self, max_shape=MAX_FRAME_SHAPE, slots=2, name=None):
+        self.max_shape = tuple(max_shape)
+        self.slots = slots
+        self.slot_bytes = int(np.prod(self.max_shape))
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slots)
+            self.owner = True
+        else:
+            # spawned workers share the parent's resource tracker, so attaching here
+            # does not unlink the block when the worker exits; the owner unlinks it
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        self.buffer = np.ndarray((slots, self.slot_bytes), dtype=np.uint8, buffer=self.shm.buf)
+
+    def write(self, slot, frame):
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {frame.shape} {frame.dtype} does not fit a {self.max_shape} uint8 slot")
+        self.view(slot, frame.shape)[...] = frame
+        return frame.shape
+
+    def view(self, slot, shape):
+        # zero-copy array over the slot
+        return self.buffer[slot, :int(np.prod(shape))].reshape(shape)
+
+    def close(self):
+        self.buffer = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _make_detector(kind, options):
+    if kind == "gesture":
+        from gesture_utils import detect_gesture
+        return detect_gesture
+    if kind == "logo":
+        from detector_backends import DetectorBackend
+        return DetectorBackend(**options).infer
+    raise ValueError(f"Unknown detector kind: {kind}")
+
+
+def _worker(kind, options, ring_name, max_shape, slots, conn):
+    ring = SharedFrameRing(max_shape, slots, name=ring_name)
+    try:
+        detect = _make_detector(kind, options)
+        conn.send(("ready", None))
+    except Exception as e:
+        conn.send(("error", repr(e)))
+        return
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        request_id, slot, shape, kwargs = request
+        try:
+            result = detect(ring.view(slot, shape), **kwargs)
+        except Exception as e:
+            logging.error(f"{kind} detector process failed: {e}")
+            result = None
+        conn.send((request_id, result))
+    ring.close()
+
+
+class DetectorProcess:
+    """A detector in a worker process: call it like the in-process detect function.
+
+    detector(frame) blocks for the result. submit()/collect() pipeline up to
+    `slots` frames, so the next frame can be copied in while the worker is busy.
+    """
+
+    def __init__(self, kind, max_shape=MAX_FRAME_SHAPE, slots=2, **options):
+        self.kind = kind
+        self.slots = slots
+        self.ring = SharedFrameRing(max_shape, slots)
+        ctx = mp.get_context("spawn")  # forking a process with torch/MediaPipe threads is unsafe
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker, daemon=True, name=f"{kind}-detector",
+                                   args=(kind, options, self.ring.name, self.ring.max_shape, slots, child))
+        start = time.monotonic()
+        self.process.start()
+        child.close()  # so recv() sees EOF if the worker dies
+        try:
+            status, error = self.conn.recv()
+        except EOFError:
+            status, error = "error", "worker exited"
+        if status != "ready":
+            self.close()
+            raise RuntimeError(f"{kind} detector process failed to start: {error}")
+        logging.info(f"{kind} detector process ready in {time.monotonic() - start:.1f} s")
+        self._next_id = 0
+        self._in_flight = []
+
+    def submit(self, frame, **kwargs):
+        # copy the frame into a free slot and queue it (kwargs go to the detect call); returns the request id
+        if len(self._in_flight) >= self.slots:
+            raise RuntimeError("All slots are in flight; collect() a result first")
+        request_id = self._next_id
+        self._next_id += 1
+        slot = request_id % self.slots
+        shape = self.ring.write(slot, np.ascontiguousarray(frame))
+        self.conn.send((request_id, slot, shape, kwargs))
+        self._in_flight.append(request_id)
+        return request_id
+
+    def collect(self):
+        # (request_id, result) of the oldest submitted frame
+        request_id, result = self.conn.recv()
+        self._in_flight.remove(request_id)
+        return request_id, result
+
+    def __call__(self, frame, **kwargs):
+        while self._in_flight:
+            self.collect()
+        self.submit(frame, **kwargs)
+        return self.collect()[1]
+
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.conn.close()
+        self.ring.close()
+
+
+class ProcessBackend:
+    """DetectorBackend stand-in whose infer() runs in a DetectorProcess."""
+
+    def __init__(self, name="eager", weights="best.pt", img_size=640, device="cpu",
+                 quantize=False, conf=0.5, iou=0.45, max_shape=MAX_FRAME_SHAPE):
+        self.name = name + ("-int8" if quantize else "") + "-process"
+        self.img_size = img_size
+        self.model = None  # lives in the worker process
+        self.process = DetectorProcess("logo", max_shape, name=name, weights=weights, img_size=img_size,
+                                       device=device, quantize=quantize, conf=conf, iou=iou)
+
+    def infer(self, frame):
+        result = self.process(frame)
+        return np.zeros((0, 6), dtype=np.float32) if result is None else result
+
+    def close(self):
+        self.process.close()
@@ -0,0 +1,133 @@
+# speech_backends.py
+import logging
+import time
+from abc import ABC, abstractmethod
+
+
+class SpeechBackend(ABC):
+    """Long-lived recognition session.
+
+    start() is called once; afterwards audio chunks (16 kHz mono int16 bytes) are
+    pushed with write() as they are captured, and on_recognized(text) is called
+    from the backend's own thread whenever an utterance is recognized. When the
+    service ends the session (network drop, auth error, idle timeout), canceled
+    holds the reason and restart() opens a new one.
+    """
+
+    def __init__(self, samplerate=16000):
+        self.samplerate = samplerate
+        self.on_recognized = None
+        self.on_recognizing = None
+        self.setup_time = None
+        self.canceled = None
+
+    @abstractmethod
+    def start(self, on_recognized, on_recognizing=None):
+        pass
+
+    @abstractmethod
+    def write(self, chunk):
+        pass
+
+    def stop(self):
+        pass
+
+    def restart(self):
+        self.stop()
+        self.canceled = None
+        self.start(self.on_recognized, self.on_recognizing)
+
+    def write_silence(self, seconds=0.3):
+        # trailing silence, so the recognizer ends an utterance the audio stopped in the middle of
+        self.write(bytes(int(self.samplerate * seconds) * 2))
+
+
+class AzureSpeechBackend(SpeechBackend):
+    def __init__(self, speech_key, service_region, samplerate=16000, silence_timeout_ms=300):
+        super().__init__(samplerate)
+        self.speech_key = speech_key
+        self.service_region = service_region
+        self.silence_timeout_ms = silence_timeout_ms
+        self.stream = None
+        self.recognizer = None
+
+    def start(self, on_recognized, on_recognizing=None):
+        import azure.cognitiveservices.speech as speechsdk
+
+        start = time.perf_counter()
+        self.on_recognized = on_recognized
+        self.on_recognizing = on_recognizing
+        speech_config = speechsdk.SpeechConfig(subscription=self.speech_key, region=self.service_region)
+        # end an utterance after a short pause instead of the default ~500 ms+
+        speech_config.set_property(speechsdk.PropertyId.Speech_SegmentationSilenceTimeoutMs,
+                                   str(self.silence_timeout_ms))
+        stream_format = speechsdk.audio.AudioStreamFormat(samples_per_second=self.samplerate,
+                                                          bits_per_sample=16, channels=1)
+        self.stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+        audio_config = speechsdk.audio.AudioConfig(stream=self.stream)
+        self.recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
+
+        def recognized(evt):
+            if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech and evt.result.text:
+                self.on_recognized(evt.result.text)
+
+        def recognizing(evt):
+            if self.on_recognizing is not None:
+                self.on_recognizing(evt.result.text)
+
+        def canceled(evt):
+            # the session is dead from here on: writes go nowhere until restart()
+            details = evt.result.cancellation_details
+            self.canceled = f"{details.reason} {details.error_details}"
+            logging.error(f"Azure recognition canceled: {self.canceled}")
+
+        self.recognizer.recognized.connect(recognized)
+        self.recognizer.recognizing.connect(recognizing)
+        self.recognizer.canceled.connect(canceled)
+        self.recognizer.start_continuous_recognition_async().get()
+        self.setup_time = time.perf_counter() - start
+
+    def write(self, chunk):
+        self.stream.write(chunk)
+
+    def stop(self):
+        if self.recognizer is not None:
+            try:
+                self.recognizer.stop_continuous_recognition_async().get()
+            except Exception as e:
+                logging.warning(f"Azure recognition stop failed: {e}")  # e.g. after a cancellation
+            self.stream.close()
+            self.recognizer = None
+
+
+class FakeSpeechBackend(SpeechBackend):
+    """Local stand-in for Azure: answers with scripted transcripts.
+
+    Every utterance_seconds of written audio produces the next transcript, after
+    result_delay seconds. setup_delay simulates the cost of opening a session.
+    """
+
+    def __init__(self, transcripts=("land",), samplerate=16000, utterance_seconds=1.0,
+                 setup_delay=0.0, result_delay=0.0):
+        super().__init__(samplerate)
+        self.transcripts = list(transcripts)
+        self.bytes_per_utterance = int(samplerate * utterance_seconds) * 2
+        self.setup_delay = setup_delay
+        self.result_delay = result_delay
+        self.buffered = 0
+        self.written = []
+
+    def start(self, on_recognized, on_recognizing=None):
+        start = time.perf_counter()
+        self.on_recognized = on_recognized
+        self.on_recognizing = on_recognizing
+        time.sleep(self.setup_delay)
+        self.setup_time = time.perf_counter() - start
+
+    def write(self, chunk):
+        self.written.append(chunk)
+        self.buffered += len(chunk)
+        if self.buffered >= self.bytes_per_utterance and self.transcripts:
+            self.buffered = 0
+            time.sleep(self.result_delay)
+            self.on_recognized(self.transcripts.pop(0))
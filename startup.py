@@ -0,0 +1,145 @@
+# startup.py
+# Import this module first and call PROFILER.track_imports(): the imports that follow are
+# timed until PROFILER.ready() (or interpreter exit).
+import atexit
+import builtins
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from metrics import observe
+
+LAUNCH = time.perf_counter()
+
+
+class Warmup:
+    """fn(*args) on a daemon thread; result() waits for it (and re-raises its error)."""
+
+    def __init__(self, profiler, name, fn, args, kwargs, foreground=False):
+        self.name = name
+        self._value = None
+        self._error = None
+        self._done = threading.Event()
+
+        def run():
+            start = time.perf_counter()
+            try:
+                self._value = fn(*args, **kwargs)
+            except Exception as e:
+                self._error = e
+                logging.warning(f"Startup: {name} failed: {e}")
+            finally:
+                profiler.add("init" if foreground else "background", name, start, time.perf_counter() - start)
+                self._done.set()
+
+        if foreground:
+            run()
+        else:
+            threading.Thread(target=run, name=f"warmup-{name}", daemon=True).start()
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} not ready after {timeout} s")
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class StartupProfiler:
+    """Where the time from launch to "ready for first command" goes.
+
+    Top-level imports made after startup is imported are timed per module
+    (nested imports count toward the module that triggered them); step() times
+    foreground init work and background() starts a warm-up thread. ready() logs
+    the table, exports "startup.ready" and, with STARTUP_PROFILE set, writes it
+    there as JSON.
+    """
+
+    def __init__(self, launch=LAUNCH):
+        self.launch = launch
+        self.entries = []  # (kind, name, start since launch s, seconds)
+        self.ready_time = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._original_import = None
+
+    def add(self, kind, name, start, seconds):
+        with self._lock:
+            self.entries.append((kind, name, start - self.launch, seconds))
+        observe(f"startup.{name}", seconds)
+
+    # ----- imports -----
+    def track_imports(self):
+        if self._original_import is not None:
+            return
+        original = self._original_import = builtins.__import__
+        atexit.register(self.stop_tracking_imports)  # in case ready() is never reached
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or getattr(self._local, "depth", 0) or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            self._local.depth = 1
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                self._local.depth = 0
+                self.add("import", name, start, time.perf_counter() - start)
+
+        builtins.__import__ = timed_import
+
+    def stop_tracking_imports(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    # ----- init work -----
+    @contextlib.contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add("init", name, start, time.perf_counter() - start)
+
+    def background(self, name, fn, *args, foreground=False, **kwargs):
+        # foreground=True runs it right away instead, for comparing with sequential startup
+        return Warmup(self, name, fn, args, kwargs, foreground)
+
+    def ready(self):
+        self.stop_tracking_imports()
+        self.ready_time = time.perf_counter() - self.launch
+        observe("startup.ready", self.ready_time)
+        logging.info(self.report())
+        print(f"Ready for commands {self.ready_time:.2f} s after launch")
+        path = os.environ.get("STARTUP_PROFILE")
+        if path:
+            with open(path, "w") as f:
+                json.dump(self.as_dict(), f, indent=2)
+        return self.ready_time
+
+    def as_dict(self):
+        with self._lock:
+            entries = list(self.entries)
+        return {"ready_s": self.ready_time,
+                "entries": [{"kind": k, "name": n, "start_s": round(s, 4), "seconds": round(d, 4)}
+                            for k, n, s, d in entries]}
+
+    def report(self):
+        with self._lock:
+            entries = sorted(self.entries, key=lambda e: e[2])
+        lines = [f"Startup profile, ready {self.ready_time or 0:.2f} s after launch:"]
+        for kind, name, start, seconds in entries:
+            if seconds >= 0.005:
+                lines.append(f"  {kind:<10} {name:<28} at {start:6.2f} s  {seconds * 1000:7.0f} ms")
+        return "\n".join(lines)
+
+
+PROFILER = StartupProfiler()
@@ -0,0 +1,459 @@
+# swarm.py
+# Several Tellos from one ground station: one asyncio loop for every drone's command
+# and state traffic, a video decoder thread per drone, and one inference pool that
+# batches the newest frame of each drone.
+#
+#   python swarm.py alpha=192.168.10.2 bravo=192.168.10.3 --group red=alpha,bravo --mode gesture
+#
+# Each drone streams to its own video port (the SDK 3.0 "port" command), so the
+# drones must be in station mode on one network with distinct IPs.
+import argparse
+import asyncio
+import functools
+import logging
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+from frame_pipeline import FramePacket
+from gesture_temporal import RELEASE, TemporalGestureRecognizer
+from metrics import observe, throttled
+from voice_commands import COMMANDS, CommandRegistry, tokenize
+
+TELLO_COMMAND_PORT = 8889
+STATE_PORT = 8890
+VIDEO_BASE_PORT = 11111
+
+# voice command -> SDK command sent to every targeted drone
+SWARM_COMMANDS = {
+    "takeoff": "takeoff",
+    "land": "land",
+    "forward": "forward 30",
+    "backward": "back 30",
+    "left": "left 30",
+    "right": "right 30",
+    "stop": "stop",
+    "bazinga": "ccw 45",
+}
+
+# gesture -> SDK command, same mapping as gesture_show_off
+GESTURE_COMMANDS = {"open_palm": "takeoff", "fist": "down 30", "victory": "cw 45", "index_up": "up 30"}
+
+
+def parse_state(text):
+    # "pitch:0;roll:0;yaw:12;...;bat:87;" -> {"pitch": 0.0, ..., "bat": 87.0}
+    state = {}
+    for field in text.strip().split(";"):
+        key, _, value = field.partition(":")
+        if key:
+            try:
+                state[key] = float(value)
+            except ValueError:
+                state[key] = value
+    return state
+
+
+class _CommandProtocol(asyncio.DatagramProtocol):
+    def __init__(self, drone):
+        self.drone = drone
+
+    def datagram_received(self, data, addr):
+        self.drone._on_reply(data)
+
+    def error_received(self, exc):
+        logging.warning(f"{self.drone.name}: command socket error {exc}")
+
+
+class _StateProtocol(asyncio.DatagramProtocol):
+    def __init__(self, swarm):
+        self.swarm = swarm
+
+    def datagram_received(self, data, addr):
+        drone = self.swarm.by_ip.get(addr[0])
+        if drone is not None:
+            drone.state = parse_state(data.decode("ascii", errors="replace"))
+            drone.state_time = time.monotonic()
+
+
+class _VideoProtocol(asyncio.DatagramProtocol):
+    def __init__(self, drone):
+        self.drone = drone
+
+    def datagram_received(self, data, addr):
+        self.drone.video_queue.put(data)
+
+
+class SwarmDrone:
+    """One Tello of the swarm: its command socket, latest state and video decoder."""
+
+    def __init__(self, name, ip, command_port=TELLO_COMMAND_PORT, video_port=VIDEO_BASE_PORT, timeout=7.0):
+        self.name = name
+        self.ip = ip
+        self.command_port = command_port
+        self.video_port = video_port
+        self.timeout = timeout
+        self.state = {}
+        self.state_time = 0.0
+        self.last_command = 0.0
+        self.frames = 0
+        self.video_queue = queue.SimpleQueue()
+        self._transport = None
+        self._video_transport = None
+        self._lock = None
+        self._reply = None
+
+    async def open(self, loop, bind_ip):
+        self._lock = asyncio.Lock()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _CommandProtocol(self), local_addr=(bind_ip, 0), remote_addr=(self.ip, self.command_port))
+        self._video_transport, _ = await loop.create_datagram_endpoint(
+            lambda: _VideoProtocol(self), local_addr=("0.0.0.0", self.video_port))
+
+    def close(self):
+        for transport in (self._transport, self._video_transport):
+            if transport is not None:
+                transport.close()
+
+    async def send(self, command, timeout=None):
+        # send one SDK command and wait for its reply (None on timeout); rc is fire-and-forget
+        self.last_command = time.monotonic()
+        if command.startswith("rc "):
+            self._transport.sendto(command.encode("utf-8"))
+            return None
+        async with self._lock:  # the drone answers one command at a time
+            self._reply = asyncio.get_running_loop().create_future()
+            start = time.monotonic()
+            self._transport.sendto(command.encode("utf-8"))
+            try:
+                reply = await asyncio.wait_for(self._reply, timeout or self.timeout)
+            except asyncio.TimeoutError:
+                logging.warning(f"{self.name}: no reply to {command!r}")
+                return None
+            finally:
+                self._reply = None
+            observe(f"swarm.{self.name}.rtt", time.monotonic() - start)
+            return reply
+
+    def _on_reply(self, data):
+        if self._reply is not None and not self._reply.done():
+            self._reply.set_result(data.decode("utf-8", errors="replace").strip())
+
+    def decode_video(self, on_frame, stop):
+        # decoder thread: H.264 datagrams -> BGR frames -> on_frame(name, FramePacket)
+        import av
+
+        codec = av.CodecContext.create("h264", "r")
+        seq = 0
+        while not stop.is_set():
+            try:
+                data = self.video_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            try:
+                for packet in codec.parse(data):
+                    for frame in codec.decode(packet):
+                        seq += 1
+                        self.frames += 1
+                        on_frame(self.name, FramePacket(seq, frame.to_ndarray(format="bgr24")))
+            except av.FFmpegError:
+                continue  # lost datagrams corrupt a frame until the next keyframe
+
+
+class InferencePool:
+    """One worker batching the newest frame of every drone.
+
+    Decoder threads submit() frames; a newer frame from the same drone replaces
+    one still waiting. The worker waits up to max_wait for the other drones'
+    frames, runs process_batch([(name, image), ...]) once for all of them and
+    calls on_result(name, result, packet) for each.
+    """
+
+    def __init__(self, process_batch, on_result, sources, max_wait=0.01):
+        self.process_batch = process_batch
+        self.on_result = on_result
+        self.sources = sources
+        self.max_wait = max_wait
+        self.batches = 0
+        self.frames = 0
+        self.skipped = 0
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join(timeout=2.0)
+
+    def submit(self, name, packet):
+        with self._cond:
+            if name in self._pending:
+                self.skipped += 1
+            self._pending[name] = packet
+            self._cond.notify()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                if not self._cond.wait_for(lambda: self._pending or self._stop.is_set(), timeout=0.1):
+                    continue
+                self._cond.wait_for(lambda: len(self._pending) >= self.sources, timeout=self.max_wait)
+                batch = list(self._pending.items())
+                self._pending.clear()
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                results = self.process_batch([(name, packet.image) for name, packet in batch])
+            except Exception as e:
+                logging.error(f"Swarm inference failed: {e}")
+                continue
+            observe("swarm.batch", time.perf_counter() - start)
+            self.batches += 1
+            self.frames += len(batch)
+            now = time.monotonic()
+            for (name, packet), result in zip(batch, results):
+                packet.inferred_time = now
+                observe(f"swarm.{name}.frame_to_result", now - packet.capture_time)
+                self.on_result(name, result, packet)
+
+    @property
+    def mean_batch(self):
+        return self.frames / self.batches if self.batches else 0.0
+
+
+class GestureBatch:
+    """Gestures for a batch of drone frames.
+
+    MediaPipe hand tracking keeps state between frames of one stream, so every
+    drone gets its own Hands instance; the landmark classification runs once for
+    the whole batch.
+    """
+
+    def __init__(self):
+        import cv2
+        from gesture_utils import classify_landmarks_batch, landmarks_to_array, mp_hands
+
+        self._cv2 = cv2
+        self._classify = classify_landmarks_batch
+        self._to_array = landmarks_to_array
+        self._mp_hands = mp_hands
+        self.detectors = {}
+
+    def __call__(self, items):
+        gestures = ["no_hand"] * len(items)
+        hands, hand_rows = [], []
+        for i, (name, image) in enumerate(items):
+            detector = self.detectors.get(name)
+            if detector is None:
+                detector = self.detectors[name] = self._mp_hands.Hands(max_num_hands=1)
+            results = detector.process(self._cv2.cvtColor(image, self._cv2.COLOR_BGR2RGB))
+            if results.multi_hand_landmarks:
+                hands.append(self._to_array(results.multi_hand_landmarks[0].landmark))
+                hand_rows.append(i)
+        if hands:
+            for i, label in zip(hand_rows, self._classify(np.stack(hands))):
+                gestures[i] = str(label)
+        return gestures
+
+
+class LogoBatch:
+    """Logo detections for a batch of drone frames in one YOLOv5 forward pass."""
+
+    def __init__(self, weights="best.pt", backend="eager", img_size=640):
+        from detector_backends import DetectorBackend
+        from Status2_LogoDetection import DetectionResult
+
+        self.backend = DetectorBackend(backend, weights, img_size)
+        self._result = DetectionResult
+
+    def __call__(self, items):
+        preds = self.backend.infer_batch([image for _, image in items])
+        return [self._result(name, pred, image.shape) for (name, image), pred in zip(items, preds)]
+
+
+class Swarm:
+    """N Tellos driven from one asyncio loop running on a background thread.
+
+    Targets are a drone name, a group name or "all". The async API (send) is for
+    code on the loop; call() and send_threadsafe() are for the other threads
+    (keyboard, voice, inference). Names must be single lowercase words that are
+    not command words, so a phrase like "bravo land" can be parsed.
+    """
+
+    def __init__(self, drones, groups=None, bind_ip="0.0.0.0", keepalive=10.0):
+        self.drones = {d.name: d for d in drones}
+        self.by_ip = {d.ip: d for d in drones}
+        self.groups = {"all": list(self.drones)}
+        self.groups.update(groups or {})
+        self.bind_ip = bind_ip
+        self.keepalive = keepalive
+        self.loop = None
+        self.pool = None
+        self._loop_thread = None
+        self._keepalive_task = None
+        self._stop = threading.Event()
+        self._decoders = []
+        self._state_transport = None
+        self.commands = CommandRegistry({name: phrases for name, phrases in COMMANDS.items() if name in SWARM_COMMANDS})
+        self.commands.bind_all({name: functools.partial(self.send_threadsafe, "all", sdk)
+                                for name, sdk in SWARM_COMMANDS.items()})
+
+    def resolve(self, target):
+        if target in self.drones:
+            return [target]
+        if target in self.groups:
+            return list(self.groups[target])
+        raise KeyError(f"Unknown drone or group: {target}")
+
+    # ----- lifecycle -----
+    def start(self, video=True):
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._loop_thread.start()
+        replies = asyncio.run_coroutine_threadsafe(self._open(video), self.loop).result()
+        logging.info(f"Swarm up: {replies}")
+        return replies
+
+    async def _open(self, video):
+        self._state_transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: _StateProtocol(self), local_addr=("0.0.0.0", STATE_PORT))
+        for drone in self.drones.values():
+            await drone.open(self.loop, self.bind_ip)
+        replies = await self.send("all", "command")
+        if video:
+            await asyncio.gather(*(d.send(f"port {STATE_PORT} {d.video_port}") for d in self.drones.values()))
+            await self.send("all", "streamon")
+        self._keepalive_task = self.loop.create_task(self._keepalive())
+        return replies
+
+    async def _keepalive(self):
+        # a Tello lands by itself after 15 s without commands
+        while not self._stop.is_set():
+            await asyncio.sleep(1.0)
+            now = time.monotonic()
+            idle = [d for d in self.drones.values() if now - d.last_command > self.keepalive]
+            await asyncio.gather(*(d.send("keepalive") for d in idle))
+
+    def start_inference(self, process_batch, on_result, max_wait=0.01):
+        # decoder thread per drone -> one shared batching pool
+        self.pool = InferencePool(process_batch, on_result, len(self.drones), max_wait).start()
+        for drone in self.drones.values():
+            thread = threading.Thread(target=drone.decode_video, args=(self.pool.submit, self._stop), daemon=True)
+            thread.start()
+            self._decoders.append(thread)
+        return self.pool
+
+    def stop(self):
+        if self.loop is None:
+            return
+        try:
+            self.call("all", "streamoff", timeout=3.0)
+        except Exception as e:
+            logging.warning(f"Swarm streamoff failed: {e}")
+        self._stop.set()
+        if self.pool is not None:
+            self.pool.stop()
+        for thread in self._decoders:
+            thread.join(timeout=1.0)
+
+        asyncio.run_coroutine_threadsafe(self._close(), self.loop).result(timeout=3.0)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._loop_thread.join(timeout=1.0)
+        self.loop.close()
+        self.loop = None
+
+    async def _close(self):
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+        for drone in self.drones.values():
+            drone.close()
+        if self._state_transport is not None:
+            self._state_transport.close()
+        await asyncio.sleep(0.05)  # let the transports release their ports
+
+    # ----- commands -----
+    async def send(self, target, command):
+        # same command to every drone of target, concurrently; {name: reply}
+        names = self.resolve(target)
+        replies = await asyncio.gather(*(self.drones[n].send(command) for n in names))
+        return dict(zip(names, replies))
+
+    def send_threadsafe(self, target, command):
+        return asyncio.run_coroutine_threadsafe(self.send(target, command), self.loop)
+
+    def call(self, target, command, timeout=None):
+        return self.send_threadsafe(target, command).result(timeout)
+
+    def handle_text(self, text, default_target="all"):
+        # recognized phrase like "bravo forward" or "red land" -> (command, drone names), or None
+        tokens = tokenize(text)
+        target = next((t for t in tokens if t in self.drones or t in self.groups), default_target)
+        name = self.commands.resolve(text)
+        if name is None:
+            return None
+        self.send_threadsafe(target, SWARM_COMMANDS[name])
+        return name, self.resolve(target)
+
+
+def gesture_handler(swarm, targets=None, **recognizer_options):
+    # on_result for GestureBatch: each drone's own gestures command it (or its mapped group);
+    # one temporal recognizer, with each drone's camera as a separate hand
+    recognizer_options.setdefault("repeatable", ("fist", "victory", "index_up"))
+    recognizer = TemporalGestureRecognizer(**recognizer_options)
+
+    def on_result(name, gesture, packet):
+        if throttled(f"gesture.{name}"):
+            print(f"[{name}] Gesture: {gesture}")
+        for event in recognizer.update(gesture, packet.capture_time, hand=name):
+            command = GESTURE_COMMANDS.get(event.gesture)
+            if command is not None and event.kind != RELEASE:
+                swarm.send_threadsafe((targets or {}).get(name, name), command)
+
+    return on_result
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser()
+    parser.add_argument("drones", nargs="+", help="name=ip, e.g. alpha=192.168.10.2")
+    parser.add_argument("--group", action="append", default=[], help="name=drone,drone")
+    parser.add_argument("--mode", choices=["gesture", "logo", "none"], default="gesture")
+    parser.add_argument("--weights", default="best.pt")
+    args = parser.parse_args()
+
+    drones = []
+    for i, spec in enumerate(args.drones):
+        name, ip = spec.split("=")
+        drones.append(SwarmDrone(name, ip, video_port=VIDEO_BASE_PORT + i))
+    groups = {name: members.split(",") for name, members in (g.split("=") for g in args.group)}
+    swarm = Swarm(drones, groups)
+    swarm.start(video=args.mode != "none")
+    if args.mode == "gesture":
+        swarm.start_inference(GestureBatch(), gesture_handler(swarm))
+    elif args.mode == "logo":
+        swarm.start_inference(LogoBatch(args.weights), lambda name, result, packet: None)
+
+    # typed phrases stand in for recognized speech: "all takeoff", "red forward", "bravo land"
+    print("Type commands like 'all takeoff' or 'bravo land'; Ctrl+D lands everyone and exits.")
+    try:
+        for line in sys.stdin:
+            handled = swarm.handle_text(line)
+            print(f"-> {handled}" if handled else "Unrecognized command")
+    except KeyboardInterrupt:
+        pass
+    swarm.call("all", "land")
+    swarm.stop()
+
+
+if __name__ == "__main__":
+    main()
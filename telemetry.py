@@ -0,0 +1,157 @@
+# telemetry.py
+import logging
+import threading
+import time
+
+import numpy as np
+
+# numeric fields of the Tello state stream (cm, cm/s / 10 for vg*, degrees, %, 0.001 g for ag*)
+FIELDS = ("pitch", "roll", "yaw", "vgx", "vgy", "vgz", "h", "tof", "baro", "bat",
+          "templ", "temph", "agx", "agy", "agz")
+
+
+class TelemetryStore:
+    """Drone state history in fixed-size NumPy ring buffers.
+
+    Each sample is one state packet with its arrival time (time.monotonic(),
+    the clock FramePacket.capture_time and the flight recorder use), so a frame
+    can be matched with the state it was captured in. latest() is O(1); window()
+    and nearest() binary-search the (at most two) sorted runs of the ring.
+    """
+
+    def __init__(self, capacity=6000, fields=FIELDS):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.columns = {name: i for i, name in enumerate(self.fields)}
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.values = np.full((capacity, len(self.fields)), np.nan, dtype=np.float32)
+        self.head = 0    # next slot to write
+        self.count = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return self.count
+
+    def append(self, state, t=None):
+        # one state dict (e.g. Tello.get_current_state()); missing fields are stored as NaN
+        row = [state.get(name, np.nan) for name in self.fields]
+        with self._lock:
+            self.times[self.head] = time.monotonic() if t is None else t
+            self.values[self.head] = row
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def _row_dict(self, i):
+        state = dict(zip(self.fields, self.values[i].tolist()))
+        state["t"] = float(self.times[i])
+        return state
+
+    def latest(self, field=None):
+        # newest sample as a dict (or one field of it), None while empty
+        with self._lock:
+            if not self.count:
+                return None
+            i = (self.head - 1) % self.capacity
+            return float(self.values[i, self.columns[field]]) if field else self._row_dict(i)
+
+    def _ordered(self):
+        # ring slots oldest -> newest as (first run, second run) slices
+        if self.count < self.capacity:
+            return slice(0, self.count), slice(0, 0)
+        return slice(self.head, self.capacity), slice(0, self.head)
+
+    def _locate(self, t):
+        # number of samples with time <= t, as a logical (oldest = 0) index
+        first, second = self._ordered()
+        n = int(np.searchsorted(self.times[first], t, side="right"))
+        if n == first.stop - first.start:
+            n += int(np.searchsorted(self.times[second], t, side="right"))
+        return n
+
+    def _slot(self, k):
+        first, _ = self._ordered()
+        return (first.start + k) % self.capacity
+
+    def nearest(self, t, max_age=None):
+        # sample closest in time to t (e.g. a frame's capture time) with its "age" t - sample time;
+        # None when empty or when the closest sample is further than max_age seconds away
+        with self._lock:
+            if not self.count:
+                return None
+            k = self._locate(t)
+            candidates = [self._slot(j) for j in (k - 1, k) if 0 <= j < self.count]
+            i = min(candidates, key=lambda s: abs(self.times[s] - t))
+            if max_age is not None and abs(self.times[i] - t) > max_age:
+                return None
+            state = self._row_dict(i)
+        state["age"] = t - state["t"]
+        return state
+
+    def window(self, start, end=None, fields=None):
+        # (times, values) of samples with start <= time <= end, oldest first; values columns follow `fields`
+        with self._lock:
+            end = float("inf") if end is None else end
+            lo, hi = self._locate(np.nextafter(start, -np.inf)), self._locate(end)
+            slots = (self._slot(0) + np.arange(lo, hi)) % self.capacity
+            columns = [self.columns[f] for f in fields] if fields else slice(None)
+            return self.times[slots].copy(), self.values[slots][:, columns]
+
+    def last(self, seconds, fields=None):
+        with self._lock:
+            newest = self.times[(self.head - 1) % self.capacity] if self.count else 0.0
+        return self.window(newest - seconds, fields=fields)
+
+    def interpolate(self, t, field):
+        # linear interpolation of one field at t (yaw is unwrapped first), None while empty
+        times, values = self.window(t - 1.0, t + 1.0, fields=(field,))
+        if not len(times):
+            return None
+        values = values[:, 0].astype(np.float64)
+        if field == "yaw":
+            values = np.degrees(np.unwrap(np.radians(values)))
+            return float((np.interp(t, times, values) + 180.0) % 360.0 - 180.0)
+        return float(np.interp(t, times, values))
+
+    # ----- feeding from a drone -----
+    def start(self, get_state, hz=50.0):
+        # poll get_state (e.g. Tello.get_current_state) in the background; djitellopy builds a new dict
+        # for every state packet, so a sample is stored once per packet, stamped when first seen
+        def loop():
+            last = None
+            while not self._stop.wait(1.0 / hz):
+                try:
+                    state = get_state()
+                except Exception as e:
+                    logging.warning(f"Telemetry poll failed: {e}")
+                    continue
+                if state and state is not last:
+                    last = state
+                    self.append(state)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    # ----- post-flight analysis -----
+    def save(self, path):
+        times, values = self.window(float("-inf"))
+        np.savez_compressed(path, times=times, values=values, fields=np.array(self.fields))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        store = cls(capacity=max(1, len(data["times"])), fields=[str(f) for f in data["fields"]])
+        n = len(data["times"])
+        store.times[:n] = data["times"]
+        store.values[:n] = data["values"]
+        store.count = n
+        store.head = n % store.capacity
+        return store
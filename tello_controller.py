@@ -1,36 +1,51 @@
 # tello_controller.py
 from djitellopy import Tello
 import time
+from command_executor import CommandExecutor, MOVE, ACTION, SAFETY
 
 class TelloController:
     def __init__(self):
         self.tello = Tello()
         self.connect()
-        self.in_air = False
+        self.in_air = False  # updated when takeoff / land are acked, not when they are queued
+        self.takeoff_record = None
+        # flight commands are sent from the executor thread, so callers never wait for acks
+        self.executor = CommandExecutor()
 
     def connect(self):
         self.tello.connect()
         print(f"Battery: {self.tello.get_battery()}%")
 
-    def takeoff(self):
-        if not self.in_air:
-            self.tello.takeoff()
+    def _takeoff_pending(self):
+        return self.takeoff_record is not None and not self.takeoff_record.done.is_set()
+
+    def _took_off(self, record):
+        if record.ok:
             self.in_air = True
-    def land(self):
-        if self.in_air:
-            self.tello.land()
+
+    def _landed(self, record):
+        if record.ok:
             self.in_air = False
 
+    def takeoff(self):
+        if not self.in_air and not self._takeoff_pending():
+            self.takeoff_record = self.executor.submit("takeoff", self.tello.takeoff, kind=ACTION,
+                                                       on_done=self._took_off)
+    def land(self):
+        # also while a takeoff is still queued or climbing: the land cancels or follows it
+        if self.in_air or self._takeoff_pending():
+            self.executor.submit("land", self.tello.land, kind=SAFETY, on_done=self._landed)
+
     def move_up(self):
-        self.tello.move_up(30)
+        self.executor.submit("move_up", self.tello.move_up, 30, kind=MOVE)
 
     def move_down(self):
-        self.tello.move_down(30)
+        self.executor.submit("move_down", self.tello.move_down, 30, kind=MOVE)
 
     def rotate(self):
-        self.tello.rotate_clockwise(360)
+        self.executor.submit("rotate", self.tello.rotate_clockwise, 360, kind=MOVE)
 
     def end(self):
-        if self.in_air:
-            self.land()
+        self.land()
+        self.executor.stop()
         self.tello.end()
@@ -0,0 +1,393 @@
+# tello_sim.py
+# Local stand-in for a Tello: SDK command port with ok/error replies and realistic
+# ack delays, the 10 Hz state stream, and an H.264 video stream of a file or a
+# rendered scene.
+#
+#   python tello_sim.py                      # rendered scene, 127.0.0.1
+#   python tello_sim.py --video flight.mp4   # play back a recording
+#
+# djitellopy binds its own reply socket to port 8889 on every interface, so the
+# simulator cannot also listen on 8889 on the same machine. It listens on
+# COMMAND_PORT (9889) instead; connect_tello() points a Tello at it. Responses,
+# state and video use the normal Tello ports, so djitellopy itself is unchanged.
+import argparse
+import logging
+import math
+import queue
+import random
+import socket
+import threading
+import time
+from fractions import Fraction
+
+import cv2
+import numpy as np
+
+COMMAND_PORT = 9889
+STATE_PORT = 8890
+VIDEO_PORT = 11111
+FRAME_SIZE = (960, 720)
+MARKER_BITS = 16
+MARKER_BLOCK = 24
+
+MOVES = {"forward": (1, 0, 0), "back": (-1, 0, 0), "left": (0, 1, 0),
+         "right": (0, -1, 0), "up": (0, 0, 1), "down": (0, 0, -1)}
+
+
+def draw_frame_marker(image, frame_id):
+    # frame id as a row of black/white blocks in the top-left corner
+    for bit in range(MARKER_BITS):
+        value = 255 if (frame_id >> bit) & 1 else 0
+        x = bit * MARKER_BLOCK
+        image[:MARKER_BLOCK, x:x + MARKER_BLOCK] = value
+
+
+def read_frame_marker(image):
+    # inverse of draw_frame_marker; works on BGR or RGB frames of the same size
+    half = MARKER_BLOCK // 2
+    frame_id = 0
+    for bit in range(MARKER_BITS):
+        if image[half, bit * MARKER_BLOCK + half].mean() > 127:
+            frame_id |= 1 << bit
+    return frame_id
+
+
+class SceneRenderer:
+    """Draws the icon and its text as seen from the simulated drone's pose."""
+
+    def __init__(self, size=FRAME_SIZE, target=(300.0, 0.0, 100.0), icon_size=30.0, hfov_deg=82.6):
+        self.width, self.height = size
+        self.target = np.array(target)
+        self.icon_size = icon_size
+        self.focal = (self.width / 2) / math.tan(math.radians(hfov_deg / 2))
+        self.background = np.tile(np.linspace(90, 160, self.height, dtype=np.uint8)[:, None, None],
+                                  (1, self.width, 3))
+
+    def render(self, position, yaw_deg):
+        image = self.background.copy()
+        # vertical stripes that slide with yaw, so turning is visible
+        shift = int(yaw_deg * self.focal / 57.3) % 120
+        image[:, shift::120] = (60, 60, 60)
+
+        yaw = math.radians(yaw_deg)
+        rel = self.target - np.asarray(position, dtype=float)
+        # world -> body frame: x forward, y left, z up; cw yaw is positive
+        forward = rel[0] * math.cos(yaw) - rel[1] * math.sin(yaw)
+        left = rel[0] * math.sin(yaw) + rel[1] * math.cos(yaw)
+        if forward > 10:
+            cx = int(self.width / 2 - self.focal * left / forward)
+            cy = int(self.height / 2 - self.focal * rel[2] / forward)
+            r = max(2, int(self.focal * self.icon_size / 2 / forward))
+            cv2.circle(image, (cx, cy), r, (0, 80, 230), -1)
+            cv2.rectangle(image, (cx + int(1.5 * r), cy - r // 2), (cx + 6 * r, cy + r // 2), (30, 30, 30), -1)
+        return image
+
+
+class VideoSource:
+    def __init__(self, path=None, size=FRAME_SIZE):
+        self.size = size
+        self.capture = cv2.VideoCapture(path) if path else None
+
+    def read(self, sim):
+        if self.capture is None:
+            return sim.renderer.render(sim.position, sim.yaw)
+        ok, frame = self.capture.read()
+        if not ok:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)  # loop the file
+            ok, frame = self.capture.read()
+        return cv2.resize(frame, self.size)
+
+
+class TelloSimulator:
+    """Simulated Tello on host:COMMAND_PORT.
+
+    time_scale shrinks every ack delay (and speeds up motion to match), e.g. 0.1 for
+    fast benchmark runs. Received commands are logged with their arrival time in
+    command_log; frame_times maps each streamed frame id to its send time.
+    """
+
+    def __init__(self, host="127.0.0.1", command_port=COMMAND_PORT, video_path=None,
+                 fps=30, time_scale=1.0, network_delay=0.01, speed=50.0, yaw_rate=90.0):
+        self.host = host
+        self.command_port = command_port
+        self.fps = fps
+        self.time_scale = time_scale
+        self.network_delay = network_delay
+        self.speed = speed
+        self.yaw_rate = yaw_rate
+        self.renderer = SceneRenderer()
+        self.video = VideoSource(video_path)
+
+        self.position = np.array([0.0, 0.0, 0.0])
+        self.yaw = 0.0
+        self.battery = 100.0
+        self.flying = False
+        self.streaming = False
+        self.rc = (0, 0, 0, 0)
+        self.motion = None  # (velocity xyz cm/s world, yaw deg/s, end time)
+        self.client = None
+        self.video_port = VIDEO_PORT
+        self.start_time = time.monotonic()
+
+        self.command_log = []
+        self.frame_times = {}
+        self._commands = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, command_port))
+        self.sock.settimeout(0.2)
+        self.out = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.out.bind((host, 0))
+
+    # ----- lifecycle -----
+    def start(self):
+        for target in (self._receive, self._execute, self._physics, self._send_state, self._send_video):
+            threading.Thread(target=target, daemon=True).start()
+        logging.info(f"Tello simulator listening on {self.host}:{self.command_port}")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        time.sleep(0.3)
+        self.sock.close()
+        self.out.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ----- command port -----
+    def _receive(self):
+        while not self._stop.is_set():
+            try:
+                data, address = self.sock.recvfrom(1024)
+            except (socket.timeout, OSError):
+                continue
+            now = time.monotonic()
+            command = data.decode("utf-8", errors="replace").strip()
+            self.client = address
+            self.command_log.append((now, command))
+            if command.startswith("rc "):
+                self._set_rc(command)  # rc is fire-and-forget, handled immediately
+            elif command in ("emergency", "stop"):
+                self._halt(emergency=command == "emergency")
+                self._reply("ok")
+            else:
+                self._commands.put(command)
+
+    def _reply(self, text):
+        if self.client is not None:
+            self.sock.sendto(text.encode("utf-8"), self.client)
+
+    def _ack_delay(self, seconds):
+        jitter = random.uniform(0.8, 1.2)
+        time.sleep((self.network_delay + seconds) * jitter * self.time_scale)
+
+    def _execute(self):
+        while not self._stop.is_set():
+            try:
+                command = self._commands.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            try:
+                reply = self.handle(command)
+            except (ValueError, IndexError):
+                reply = "error"
+            self._reply(reply)
+
+    def handle(self, command):
+        # run one SDK command to completion and return the drone's reply
+        parts = command.split()
+        name, args = parts[0], parts[1:]
+        if name in ("command", "keepalive", "speed", "wifi", "setfps", "setbitrate", "setresolution"):
+            self._ack_delay(0.02)
+            return "ok"
+        if name == "port":
+            self.video_port = int(args[1])
+            return "ok"
+        if name == "streamon":
+            self.streaming = True
+            return "ok"
+        if name == "streamoff":
+            self.streaming = False
+            return "ok"
+        if name.endswith("?"):
+            self._ack_delay(0.02)
+            return self._read(name[:-1])
+        if name == "takeoff":
+            if self.flying:
+                return "error"
+            self._move((0, 0, 80), 0, 4.0)
+            self.flying = True
+            return "ok"
+        if name == "land":
+            self._move((0, 0, -self.position[2]), 0, 3.0)
+            self.flying = False
+            return "ok"
+        if not self.flying:
+            return "error Not joystick"
+        if name in MOVES:
+            distance = int(args[0])
+            if not 20 <= distance <= 500:
+                return "out of range"
+            self._move(np.array(MOVES[name]) * distance, 0, distance / self.speed, body=True)
+            return "ok"
+        if name in ("cw", "ccw"):
+            degrees = int(args[0])
+            if not 1 <= degrees <= 360:
+                return "out of range"
+            self._move((0, 0, 0), degrees if name == "cw" else -degrees, degrees / self.yaw_rate)
+            return "ok"
+        if name == "go":
+            x, y, z, speed = (int(v) for v in args[:4])
+            distance = math.sqrt(x * x + y * y + z * z)
+            self._move((x, y, z), 0, distance / max(speed, 10), body=True)
+            return "ok"
+        if name == "flip":
+            self._ack_delay(1.5)
+            return "ok"
+        return f"unknown command: {command}"
+
+    def _read(self, field):
+        values = {"battery": int(self.battery), "height": int(self.position[2]),
+                  "time": int(time.monotonic() - self.start_time), "speed": int(self.speed),
+                  "temp": "60~62", "wifi": 90, "sdk": 20, "sn": "SIMULATOR0001"}
+        return str(values.get(field, "unknown command"))
+
+    def _move(self, delta, yaw_delta, seconds, body=False):
+        # move by delta (cm; drone body frame when body=True) over seconds, then return
+        delta = np.asarray(delta, dtype=float)
+        if body:
+            yaw = math.radians(self.yaw)
+            fwd, left, up = delta
+            delta = np.array([fwd * math.cos(yaw) + left * math.sin(yaw),
+                              -fwd * math.sin(yaw) + left * math.cos(yaw), up])
+        duration = max(seconds * self.time_scale, 1e-3)
+        with self._lock:
+            self.motion = (delta / duration, yaw_delta / duration, time.monotonic() + duration)
+        self._ack_delay(0.0)
+        time.sleep(duration)
+        with self._lock:
+            self.motion = None
+
+    def _set_rc(self, command):
+        try:
+            values = tuple(max(-100, min(100, int(v))) for v in command.split()[1:5])
+        except ValueError:
+            return
+        if len(values) == 4:
+            self.rc = values
+
+    def _halt(self, emergency=False):
+        with self._lock:
+            self.rc = (0, 0, 0, 0)
+            self.motion = None
+            if emergency:
+                self.flying = False
+                self.position[2] = 0.0
+
+    # ----- physics, state and video -----
+    def _physics(self):
+        last = time.monotonic()
+        while not self._stop.is_set():
+            time.sleep(0.02)
+            now = time.monotonic()
+            dt = now - last
+            last = now
+            with self._lock:
+                if self.motion is not None:
+                    velocity, yaw_rate, _ = self.motion
+                    self.position += velocity * dt
+                    self.yaw += yaw_rate * dt
+                elif self.flying:
+                    lr, fb, ud, yw = self.rc  # rc 100 ~ 100 cm/s, 100 deg/s
+                    yaw = math.radians(self.yaw)
+                    self.position += np.array([fb * math.cos(yaw) - lr * math.sin(yaw),
+                                               -fb * math.sin(yaw) - lr * math.cos(yaw), ud]) * dt
+                    self.yaw += yw * dt
+                self.position[2] = max(self.position[2], 0.0)
+                self.yaw = (self.yaw + 180) % 360 - 180
+                self.battery = max(0.0, self.battery - dt * (0.05 if self.flying else 0.01))
+
+    def state_line(self):
+        with self._lock:
+            lr, fb, ud, yw = self.rc if self.flying else (0, 0, 0, 0)
+            height = int(self.position[2])
+            return (f"mid:-1;x:0;y:0;z:0;mpry:0,0,0;pitch:0;roll:0;yaw:{int(round(self.yaw))};"
+                    f"vgx:{fb // 10};vgy:{lr // 10};vgz:{-ud // 10};templ:60;temph:62;tof:{height + 10};"
+                    f"h:{height};bat:{int(self.battery)};baro:{height / 100:.2f};"
+                    f"time:{int(time.monotonic() - self.start_time)};agx:0.00;agy:0.00;agz:-1000.00;\r\n")
+
+    def _send_state(self):
+        while not self._stop.is_set():
+            time.sleep(0.1)
+            if self.client is not None:
+                self.out.sendto(self.state_line().encode("ascii"), (self.client[0], STATE_PORT))
+
+    def _send_video(self):
+        import av
+
+        encoder = None
+        frame_id = 0
+        period = 1.0 / self.fps
+        next_time = time.monotonic()
+        while not self._stop.is_set():
+            if not self.streaming or self.client is None:
+                encoder = None
+                time.sleep(0.05)
+                next_time = time.monotonic()
+                continue
+            if encoder is None:
+                encoder = av.CodecContext.create("libx264", "w")
+                encoder.width, encoder.height = FRAME_SIZE
+                encoder.pix_fmt = "yuv420p"
+                encoder.time_base = Fraction(1, self.fps)
+                encoder.framerate = self.fps
+                encoder.options = {"preset": "ultrafast", "tune": "zerolatency",
+                                   "x264-params": f"keyint={self.fps}:repeat-headers=1"}
+            image = self.video.read(self)
+            draw_frame_marker(image, frame_id % (1 << MARKER_BITS))
+            frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+            frame.pts = frame_id
+            self.frame_times[frame_id % (1 << MARKER_BITS)] = time.monotonic()
+            for packet in encoder.encode(frame):
+                data = bytes(packet)
+                for i in range(0, len(data), 1460):  # Tello-sized datagrams
+                    self.out.sendto(data[i:i + 1460], (self.client[0], self.video_port))
+            frame_id += 1
+            next_time += period
+            time.sleep(max(0.0, next_time - time.monotonic()))
+
+
+def connect_tello(sim_host="127.0.0.1", command_port=COMMAND_PORT):
+    """A connected djitellopy Tello talking to a simulator on this machine."""
+    from djitellopy import Tello
+
+    tello = Tello(host=sim_host)
+    tello.address = (sim_host, command_port)
+    tello.connect()
+    return tello
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=COMMAND_PORT)
+    parser.add_argument("--video", help="video file to stream instead of the rendered scene")
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+    with TelloSimulator(args.host, args.port, args.video, fps=args.fps, time_scale=args.time_scale):
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# visual_servo.py
+import logging
+import threading
+import time
+
+
+def approach_moves(box, frame_size=(640, 480), arrive_area=0.25, yaw_area=0.1,
+                   x_tolerance=80, y_tolerance=60):
+    """One stop-and-go step of fly_toward_icon: [(move, amount), ...], or None once arrived.
+
+    Pure function of the icon box, so live flights and recorded replays make
+    the same decisions. Moves are LogoHunting / Tello method names.
+    """
+    frame_width, frame_height = frame_size
+    x1, y1, x2, y2 = box
+    area_ratio = (x2 - x1) * (y2 - y1) / (frame_width * frame_height)
+    if area_ratio > arrive_area:
+        return None
+
+    moves = []
+    dx = (x1 + x2) / 2 - frame_width / 2
+    dy = (y1 + y2) / 2 - frame_height / 2
+    if abs(dx) > x_tolerance:
+        side = "right" if dx > 0 else "left"
+        if area_ratio < yaw_area:
+            moves.append((f"turn_{side}", int(max(10, abs(dx) * area_ratio * 2.5))))  # far: turn to face it
+        else:
+            moves.append((f"move_{side}", max(20, int(abs(dx) / 5))))                # close: slide sideways
+    if abs(dy) > y_tolerance:
+        moves.append(("move_up" if dy < 0 else "move_down", max(20, int(area_ratio * abs(dy) * 0.8))))
+    moves.append(("move_forward", max(20, int(50 - area_ratio * 120))))
+    return moves
+
+
+class PID:
+    def __init__(self, kp, ki=0.0, kd=0.0, integral_limit=1.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.integral_limit = integral_limit
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.last_error = None
+
+    def update(self, error, dt):
+        self.integral = max(-self.integral_limit, min(self.integral_limit, self.integral + error * dt))
+        derivative = 0.0 if self.last_error is None or dt <= 0 else (error - self.last_error) / dt
+        self.last_error = error
+        return self.kp * error + self.ki * self.integral + self.kd * derivative
+
+
+class DetectionWorker:
+    """Runs detect(frame) -> box on the newest camera frame in a background thread.
+
+    latest() returns (box, capture_time) of the most recent result, so the
+    controller can run at its own rate and tell how old the detection is.
+    """
+
+    def __init__(self, read_frame, detect):
+        self.read_frame = read_frame
+        self.detect = detect
+        self._latest = (None, 0.0)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            capture_time = time.monotonic()
+            frame = self.read_frame()
+            if frame is None:
+                time.sleep(0.01)
+                continue
+            try:
+                box = self.detect(frame)
+            except Exception as e:
+                logging.error(f"Detection failed: {e}")
+                box = None
+            self._latest = (box, capture_time)
+
+    def latest(self):
+        return self._latest
+
+
+class RcServoController:
+    """Closed-loop approach: stream send_rc_control at a fixed rate toward the icon.
+
+    Drives the icon box center to the middle of the frame (yaw while far away,
+    sideways once close, like fly_toward_icon) and its area ratio up to
+    arrive_area. Each channel has a deadband, a speed limit and a slew limit; a
+    watchdog zeroes all velocities when the detection is older than stale_after.
+    With a TelemetryStore, the yaw turned since the detected frame was captured
+    is taken off the horizontal error, so detection latency does not cause overshoot.
+    """
+
+    def __init__(self, drone, get_detection, frame_size=(640, 480), rate_hz=20,
+                 arrive_area=0.25, yaw_area=0.1, max_speed=40, max_step=8,
+                 deadband=0.1, stale_after=0.5, lost_after=3.0, telemetry=None, hfov_deg=82.6):
+        self.drone = drone
+        self.get_detection = get_detection
+        self.frame_width, self.frame_height = frame_size
+        self.period = 1.0 / rate_hz
+        self.arrive_area = arrive_area
+        self.yaw_area = yaw_area
+        self.max_speed = max_speed
+        self.max_step = max_step
+        self.deadband = deadband
+        self.stale_after = stale_after
+        self.lost_after = lost_after
+        self.telemetry = telemetry
+        self.hfov_deg = hfov_deg
+        self.lateral_pid = PID(60, 5, 8)
+        self.vertical_pid = PID(50, 5, 6)
+        self.forward_pid = PID(180, 20, 0)
+        self.command = [0, 0, 0, 0]  # left/right, forward/back, up/down, yaw
+        self.ticks = 0
+        self.stale_ticks = 0
+
+    def _slew(self, target):
+        out = []
+        for current, wanted in zip(self.command, target):
+            wanted = max(-self.max_speed, min(self.max_speed, int(wanted)))
+            step = max(-self.max_step, min(self.max_step, wanted - current))
+            out.append(current + step)
+        return out
+
+    def _send(self, command):
+        self.command = command
+        self.drone.send_rc_control(*command)
+
+    def _errors(self, box):
+        x1, y1, x2, y2 = box
+        ex = ((x1 + x2) / 2 - self.frame_width / 2) / (self.frame_width / 2)
+        ey = ((y1 + y2) / 2 - self.frame_height / 2) / (self.frame_height / 2)
+        area_ratio = (x2 - x1) * (y2 - y1) / (self.frame_width * self.frame_height)
+        return ex, ey, area_ratio
+
+    def _turned_since(self, t):
+        # degrees yawed (cw positive) between t and the newest state sample, 0 without telemetry
+        if self.telemetry is None:
+            return 0.0
+        then, latest = self.telemetry.nearest(t, max_age=0.2), self.telemetry.latest()
+        if then is None or latest is None:
+            return 0.0
+        return (latest["yaw"] - then["yaw"] + 180.0) % 360.0 - 180.0
+
+    def step(self, now, dt):
+        # one control tick; returns "arrived", "lost" or None to keep going
+        box, box_time = self.get_detection()
+        age = now - box_time
+        if box is None or age > self.stale_after:
+            # watchdog: never keep flying on an old detection
+            self.stale_ticks += 1
+            self._send([0, 0, 0, 0])
+            for pid in (self.lateral_pid, self.vertical_pid, self.forward_pid):
+                pid.reset()
+            return "lost" if self.stale_ticks * self.period > self.lost_after else None
+        self.stale_ticks = 0
+
+        ex, ey, area_ratio = self._errors(box)
+        ex -= self._turned_since(box_time) / (self.hfov_deg / 2)
+        if area_ratio > self.arrive_area:
+            self._send([0, 0, 0, 0])
+            return "arrived"
+
+        ex = 0.0 if abs(ex) < self.deadband else ex
+        ey = 0.0 if abs(ey) < self.deadband else ey
+        lateral = self.lateral_pid.update(ex, dt)
+        up_down = -self.vertical_pid.update(ey, dt)  # image y grows downward
+        forward = self.forward_pid.update(self.arrive_area - area_ratio, dt)
+        if area_ratio < self.yaw_area:
+            target = [0, forward, up_down, lateral]   # far: turn to face the icon
+        else:
+            target = [lateral, forward, up_down, 0]   # close: slide sideways
+        self._send(self._slew(target))
+        return None
+
+    def run(self, timeout=60.0):
+        # True once the icon is close enough, False when it is lost or time runs out
+        start = time.monotonic()
+        last = start
+        next_tick = start
+        try:
+            while time.monotonic() - start < timeout:
+                now = time.monotonic()
+                outcome = self.step(now, now - last)
+                last = now
+                self.ticks += 1
+                if outcome is not None:
+                    logging.info(f"Servo approach {outcome} after {now - start:.1f} s ({self.ticks} ticks)")
+                    return outcome == "arrived"
+                next_tick += self.period
+                time.sleep(max(0.0, next_tick - time.monotonic()))
+            logging.info(f"Servo approach timed out after {timeout:.0f} s")
+            return False
+        finally:
+            self.drone.send_rc_control(0, 0, 0, 0)
@@ -0,0 +1,119 @@
+# voice_commands.py
+import json
+import re
+
+# command name -> spoken phrases. Order is priority: when one utterance contains
+# several commands the earlier one wins, like the old if/elif chain.
+COMMANDS = {
+    "takeoff": ["take off", "takeoff"],
+    "land": ["land", "landing"],
+    "forward": ["forward", "forwards"],
+    "backward": ["backward", "backwards"],
+    "left": ["left"],
+    "right": ["right"],
+    "stop": ["stop", "hover"],
+    "picture": ["picture"],
+    "record": ["record"],
+    "clip": ["clip"],
+    "burst": ["burst"],
+    "bazinga": ["bazinga"],
+    "banana": ["banana"],
+}
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def stems(token):
+    # candidate base forms of an inflected word: "landing" -> land, "stopped" -> stop, "clips" -> clip
+    for suffix in _SUFFIXES:
+        stem = token[:-len(suffix)]
+        if token.endswith(suffix) and len(stem) >= 3:
+            yield stem
+            if stem[-1] == stem[-2]:
+                yield stem[:-1]
+            yield stem + "e"
+
+
+class CommandRegistry:
+    """Supported voice commands, shared by the Vosk and Azure controllers.
+
+    Each phrase is indexed by its first word, so resolving a recognized phrase is
+    one dict lookup per word instead of a chain of substring tests; the words
+    after it must follow in order ("take off", not "take pictures"). The same
+    phrases make up the Vosk grammar for a restricted-vocabulary recognizer,
+    whose output always hits the index. Free text (Azure) may inflect the words
+    ("stopping", "pictures"): a word missing from the index is looked up again
+    by its stems, and the result is cached.
+    """
+
+    def __init__(self, commands=None, aliases=None):
+        commands = COMMANDS if commands is None else commands
+        self._priority = {name: i for i, name in enumerate(commands)}
+        self._phrases = {name: list(phrases) for name, phrases in commands.items()}
+        self._handlers = {}
+        self._index = {}
+        self._fallback = {}  # word -> index entries found through stems()
+        for name, phrases in self._phrases.items():
+            for phrase in phrases:
+                self._index_phrase(name, phrase)
+        for name, phrases in (aliases or {}).items():
+            for phrase in phrases:
+                self.add_alias(name, phrase)
+
+    def _index_phrase(self, name, phrase):
+        tokens = tokenize(phrase)
+        if tokens:
+            # first word -> [(following words, command name), ...]
+            self._index.setdefault(tokens[0], []).append((tuple(tokens[1:]), name))
+            self._fallback.clear()
+
+    def add_alias(self, name, phrase):
+        if name not in self._phrases:
+            raise KeyError(f"Unknown command: {name}")
+        self._phrases[name].append(phrase)
+        self._index_phrase(name, phrase)
+
+    def bind(self, name, handler):
+        if name not in self._phrases:
+            raise KeyError(f"Unknown command: {name}")
+        self._handlers[name] = handler
+
+    def bind_all(self, handlers):
+        for name, handler in handlers.items():
+            self.bind(name, handler)
+
+    def grammar(self):
+        # JSON phrase list for KaldiRecognizer; "[unk]" absorbs everything else
+        phrases = [p for name in self._handlers for p in self._phrases[name]]
+        return json.dumps(phrases + ["[unk]"])
+
+    def resolve(self, text):
+        best = None
+        tokens = tokenize(text)
+        for i, token in enumerate(tokens):
+            entries = self._index.get(token)
+            if entries is None:
+                entries = self._lookup_stem(token)
+            for rest, name in entries:
+                if name not in self._handlers or (best is not None and self._priority[name] >= self._priority[best]):
+                    continue
+                if not rest or tuple(tokens[i + 1:i + 1 + len(rest)]) == rest:
+                    best = name
+        return best
+
+    def _lookup_stem(self, token):
+        if token not in self._fallback:
+            self._fallback[token] = next((self._index[stem] for stem in stems(token) if stem in self._index), ())
+        return self._fallback[token]
+
+    def dispatch(self, text):
+        # Run the handler for text; returns the command name, or None if nothing matched
+        name = self.resolve(text)
+        if name is not None:
+            self._handlers[name]()
+        return name
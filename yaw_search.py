@@ -0,0 +1,213 @@
+# yaw_search.py
+import collections
+import logging
+import math
+import time
+
+import numpy as np
+
+from metrics import observe
+from visual_servo import DetectionWorker
+
+
+def wrap_angle(degrees):
+    # -> [-180, 180)
+    return (degrees + 180.0) % 360.0 - 180.0
+
+
+class CoverageMap:
+    """Headings the detector has already looked at, per altitude band.
+
+    Headings are split into `sector_deg` sectors and heights into `band_cm`
+    bands centred on `base` (the first height seen after a reset, unless given),
+    so base +- band_cm / 2 is band 0 whatever the base is. A sector counts as
+    scanned once a detection ran on a frame captured while the camera pointed
+    into it.
+    """
+
+    def __init__(self, sector_deg=10, band_cm=20, base=None):
+        self.sector_deg = sector_deg
+        self.band_cm = band_cm
+        self.base = base
+        self.sectors = int(round(360 / sector_deg))
+        self.scanned = {}  # band -> bool array over sectors
+
+    def reset(self):
+        self.scanned = {}
+        self.base = None
+
+    def band(self, height):
+        if self.base is None:
+            self.base = height
+        return math.floor((height - self.base + self.band_cm / 2) / self.band_cm)
+
+    def _row(self, height):
+        band = self.band(height)
+        row = self.scanned.get(band)
+        if row is None:
+            row = self.scanned[band] = np.zeros(self.sectors, dtype=bool)
+        return row
+
+    def _sector(self, heading):
+        return int((wrap_angle(heading) + 180.0) // self.sector_deg) % self.sectors
+
+    def mark(self, heading_from, heading_to, height):
+        # everything swept between two consecutive scanned headings (the short way round)
+        row = self._row(height)
+        delta = wrap_angle(heading_to - heading_from)
+        steps = max(1, int(abs(delta) // (self.sector_deg / 2)))
+        for k in range(steps + 1):
+            row[self._sector(heading_from + delta * k / steps)] = True
+
+    def is_scanned(self, heading, height):
+        return bool(self._row(height)[self._sector(heading)])
+
+    def fraction(self, height):
+        return float(self._row(height).mean())
+
+    def nearest_unscanned(self, heading, height):
+        # signed turn in degrees to the closest sector not yet scanned, or None when the band is done
+        row = self._row(height)
+        if row.all():
+            return None
+        centers = np.flatnonzero(~row) * self.sector_deg - 180.0 + self.sector_deg / 2
+        turns = (centers - heading + 180.0) % 360.0 - 180.0
+        return float(turns[np.argmin(np.abs(turns))])
+
+
+class SearchResult:
+    def __init__(self, box, confidence, heading, target_heading, height, elapsed, overshoot):
+        self.box = box
+        self.confidence = confidence
+        self.heading = heading                # yaw (deg) when the detected frame was captured
+        self.target_heading = target_heading  # yaw that faces the target
+        self.height = height
+        self.elapsed = elapsed                # time to find, s
+        self.overshoot = overshoot            # further yaw before the drone stopped, deg
+
+    def __repr__(self):
+        return (f"SearchResult(target_heading={self.target_heading:.0f}, height={self.height:.0f}, "
+                f"conf={self.confidence:.2f}, {self.elapsed:.1f} s)")
+
+
+class YawSearch:
+    """Target search that yaws continuously with send_rc_control.
+
+    Detection runs on the newest camera frame in a DetectionWorker the whole
+    time; each result marks the heading its frame was captured at in the
+    CoverageMap. The drone turns toward the nearest sector not yet scanned at
+    the current altitude, climbs or descends to the next entry of `altitudes`
+    (cm relative to the starting height) once the band is done, and stops on the
+    first detection with confidence >= threshold. Coverage is keyed on the
+    commanded level, not the measured height, so hover jitter cannot move a
+    lap into another band; frames captured while climbing are not marked. Headings come from the 10 Hz
+    state stream, interpolated to each frame's capture time; with turn_back the
+    drone then turns to face the target (box center and the camera's field of view).
+    """
+
+    def __init__(self, drone, read_frame, detect, coverage=None, yaw_speed=40, climb_speed=25,
+                 threshold=0.5, altitudes=(0, 20, -20), rate_hz=20, turn_back=True,
+                 frame_width=960, hfov_deg=82.6):
+        self.drone = drone
+        self.read_frame = read_frame
+        self.detect = detect          # frame -> (box, confidence) or (None, 0)
+        self.coverage = coverage if coverage is not None else CoverageMap()
+        self.yaw_speed = yaw_speed
+        self.climb_speed = climb_speed
+        self.threshold = threshold
+        self.altitudes = altitudes
+        self.period = 1.0 / rate_hz
+        self.turn_back = turn_back
+        self.frame_width = frame_width
+        self.focal = (frame_width / 2) / math.tan(math.radians(hfov_deg / 2))
+        self.history = collections.deque(maxlen=200)  # (t, unwrapped yaw)
+        self.last_scan = None         # (capture time, heading) of the previous detection
+
+    def _poll(self):
+        # current (unwrapped yaw, height); unwrapping keeps interpolation sane across +-180
+        yaw = float(self.drone.get_yaw())
+        if self.history:
+            yaw = self.history[-1][1] + wrap_angle(yaw - self.history[-1][1])
+        self.history.append((time.monotonic(), yaw))
+        return yaw, float(self.drone.get_height())
+
+    def heading_at(self, t):
+        times, yaws = zip(*self.history)
+        return float(np.interp(t, times, yaws))
+
+    def _scan(self, capture_time, level_height):
+        # level_height: the commanded height being scanned, None while climbing (nothing marked)
+        heading = self.heading_at(capture_time)
+        if level_height is None:
+            self.last_scan = None
+        elif self.last_scan is not None and capture_time - self.last_scan[0] < 1.0:
+            self.coverage.mark(self.last_scan[1], heading, level_height)
+        else:
+            self.coverage.mark(heading, heading, level_height)
+        if level_height is not None:
+            self.last_scan = (capture_time, heading)
+        return heading
+
+    def run(self, timeout=90.0):
+        # SearchResult once the target is seen, None when everything is scanned or time runs out
+        start = time.monotonic()
+        _, base_height = self._poll()
+        worker = DetectionWorker(self.read_frame, self.detect).start()
+        levels = list(self.altitudes)
+        direction = 1
+        seen_time = start
+        next_tick = start
+        try:
+            while time.monotonic() - start < timeout:
+                yaw, height = self._poll()
+                target_height = base_height + levels[0] if levels else None
+                at_level = target_height is not None and abs(height - target_height) <= 8
+                detection, capture_time = worker.latest()
+                if detection is not None and capture_time > seen_time:
+                    seen_time = capture_time
+                    box, confidence = detection
+                    heading = self._scan(capture_time, target_height if at_level else None)
+                    if box is not None and confidence >= self.threshold:
+                        self.drone.send_rc_control(0, 0, 0, 0)
+                        return self._found(box, confidence, heading, height, start)
+
+                if not levels:
+                    break
+                if not at_level:
+                    climb = self.climb_speed if target_height > height else -self.climb_speed
+                    self.drone.send_rc_control(0, 0, climb, 0)
+                else:
+                    turn = self.coverage.nearest_unscanned(yaw, target_height)
+                    if turn is None:
+                        levels.pop(0)
+                        self.drone.send_rc_control(0, 0, 0, 0)
+                        continue
+                    if abs(turn) > 90:
+                        turn = direction  # far away either way: keep turning the same way
+                    direction = 1 if turn > 0 else -1
+                    self.drone.send_rc_control(0, 0, 0, direction * self.yaw_speed)
+                next_tick += self.period
+                time.sleep(max(0.0, next_tick - time.monotonic()))
+            logging.info(f"Yaw search found nothing in {time.monotonic() - start:.1f} s")
+            return None
+        finally:
+            self.drone.send_rc_control(0, 0, 0, 0)
+            worker.stop()
+
+    def _found(self, box, confidence, heading, height, start):
+        elapsed = time.monotonic() - start
+        observe("search.time_to_find", elapsed)
+        time.sleep(0.3)  # let the turn come to rest before measuring the overshoot
+        yaw = self._poll()[0]
+        x1, _, x2, _ = box
+        target = heading + math.degrees(math.atan(((x1 + x2) / 2 - self.frame_width / 2) / self.focal))
+        turn = wrap_angle(target - yaw)
+        if self.turn_back and abs(turn) >= 5:
+            if turn > 0:
+                self.drone.rotate_clockwise(int(round(turn)))
+            else:
+                self.drone.rotate_counter_clockwise(int(round(-turn)))
+        result = SearchResult(box, confidence, wrap_angle(heading), wrap_angle(target), height, elapsed,
+                              yaw - heading)
+        logging.info(f"Yaw search: {result}")
+        return result